@@ -1,13 +1,33 @@
+import heapq
 import re
+import threading
 from datetime import datetime
-import jieba
+import tokenizer
 from collections import Counter
+from aho_corasick import AhoCorasick
+from autocomplete import PrefixTrie, load_suggestions
+from batch_scoring import BatchScorer
+from boolean_query import is_boolean_query, match_docs, parse_query
+from query_cache import DEFAULT_CACHE_SIZE, LRUMemo, normalize_query
+from job_facets import CITIES, job_city, parse_salary, salary_overlaps
+from search_index import MERGE_THRESHOLD, JobIndex
+
+# 薪資範圍，如 "40k-60k"、"年薪100萬~150萬"；以及單邊條件，如 "月薪60k以上"
+_SALARY_RANGE_RE = re.compile(r'(月薪|年薪|薪資|薪水)?\s*(\d+)([k萬]?)\s*[-~]\s*(\d+)([k萬]?)', re.IGNORECASE)
+_SALARY_BOUND_RE = re.compile(r'(月薪|年薪|薪資|薪水)?\s*(\d+)([k萬]?)\s*(以上|以下)', re.IGNORECASE)
+_SPACES_RE = re.compile(r'\s+')
 
 
 class AdvancedJobSearch:
     """高級職缺搜尋功能"""
 
-    def __init__(self):
+    def __init__(self, job_catalog=None, parse_cache_size=DEFAULT_CACHE_SIZE):
+        # 持久化職缺目錄（可選）
+        self.job_catalog = job_catalog
+
+        # 在背景預先載入分詞詞典，避免第一個查詢等待
+        tokenizer.initialize()
+
         # 技能關鍵字字典
         self.skill_keywords = {
             "programming": ["python", "java", "javascript", "react", "vue", "angular", "node.js", "php", "c++", "c#",
@@ -28,9 +48,62 @@ class AdvancedJobSearch:
         # 公司類型關鍵字
         self.company_type_keywords = ["外商", "新創", "上市", "傳統產業", "科技業", "金融業", "製造業"]
 
+        # 經驗等級與工作型態關鍵字，同時出現多種時以排在前面的為準
+        self.experience_keywords = {
+            "entry": ["新鮮人", "應屆", "無經驗"],
+            "senior": ["資深", "senior", "主管", "經理"],
+            "mid": ["中級", "2-5年", "有經驗"]
+        }
+        self.work_type_keywords = {
+            "remote": ["遠端", "remote", "在家", "居家"],
+            "onsite": ["現場", "辦公室", "on-site"],
+            "hybrid": ["混合", "hybrid", "彈性"]
+        }
+
+        # 所有條件關鍵字的多字串比對自動機，查詢只需掃描一次
+        self._matcher = self._build_matcher()
+
+        # 解析結果快取：快速回覆按鈕會讓許多用戶送出相同的文字
+        self._parse_cache = LRUMemo(parse_cache_size)
+
+        # 常駐的倒排索引，以 index_jobs 與 remove_jobs 增量更新；寫入時持有鎖，查詢不需要
+        self.index = self._new_index()
+        self._index_lock = threading.RLock()
+
+        # 最近一次傳入 filter_jobs 的 (職缺清單, 筆數, 索引)，同一份清單重複查詢時不必重建；
+        # 整組一次替換，多個執行緒同時查詢不同清單時不會取得別人的索引
+        self._list_cache = None
+
+        # 批次評分器，對應的索引改變時重建
+        self._batch_scorer = None
+
+        # 自動補全與相關搜尋的前綴樹，由離線建立的檔案載入
+        self.suggestions = load_suggestions()
+
+    def _build_matcher(self):
+        """建立條件關鍵字自動機，值為 (條件欄位, 關鍵字或等級)"""
+        patterns = [(location, ("locations", location)) for location in self.location_keywords]
+        patterns += [(company_type, ("company_types", company_type))
+                     for company_type in self.company_type_keywords]
+        patterns += [(skill, ("skills", skill))
+                     for skills in self.skill_keywords.values() for skill in skills]
+        patterns += [(word, ("experience_level", level))
+                     for level, words in self.experience_keywords.items() for word in words]
+        patterns += [(word, ("work_type", work_type))
+                     for work_type, words in self.work_type_keywords.items() for word in words]
+        # 職稱通用字尾，只從主關鍵字移除
+        patterns += [(word, ("strip", word)) for word in ["工程師", "設計師"]]
+        return AhoCorasick(patterns)
+
     def parse_search_query(self, query):
-        """解析搜尋查詢，提取不同類型的條件"""
-        query = query.strip()
+        """解析搜尋查詢，提取不同類型的條件；結果為唯讀且會快取"""
+        return self._parse_cache.get_or_compute(normalize_query(query), self._parse_search_query)
+
+    def parse_cache_stats(self):
+        """查詢解析快取的命中統計"""
+        return self._parse_cache.stats()
+
+    def _parse_search_query(self, query):
 
         parsed = {
             "original_query": query,
@@ -43,67 +116,54 @@ class AdvancedJobSearch:
             "work_type": None
         }
 
-        # 轉換為小寫以便比較
-        query_lower = query.lower()
-
-        # 提取主要關鍵字（移除特殊條件後剩餘的）
-        main_query = query
-
-        # 提取薪資條件
-        salary_matches = re.findall(r'(\d+)([k萬]?)\s*[-~]\s*(\d+)([k萬]?)', query_lower)
-        if salary_matches:
-            for match in salary_matches:
-                min_sal, min_unit, max_sal, max_unit = match
-                parsed["salary_range"] = {
-                    "min": self._normalize_salary(min_sal, min_unit),
-                    "max": self._normalize_salary(max_sal, max_unit)
-                }
-                # 從主查詢中移除薪資條件
-                main_query = re.sub(rf'{min_sal}{min_unit}[-~]{max_sal}{max_unit}', '', main_query, flags=re.IGNORECASE)
-
-        # 提取地點
-        for location in self.location_keywords:
-            if location in query:
-                parsed["locations"].append(location)
-                main_query = main_query.replace(location, '')
-
-        # 提取公司類型
-        for company_type in self.company_type_keywords:
-            if company_type in query:
-                parsed["company_types"].append(company_type)
-                main_query = main_query.replace(company_type, '')
-
-        # 提取技能
-        all_skills = []
-        for category, skills in self.skill_keywords.items():
-            for skill in skills:
-                if skill in query_lower:
-                    parsed["skills"].append(skill)
-                    all_skills.append(skill)
-
-        # 提取經驗等級
-        if any(word in query_lower for word in ["新鮮人", "應屆", "無經驗"]):
-            parsed["experience_level"] = "entry"
-        elif any(word in query_lower for word in ["資深", "senior", "主管", "經理"]):
-            parsed["experience_level"] = "senior"
-        elif any(word in query_lower for word in ["中級", "2-5年", "有經驗"]):
-            parsed["experience_level"] = "mid"
-
-        # 提取工作型態
-        if any(word in query_lower for word in ["遠端", "remote", "在家", "居家"]):
-            parsed["work_type"] = "remote"
-        elif any(word in query_lower for word in ["現場", "辦公室", "on-site"]):
-            parsed["work_type"] = "onsite"
-        elif any(word in query_lower for word in ["混合", "hybrid", "彈性"]):
-            parsed["work_type"] = "hybrid"
+        # 標記要從主關鍵字移除的字元（薪資、地點、公司類型與職稱字尾）
+        removed = [False] * len(query)
+
+        # 提取薪資條件，有多個範圍時以最後一個為準；年薪換算為月薪
+        for match in _SALARY_RANGE_RE.finditer(query):
+            prefix, min_sal, min_unit, max_sal, max_unit = match.groups()
+            months = 12 if prefix == "年薪" else 1
+            parsed["salary_range"] = {
+                "min": self._normalize_salary(min_sal, min_unit) // months,
+                "max": self._normalize_salary(max_sal, max_unit) // months
+            }
+            removed[match.start():match.end()] = [True] * (match.end() - match.start())
+
+        # 「60k以上」只設下限、「80k以下」只設上限
+        for match in _SALARY_BOUND_RE.finditer(query):
+            if any(removed[match.start():match.end()]):
+                continue
+            prefix, amount, unit, bound = match.groups()
+            amount = self._normalize_salary(amount, unit) // (12 if prefix == "年薪" else 1)
+            parsed["salary_range"] = {"min": amount, "max": None} if bound == "以上" else {"min": 0, "max": amount}
+            removed[match.start():match.end()] = [True] * (match.end() - match.start())
+
+        # 單次掃描取得地點、公司類型、技能、經驗等級與工作型態
+        levels = {"experience_level": set(), "work_type": set()}
+        for start, end, (field, value) in self._matcher.iter_matches(query):
+            if field in levels:
+                levels[field].add(value)
+                continue
+
+            if field != "strip" and value not in parsed[field]:
+                parsed[field].append(value)
+            if field != "skills":
+                removed[start:end] = [True] * (end - start)
+
+        parsed["experience_level"] = next(
+            (level for level in self.experience_keywords if level in levels["experience_level"]), None
+        )
+        parsed["work_type"] = next(
+            (work_type for work_type in self.work_type_keywords if work_type in levels["work_type"]), None
+        )
 
         # 清理主關鍵字
-        main_query = re.sub(r'\s+', ' ', main_query.strip())
-        main_query = main_query.replace('工程師', '').replace('設計師', '').strip()
+        main_query = ''.join(char for char, drop in zip(query, removed) if not drop)
+        main_query = _SPACES_RE.sub(' ', main_query).strip()
 
         if main_query:
             # 使用 jieba 分詞提取關鍵字
-            keywords = jieba.lcut(main_query)
+            keywords = tokenizer.lcut(main_query)
             parsed["main_keywords"] = [kw.strip() for kw in keywords if len(kw.strip()) > 1]
 
         return parsed
@@ -118,23 +178,265 @@ class AdvancedJobSearch:
         else:
             return amount
 
-    def filter_jobs(self, jobs, search_conditions):
-        """根據搜尋條件過濾職缺"""
-        filtered_jobs = []
+    def _new_index(self, jobs=None):
+        skills = [skill for skills in self.skill_keywords.values() for skill in skills]
+        return JobIndex(jobs, phrases=skills)
+
+    def index_jobs(self, jobs):
+        """將職缺加入常駐索引，相同 ID 的職缺取代舊版本，之後可用 filter_jobs(None, 條件) 查詢
+
+        只處理傳入的職缺，不重建索引；更新期間查詢照常進行。
+        """
+        with self._index_lock:
+            self.index.add_many(jobs)
+            self.merge_index()
+
+        # 保存新職缺的分詞結果，重新啟動後重建索引不必再分詞
+        tokenizer.save_token_cache(force=False)
+
+    def remove_jobs(self, job_ids):
+        """從常駐索引刪除職缺，回傳刪除筆數"""
+        with self._index_lock:
+            removed = sum(1 for job_id in job_ids if self.index.remove(job_id))
+            self.merge_index()
+        return removed
+
+    def merge_index(self, force=False):
+        """已刪除的文件比例超過門檻（或 force 為 True）時合併常駐索引，回傳是否合併
+
+        新索引建好後才替換，進行中的查詢繼續使用原本的索引。
+        """
+        with self._index_lock:
+            index = self.index
+            if not index.size or (not force and index.deleted_ratio < MERGE_THRESHOLD):
+                return False
+            self.index = index.merged()
+        return True
+
+    def _index_for(self, jobs):
+        """取得職缺清單的索引：None 表示常駐索引，其他清單依物件身分快取"""
+        if jobs is None:
+            return self.index
+
+        cached = self._list_cache
+        if cached is not None and cached[0] is jobs and cached[1] == len(jobs):
+            return cached[2]
+
+        index = self._new_index(jobs)
+        self._list_cache = (jobs, len(jobs), index)
+        return index
+
+    def _query_terms(self, conditions):
+        """查詢條件中用於索引比對的詞"""
+        return [term.lower() for term in conditions["main_keywords"] + conditions["skills"]]
+
+    def _index_terms(self, index, conditions):
+        """查詢詞對應到索引中的詞，拼錯的詞以最接近的索引詞代替"""
+        return index.resolve_terms(self._query_terms(conditions))
+
+    def _facet_mask(self, index, facets, size):
+        """分面篩選條件轉為前 size 份文件的位元組遮罩，可 O(1) 判斷文件是否符合；沒有條件時回傳 None"""
+        if not facets:
+            return None
+        return index.facets.mask(facets, size)
+
+    def _iter_scores(self, index, conditions, facets=None):
+        """逐一產生 (分數, 文件編號)，不複製職缺；不符合或已刪除的職缺不產生
+
+        只處理開始時已在索引中的文件，查詢期間加入的職缺留到下一次查詢。
+        """
+        size = index.size
+        terms = self._index_terms(index, conditions)
+        mask = self._facet_mask(index, facets, size)
+
+        salary_range = conditions["salary_range"]
+
+        if terms:
+            # 只評分至少含一個查詢詞的候選職缺：BM25F 文字分數再乘上條件加權
+            scores = index.score(terms)
+            # 有薪資條件時候選職缺為倒排清單與薪資索引的交集，薪資不符的直接排除
+            docs = index.candidates(terms, salary_range) if salary_range else scores
+            for doc in docs:
+                if doc >= size or mask is not None and not mask[doc >> 3] >> (doc & 7) & 1:
+                    continue
+                text_score = scores.get(doc)
+                if text_score is None:
+                    continue
+                boost = self._condition_boost(index.job(doc), conditions, bool(salary_range))
+                yield round(text_score * (1 + boost), 4), doc
+            return
+
+        # 薪資條件由排序索引一次查出符合的職缺，不必逐一解析薪資文字
+        salary_docs = set(index.salary_docs(salary_range)) if salary_range else None
+
+        # 沒有文字條件時依地點、薪資等條件評分；只有薪資條件時只需看薪資索引的結果
+        if salary_docs is not None and not conditions["locations"] and not conditions["company_types"]:
+            docs = sorted(doc for doc in salary_docs if doc < size)
+        else:
+            docs = (doc for doc in range(size) if not index.is_deleted(doc))
 
-        for job in jobs:
-            score = self._calculate_job_score(job, search_conditions)
+        for doc in docs:
+            if mask is not None and not mask[doc >> 3] >> (doc & 7) & 1:
+                continue
+            salary_match = salary_docs is not None and doc in salary_docs
+            score = self._calculate_job_score(index.job(doc), conditions, salary_match)
             if score > 0:
-                job_copy = job.copy()
-                job_copy["relevance_score"] = score
-                filtered_jobs.append(job_copy)
+                yield score, doc
+
+    def _scored_job(self, index, score, doc):
+        """複製職缺並附上相關度分數"""
+        job_copy = index.job(doc).copy()
+        job_copy["relevance_score"] = score
+        return job_copy
+
+    def filter_jobs(self, jobs, search_conditions, facets=None):
+        """根據搜尋條件過濾職缺，jobs 為 None 時查詢常駐索引
+
+        facets 可再以 {"city": "台北", "salary_band": ["6-8萬", "8-10萬"]} 等分面值縮小範圍。
+        """
+        index = self._index_for(jobs)
+
+        # 按相關度排序，同分時維持職缺原本的順序
+        ranked = sorted(self._iter_scores(index, search_conditions, facets),
+                        key=lambda item: (-item[0], item[1]))
+
+        return [self._scored_job(index, score, doc) for score, doc in ranked]
+
+    def top_jobs(self, jobs, search_conditions, k=10, facets=None):
+        """取得相關度最高的 k 個職缺，排序與 filter_jobs 相同
+
+        以大小為 k 的堆積挑選 (分數, 文件編號)，只有回傳的職缺才會被複製。
+        """
+        index = self._index_for(jobs)
+        best = heapq.nlargest(k, self._iter_scores(index, search_conditions, facets),
+                              key=lambda item: (item[0], -item[1]))
+
+        return [self._scored_job(index, score, doc) for score, doc in best]
+
+    def score_many(self, jobs, queries, k=10, facets=None):
+        """一次取得多個查詢各自相關度最高的 k 個職缺，jobs 為 None 時查詢常駐索引
+
+        供通知等批次作業使用：只以 BM25F 文字分數排序，查詢中的薪資範圍與城市
+        視為必要條件，不符合的職缺直接排除；facets 套用到所有查詢。
+        安裝 numpy 時所有查詢的權重以陣列運算一次累加評分。
+        """
+        index = self._index_for(jobs)
+        scorer = self._batch_scorer
+        if scorer is None or scorer.index is not index:
+            scorer = self._batch_scorer = BatchScorer(index)
+
+        batch = []
+        for query in queries:
+            conditions = self.parse_search_query(query)
+            query_facets = dict(facets or {})
+            cities = sorted({location if location in CITIES else "遠端" for location in conditions["locations"]})
+            if cities:
+                query_facets.setdefault("city", cities)
+            batch.append({
+                "terms": self._index_terms(index, conditions),
+                "salary_range": conditions["salary_range"],
+                "facets": query_facets
+            })
+
+        return [[self._scored_job(index, round(score, 4), doc) for score, doc in best]
+                for best in scorer.score_many(batch, k)]
+
+    def facet_counts(self, jobs, search_conditions, attributes=None, facets=None):
+        """搜尋結果在城市、平台、薪資級距、職位層級的分布，供快速回覆縮小範圍
+
+        回傳 {屬性: [(值, 數量)]}，計數以結果位元圖與各分面位元圖 AND 後 popcount 取得。
+        """
+        index = self._index_for(jobs)
+        terms = self._index_terms(index, search_conditions)
+
+        # 文字查詢的結果即候選集合；其他查詢需依條件評分才知道哪些職缺符合
+        if terms:
+            result = index.bitmap(index.candidates(terms, search_conditions["salary_range"]))
+            if facets:
+                result &= index.facets.select(facets)
+        else:
+            result = index.bitmap(doc for _, doc in self._iter_scores(index, search_conditions, facets))
+
+        return index.facets.counts(result, attributes)
+
+    def boolean_search(self, jobs, query, k=None, facets=None):
+        """以布林語法查詢，jobs 為 None 時查詢常駐索引
+
+        支援 AND（空白）、OR（| 或 OR）、NOT（- 或 NOT）、括號與欄位前綴 title:、company:、city:，
+        例如 "Python 後端 -外包 台北|新竹"；與城市同名的詞視為城市條件。
+        相符的職缺由排序的倒排清單交集、聯集與差集求得，再依未被排除的詞以 BM25F 排序，
+        查詢中的薪資範圍（如 "40k-60k"）視為必要條件。k 為 None 時回傳所有相符職缺。
+        """
+        index = self._index_for(jobs)
+        conditions = self.parse_search_query(query)
+
+        # 薪資範圍不屬於布林語法，先從查詢中移除
+        text = _SALARY_BOUND_RE.sub(' ', _SALARY_RANGE_RE.sub(' ', query))
+        docs, terms = match_docs(parse_query(text), index)
+
+        if conditions["salary_range"]:
+            allowed = set(index.salary_docs(conditions["salary_range"]))
+            docs = [doc for doc in docs if doc in allowed]
+        if facets:
+            # 相符文件都在開始查詢時的文件數以內，此時的文件數只會更大
+            mask = self._facet_mask(index, facets, index.size)
+            docs = [doc for doc in docs if mask[doc >> 3] >> (doc & 7) & 1]
+
+        scores = index.score(terms) if terms else {}
+        ranked = ((round(scores.get(doc, 0.0), 4), doc) for doc in docs)
+        if k is None:
+            best = sorted(ranked, key=lambda item: (-item[0], item[1]))
+        else:
+            best = heapq.nlargest(k, ranked, key=lambda item: (item[0], -item[1]))
+
+        return [self._scored_job(index, score, doc) for score, doc in best]
 
-        # 按相關度排序
-        filtered_jobs.sort(key=lambda x: x["relevance_score"], reverse=True)
+    def search_catalog(self, query, limit=50):
+        """從職缺目錄以索引取得候選職缺後排序
 
-        return filtered_jobs
+        使用布林語法的查詢直接在常駐索引上計算（需先以 index_jobs 加入目錄的職缺），
+        排除與 OR 條件必須看到所有職缺才正確，不能只在標籤查詢的部分結果上篩選。
+        """
+        if is_boolean_query(query):
+            return self.boolean_search(None, query, limit)
 
-    def _calculate_job_score(self, job, conditions):
+        if self.job_catalog is None:
+            return []
+
+        conditions = self.parse_search_query(query)
+        tags = list(conditions["main_keywords"] + conditions["skills"]) + [query.strip().lower()]
+        candidates = self.job_catalog.search(tags=tags, limit=limit * 5)
+
+        return self.top_jobs(candidates, conditions, limit)
+
+    def _condition_boost(self, job, conditions, salary_match=None):
+        """地點、薪資、公司類型符合時的加權比例，比重沿用原本相對於標題的 15:10:5 比 40
+
+        salary_match 為薪資索引的查詢結果，未提供時才解析職缺的薪資文字。
+        """
+        boost = 0.0
+
+        locations = conditions["locations"]
+        if locations:
+            job_location = job.get("location", "").lower()
+            matched = sum(1 for location in locations if location.lower() in job_location)
+            boost += 0.375 * matched / len(locations)
+
+        if conditions["salary_range"]:
+            if salary_match is None:
+                salary_match = self._salary_in_range(self._extract_salary_from_job(job), conditions["salary_range"])
+            if salary_match:
+                boost += 0.25
+
+        company_types = conditions["company_types"]
+        if company_types:
+            company_info = (job.get("company", "") + " " + job.get("description", "")).lower()
+            matched = sum(1 for company_type in company_types if company_type in company_info)
+            boost += 0.125 * matched / len(company_types)
+
+        return boost
+
+    def _calculate_job_score(self, job, conditions, salary_match=None):
         """計算職缺與搜尋條件的匹配分數"""
         score = 0
         max_score = 0
@@ -165,8 +467,9 @@ class AdvancedJobSearch:
         # 薪資匹配 (權重: 10%)
         if conditions["salary_range"]:
             max_score += 10
-            job_salary = self._extract_salary_from_job(job)
-            if job_salary and self._salary_in_range(job_salary, conditions["salary_range"]):
+            if salary_match is None:
+                salary_match = self._salary_in_range(self._extract_salary_from_job(job), conditions["salary_range"])
+            if salary_match:
                 score += 10
 
         # 公司類型匹配 (權重: 5%)
@@ -186,64 +489,91 @@ class AdvancedJobSearch:
         return relative_score if relative_score >= 30 else 0
 
     def _extract_salary_from_job(self, job):
-        """從職缺中提取薪資資訊"""
-        salary_text = job.get("salary", "")
-        if not salary_text or salary_text == "面議":
-            return None
-
-        # 提取數字
-        numbers = re.findall(r'(\d+)', salary_text)
-        if numbers:
-            # 假設是月薪，轉換為年薪比較
-            monthly_salary = int(numbers[0])
-            if "萬" in salary_text:
-                monthly_salary *= 10000
-            elif "k" in salary_text.lower():
-                monthly_salary *= 1000
-
-            return monthly_salary
-
-        return None
+        """從職缺中提取月薪範圍 (下限, 上限)，面議等無法解析時回傳 None"""
+        # 千分位逗號與年薪換算由 parse_salary 處理（原本 "60,000" 只會讀到 60）
+        return parse_salary(job.get("salary", ""))
 
     def _salary_in_range(self, job_salary, salary_range):
-        """檢查薪資是否在指定範圍內"""
+        """檢查職缺薪資範圍是否與指定範圍重疊"""
         if not job_salary or not salary_range:
             return False
 
-        min_salary = salary_range.get("min", 0)
-        max_salary = salary_range.get("max", float('inf'))
+        return salary_overlaps(job_salary, salary_range.get("min"), salary_range.get("max"))
 
-        return min_salary <= job_salary <= max_salary
+    def _job_skills(self, job):
+        """職缺標題與描述中出現的技能，依第一次出現的順序"""
+        text = job.get("title", "") + " " + job.get("description", "")
+        skills = []
+        for _, _, (kind, value) in self._matcher.iter_matches(text):
+            if kind == "skills" and value not in skills:
+                skills.append(value)
+        return skills
 
-    def suggest_related_searches(self, query, jobs):
-        """根據搜尋結果建議相關搜尋"""
-        suggestions = []
+    def build_suggestions(self, jobs=None, popular_keywords=()):
+        """由職缺標題、技能與熱門搜尋建立前綴樹，jobs 為 None 時使用常駐索引的職缺
 
-        # 從搜尋結果中提取常見技能
-        all_text = ""
-        for job in jobs[:10]:  # 只分析前10個結果
-            all_text += job.get("title", "") + " " + job.get("description", "") + " "
+        popular_keywords 為 [(關鍵字, 次數)]；標題與技能、技能與技能、標題與城市
+        同時出現的次數作為相關搜尋。建立後取代目前的前綴樹並回傳。
+        """
+        if jobs is None:
+            jobs = [self.index.job(doc) for doc in self.index.live_docs()]
+
+        trie = PrefixTrie()
+        for job in jobs:
+            title = job.get("title", "").strip()
+            skills = self._job_skills(job)
+            city = job_city(job)
+
+            if title:
+                trie.add(title)
+                for skill in skills:
+                    trie.add_related(title, skill)
+                    trie.add_related(skill, title)
+                if city != "其他":
+                    trie.add(city, 0)
+                    trie.add_related(title, city)
 
-        # 提取技能建議
-        skill_suggestions = []
-        for category, skills in self.skill_keywords.items():
             for skill in skills:
-                if skill.lower() in all_text.lower():
-                    skill_suggestions.append(skill)
+                trie.add(skill)
+                for other in skills:
+                    trie.add_related(skill, other)
+
+        for keyword, count in popular_keywords:
+            trie.add(keyword, count)
 
-        # 取最常見的技能
-        if skill_suggestions:
-            skill_counter = Counter(skill_suggestions)
-            top_skills = [skill for skill, count in skill_counter.most_common(3)]
-            suggestions.extend([f"{query} {skill}" for skill in top_skills])
+        trie.build()
+        self.suggestions = trie
+        return trie
 
-        # 地點建議
-        location_suggestions = ["台北", "新竹", "台中", "遠端工作"]
-        suggestions.extend([f"{query} {loc}" for loc in location_suggestions[:2]])
+    def autocomplete(self, prefix, k=5):
+        """以 prefix 開頭、出現次數最多的 k 個職稱、技能或熱門搜尋"""
+        return [term for term, _ in self.suggestions.complete(prefix, k)]
+
+    def suggest_related_searches(self, query, jobs):
+        """根據前綴樹的共同出現次數建議相關搜尋；尚未建立前綴樹時改由搜尋結果提取技能"""
+        query = query.strip()
+
+        # 輸入到一半的查詢以補全結果為準，如「前端工」→「前端工程師」
+        base = self.suggestions.resolve(query) or query
+        related = [term for term, _ in self.suggestions.related(base, 4)]
+        if related:
+            query = base
+        else:
+            # 只分析前10個結果，每個職缺掃描一次取出技能與城市
+            counter = Counter()
+            for job in jobs[:10]:
+                counter.update(self._job_skills(job))
+            related = [skill for skill, _ in counter.most_common(3)]
+            cities = Counter(job_city(job) for job in jobs[:10])
+            related += [city for city, _ in cities.most_common(2) if city != "其他"]
+
+        lowered = query.lower()
+        suggestions = [f"{query} {term}" for term in related
+                       if term.lower() not in lowered and lowered not in term.lower()]
 
         # 經驗等級建議
         exp_suggestions = ["新鮮人", "資深", "主管"]
-        suggestions.extend([f"{exp} {query}" for exp in exp_suggestions[:2]])
+        suggestions.extend([f"{exp} {query}" for exp in exp_suggestions[:2] if exp not in query])
 
         return suggestions[:6]  # 最多返回6個建議
 
@@ -263,7 +593,12 @@ class AdvancedJobSearch:
         if conditions["salary_range"]:
             min_sal = conditions["salary_range"]["min"]
             max_sal = conditions["salary_range"]["max"]
-            summary_parts.append(f"薪資: {min_sal:,} - {max_sal:,}")
+            if max_sal is None:
+                summary_parts.append(f"薪資: {min_sal:,} 以上")
+            elif not min_sal:
+                summary_parts.append(f"薪資: {max_sal:,} 以下")
+            else:
+                summary_parts.append(f"薪資: {min_sal:,} - {max_sal:,}")
 
         if conditions["company_types"]:
             summary_parts.append(f"公司類型: {', '.join(conditions['company_types'])}")
@@ -0,0 +1,78 @@
+from collections import deque
+
+
+class AhoCorasick:
+    """Aho-Corasick 多字串比對：掃描一次文字即可找出所有關鍵字（含重疊）
+
+    比對不分大小寫，每個關鍵字可附帶多個值，例如 ("location", "台北")。
+    """
+
+    def __init__(self, patterns=None):
+        # 字典樹：每個節點的子節點、失敗連結與結尾的 (長度, 值)
+        self._goto = [{}]
+        self._own_output = [[]]
+        self._fail = [0]
+        self._output = [[]]
+        self._built = True
+        for pattern, value in (patterns or []):
+            self.add(pattern, value)
+
+    def add(self, pattern, value):
+        """加入關鍵字與對應的值"""
+        pattern = pattern.lower()
+        if not pattern:
+            return
+
+        node = 0
+        for char in pattern:
+            child = self._goto[node].get(char)
+            if child is None:
+                child = len(self._goto)
+                self._goto.append({})
+                self._own_output.append([])
+                self._goto[node][char] = child
+            node = child
+
+        self._own_output[node].append((len(pattern), value))
+        self._built = False
+
+    def _build(self):
+        """以廣度優先建立失敗連結，並把失敗節點的輸出合併進來"""
+        fail = [0] * len(self._goto)
+        output = [list(values) for values in self._own_output]
+
+        queue = deque(self._goto[0].values())
+        while queue:
+            node = queue.popleft()
+            for char, child in self._goto[node].items():
+                queue.append(child)
+                state = fail[node]
+                while state and char not in self._goto[state]:
+                    state = fail[state]
+                target = self._goto[state].get(char, 0)
+                fail[child] = target if target != child else 0
+                output[child].extend(output[fail[child]])
+
+        # 一次替換，其他執行緒不會看到建到一半的表
+        self._fail, self._output = fail, output
+        self._built = True
+
+    def iter_matches(self, text):
+        """逐一產生 (起點, 終點, 值)，位置對應原始文字"""
+        if not self._built:
+            self._build()
+
+        lowered = text.lower()
+        if len(lowered) != len(text):
+            # 少數字元轉小寫後長度會改變，改為逐字轉換以維持位置對應
+            lowered = ''.join(char.lower()[0] for char in text)
+
+        goto, fail, output = self._goto, self._fail, self._output
+        node = 0
+        for i, char in enumerate(lowered):
+            while node and char not in goto[node]:
+                node = fail[node]
+            node = goto[node].get(char, 0)
+            if output[node]:
+                for length, value in output[node]:
+                    yield i + 1 - length, i + 1, value
@@ -2,11 +2,16 @@ from flask import Flask, request, abort
 from linebot import LineBotApi, WebhookHandler
 from linebot.exceptions import InvalidSignatureError
 from linebot.models import (
-    MessageEvent, TextMessage, TextSendMessage,
-    QuickReply, QuickReplyButton, MessageAction
+    MessageEvent, TextMessage, TextSendMessage, PostbackEvent,
+    QuickReply, QuickReplyButton, MessageAction, PostbackAction
 )
 import os
 import threading
+import tokenizer
+from advanced_search import AdvancedJobSearch
+from autocomplete import load_suggestions
+from boolean_query import included_terms, is_boolean_query, parse_query
+from result_pages import ResultPages, page_postback_data, parse_page_postback
 
 # 導入零依賴爬蟲
 try:
@@ -33,6 +38,21 @@ handler = WebhookHandler(LINE_CHANNEL_SECRET)
 # 初始化爬蟲
 job_crawler = ZeroDependencyCrawler()
 
+# 搜尋結果分頁，「下一頁」直接從保存的結果取出，不必重新搜尋
+result_pages = ResultPages()
+
+# 每頁顯示的職缺數量
+JOBS_PER_PAGE = 8
+
+# 布林查詢（如 "Python -外包 台北|新竹"）最多分別爬取幾個詞
+MAX_BOOLEAN_CRAWL_TERMS = 4
+
+# 以布林條件篩選、排序爬取結果
+advanced_search = AdvancedJobSearch()
+
+# 在背景預先載入分詞詞典，第一位用戶查詢時不必等待
+tokenizer.initialize()
+
 
 def create_main_menu():
     """建立主選單"""
@@ -44,7 +64,15 @@ def create_main_menu():
 
 
 def create_popular_jobs_menu():
-    """建立熱門職缺選單"""
+    """建立熱門職缺選單，有離線建立的建議詞時以出現次數最多的職稱與熱門搜尋為準"""
+    popular = load_suggestions().complete("", 6)
+    if popular:
+        # 快速回覆按鈕標籤上限 20 字
+        return QuickReply(items=[
+            QuickReplyButton(action=MessageAction(label=f"🔥 {term}"[:20], text=term))
+            for term, _ in popular
+        ])
+
     return QuickReply(items=[
         QuickReplyButton(action=MessageAction(label="💻 軟體工程師", text="軟體工程師")),
         QuickReplyButton(action=MessageAction(label="📱 產品經理", text="產品經理")),
@@ -55,34 +83,70 @@ def create_popular_jobs_menu():
     ])
 
 
-def create_simple_job_text(jobs, keyword):
-    """創建簡單的職缺文字訊息"""
+def create_simple_job_text(jobs, keyword, offset=0, total=None):
+    """創建簡單的職缺文字訊息
+
+    jobs 為分頁結果的一頁時，offset 為這一頁的起始位置，total 為全部結果數量。
+    """
     if not jobs:
         return f"😅 沒有找到「{keyword}」相關職缺"
 
-    job_text = f"🎯 找到 {len(jobs)} 個「{keyword}」職缺：\n\n"
+    total = len(jobs) if total is None else total
+    page_jobs = jobs[:JOBS_PER_PAGE]
+
+    if offset:
+        job_text = f"🎯 「{keyword}」職缺第 {offset + 1}-{offset + len(page_jobs)} 個（共 {total} 個）：\n\n"
+    else:
+        job_text = f"🎯 找到 {total} 個「{keyword}」職缺：\n\n"
 
-    for i, job in enumerate(jobs[:8], 1):  # 最多顯示8個
+    for i, job in enumerate(page_jobs, offset + 1):
         job_text += f"📋 {i}. {job['title']}\n"
         job_text += f"🏢 {job['company']}\n"
         job_text += f"💰 {job['salary']}\n"
         job_text += f"📍 {job['location']}\n"
         job_text += f"🔗 {job['url']}\n\n"
 
-    if len(jobs) > 8:
-        job_text += f"...等共 {len(jobs)} 個職缺\n\n"
+    remaining = total - offset - len(page_jobs)
+    if remaining > 0:
+        job_text += f"...還有 {remaining} 個職缺，點選「下一頁」繼續查看\n\n"
 
     job_text += "💡 點擊連結查看完整職缺資訊並投遞履歷"
     return job_text
 
 
+def create_page_menu(cursor, next_offset):
+    """分頁結果的快速回覆：還有下一頁時加上「下一頁」按鈕"""
+    if next_offset is None:
+        return create_main_menu()
+    return QuickReply(items=[
+        QuickReplyButton(action=PostbackAction(
+            label="👉 下一頁", data=page_postback_data(cursor, next_offset), display_text="下一頁"
+        )),
+        QuickReplyButton(action=MessageAction(label="🔍 找工作", text="我要找工作")),
+        QuickReplyButton(action=MessageAction(label="🔥 熱門職缺", text="熱門職缺"))
+    ])
+
+
+def crawl_jobs(keyword):
+    """爬取職缺；布林查詢的每個未被排除的詞分別爬取，合併後再以布林條件篩選與排序"""
+    if not is_boolean_query(keyword):
+        return job_crawler.search_all_platforms(keyword, limit_per_platform=5)
+
+    jobs = {}
+    terms = list(dict.fromkeys(included_terms(parse_query(keyword))))
+    for term in terms[:MAX_BOOLEAN_CRAWL_TERMS]:
+        for job in job_crawler.search_all_platforms(term, limit_per_platform=5):
+            jobs.setdefault(job.get("url") or job.get("id"), job)
+    return advanced_search.boolean_search(list(jobs.values()), keyword)
+
+
 def search_jobs_async(keyword, user_id):
     """非同步搜尋職缺"""
     try:
         print(f"🚀 開始搜尋：{keyword}")
 
         # 搜尋職缺
-        jobs = job_crawler.search_all_platforms(keyword, limit_per_platform=5)
+        jobs = crawl_jobs(keyword)
 
         if jobs:
             # 發送結果摘要
@@ -105,11 +169,13 @@ def search_jobs_async(keyword, user_id):
                 TextSendMessage(text=summary_text.strip(), quick_reply=create_main_menu())
             )
 
-            # 發送職缺詳細資訊
-            job_details_text = create_simple_job_text(jobs, keyword)
+            # 保存完整結果，只發送第一頁
+            cursor = result_pages.create(jobs, keyword, user_id)
+            page = result_pages.page(cursor, 0, JOBS_PER_PAGE, user_id)
+            job_details_text = create_simple_job_text(page["jobs"], keyword, 0, page["total"])
             line_bot_api.push_message(
                 user_id,
-                TextSendMessage(text=job_details_text)
+                TextSendMessage(text=job_details_text, quick_reply=create_page_menu(cursor, page["next_offset"]))
             )
 
             print(f"✅ 搜尋完成，發送了 {len(jobs)} 個職缺")
@@ -219,6 +285,11 @@ def handle_message(event):
 • 「軟體工程師」
 • 「UI設計師」
 
+🧩 進階搜尋：
+• 「Python 後端 -外包」：- 排除含有該詞的職缺
+• 「前端|後端 台北|新竹」：| 表示任一即可
+• 「title:工程師 company:"台積電"」：限定職稱或公司
+
 🔍 搜尋特色：
 • 零依賴衝突，100%穩定
 • 智能職缺匹配系統
@@ -308,6 +379,29 @@ def handle_message(event):
         search_thread.start()
 
 
+@handler.add(PostbackEvent)
+def handle_postback(event):
+    """處理按鈕回傳：「下一頁」從保存的搜尋結果取出下一頁"""
+    parsed = parse_page_postback(event.postback.data)
+    if parsed is None:
+        return
+
+    cursor, offset = parsed
+    page = result_pages.page(cursor, offset, JOBS_PER_PAGE, event.source.user_id)
+    if page is None or not page["jobs"]:
+        line_bot_api.reply_message(
+            event.reply_token,
+            TextSendMessage(text="⌛ 搜尋結果已過期，請重新搜尋", quick_reply=create_main_menu())
+        )
+        return
+
+    job_details_text = create_simple_job_text(page["jobs"], page["keyword"], page["offset"], page["total"])
+    line_bot_api.reply_message(
+        event.reply_token,
+        TextSendMessage(text=job_details_text, quick_reply=create_page_menu(cursor, page["next_offset"]))
+    )
+
+
 @app.route('/')
 def home():
     """首頁"""
@@ -428,6 +522,11 @@ def handle_message(event):
 • 「軟體工程師」
 • 「UI設計師」
 
+🧩 進階搜尋：
+• 「Python 後端 -外包」：- 排除含有該詞的職缺
+• 「前端|後端 台北|新竹」：| 表示任一即可
+• 「title:工程師 company:"台積電"」：限定職稱或公司
+
 🔍 搜尋特色：
 • 智能職缺匹配
 • 多平台整合搜尋
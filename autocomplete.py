@@ -0,0 +1,202 @@
+import argparse
+import os
+import threading
+import time
+from serializer import read_file, write_file
+
+# 離線建立的建議詞檔案，由定時任務或 python autocomplete.py 更新
+SUGGESTIONS_FILE = os.getenv('SUGGESTIONS_FILE', 'suggestions.json')
+
+# 每個前綴保留的補全數量
+DEFAULT_TOP_K = 10
+
+
+class PrefixTrie:
+    """前綴樹自動補全：每個節點預先存好該前綴下次數最高的 k 個詞
+
+    補全只需沿著前綴走到節點再取出清單，與詞庫大小無關。
+    詞的比對不分大小寫，回傳時保留第一次加入時的寫法；
+    另外記錄詞與詞的共同出現次數，作為相關搜尋。
+    """
+
+    def __init__(self, top_k=DEFAULT_TOP_K):
+        self.top_k = top_k
+        # 小寫詞 → [顯示文字, 次數]，以及小寫詞 → {相關詞小寫: 次數}
+        self._terms = {}
+        self._related_counts = {}
+        # 字典樹：每個節點的子節點與預先排序的前 k 個詞
+        self._children = [{}]
+        self._top = [[]]
+        self._related = {}
+        self._built = True
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._terms)
+
+    def add(self, term, count=1):
+        """累加詞的次數"""
+        term = ' '.join(str(term).split())
+        key = term.lower()
+        if not key:
+            return
+        entry = self._terms.setdefault(key, [term, 0])
+        entry[1] += count
+        self._built = False
+
+    def add_related(self, term, related, count=1):
+        """累加兩個詞一起出現的次數，related 需已加入或稍後加入"""
+        key = ' '.join(str(term).split()).lower()
+        other = ' '.join(str(related).split()).lower()
+        if not key or not other or key == other:
+            return
+        counts = self._related_counts.setdefault(key, {})
+        counts[other] = counts.get(other, 0) + count
+        self._built = False
+
+    def build(self):
+        """依次數由高到低把詞放進沿途節點，每個節點放滿 k 個即停止"""
+        with self._lock:
+            if self._built:
+                return
+
+            children, top = [{}], [[]]
+            ranked = sorted(self._terms.items(), key=lambda item: (-item[1][1], item[0]))
+            for key, (term, count) in ranked:
+                node = 0
+                if len(top[0]) < self.top_k:
+                    top[0].append((term, count))
+                for char in key:
+                    child = children[node].get(char)
+                    if child is None:
+                        child = len(children)
+                        children.append({})
+                        top.append([])
+                        children[node][char] = child
+                    node = child
+                    if len(top[node]) < self.top_k:
+                        top[node].append((term, count))
+
+            related = {}
+            for key, counts in self._related_counts.items():
+                items = [(self._terms[other][0], count) for other, count in counts.items() if other in self._terms]
+                items.sort(key=lambda item: (-item[1], item[0].lower()))
+                related[key] = items[:self.top_k]
+
+            # 一次替換，查詢中的執行緒不會看到建到一半的樹
+            self._children, self._top, self._related = children, top, related
+            self._built = True
+
+    def _node(self, prefix):
+        node = 0
+        children = self._children
+        for char in prefix:
+            node = children[node].get(char)
+            if node is None:
+                return None
+        return node
+
+    def complete(self, prefix, k=None):
+        """以 prefix 開頭的詞，回傳 [(詞, 次數)]，依次數由多到少；空字串為全部詞的前 k 名"""
+        if not self._built:
+            self.build()
+        node = self._node(' '.join(prefix.split()).lower())
+        if node is None:
+            return []
+        return self._top[node][:k or self.top_k]
+
+    def resolve(self, query):
+        """query 對應的詞庫詞；不在詞庫時以補全第一名代替，例如「前端工」視為「前端工程師」"""
+        if not self._built:
+            self.build()
+        key = ' '.join(query.split()).lower()
+        if key in self._terms:
+            return self._terms[key][0]
+        completions = self.complete(key, 1)
+        return completions[0][0] if completions else None
+
+    def related(self, query, k=None):
+        """與 query（經 resolve 對應）一起出現最多次的詞，回傳 [(詞, 次數)]"""
+        term = self.resolve(query)
+        if term is None:
+            return []
+        return self._related.get(term.lower(), [])[:k or self.top_k]
+
+    def to_dict(self):
+        return {
+            "top_k": self.top_k,
+            "terms": {term: count for term, count in self._terms.values()},
+            "related": {self._terms[key][0]: {self._terms[other][0]: count
+                                              for other, count in counts.items() if other in self._terms}
+                        for key, counts in self._related_counts.items() if key in self._terms}
+        }
+
+    @classmethod
+    def from_dict(cls, data):
+        trie = cls(data.get("top_k", DEFAULT_TOP_K))
+        for term, count in data.get("terms", {}).items():
+            trie.add(term, count)
+        for term, counts in data.get("related", {}).items():
+            for other, count in counts.items():
+                trie.add_related(term, other, count)
+        trie.build()
+        return trie
+
+    def save(self, path=SUGGESTIONS_FILE):
+        return write_file(path, self.to_dict())
+
+    @classmethod
+    def load(cls, path=SUGGESTIONS_FILE):
+        """讀取建議詞檔案，檔案不存在或損毀時回傳空的前綴樹"""
+        if not os.path.exists(path):
+            return cls()
+        try:
+            return cls.from_dict(read_file(path))
+        except Exception as e:
+            print(f"❌ 讀取建議詞檔案失敗：{e}")
+            return cls()
+
+
+_loaded = {}
+_loaded_lock = threading.Lock()
+
+
+def load_suggestions(path=SUGGESTIONS_FILE):
+    """取得建議詞前綴樹，檔案更新後下次呼叫會重新載入"""
+    try:
+        mtime = os.path.getmtime(path)
+    except OSError:
+        mtime = None
+
+    with _loaded_lock:
+        cached = _loaded.get(path)
+        if cached is None or cached[0] != mtime:
+            cached = (mtime, PrefixTrie.load(path))
+            _loaded[path] = cached
+        return cached[1]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="由職缺目錄與熱門搜尋建立自動補全建議詞")
+    parser.add_argument("--output", default=SUGGESTIONS_FILE)
+    parser.add_argument("--jobs", type=int, default=5000, help="讀取的最近職缺數量")
+    args = parser.parse_args()
+
+    # 延遲匯入，線上服務只需讀取建好的檔案
+    from advanced_search import AdvancedJobSearch
+    from user_manager import UserManager
+
+    start = time.perf_counter()
+    user_manager = UserManager()
+    jobs = user_manager.job_catalog.recent(args.jobs)
+    popular_keywords = user_manager.get_popular_keywords(100)
+
+    trie = AdvancedJobSearch().build_suggestions(jobs, popular_keywords)
+    size = trie.save(args.output)
+
+    print(f"✅ 建議詞建立完成：{len(trie)} 個詞（職缺 {len(jobs)} 個，熱門搜尋 {len(popular_keywords)} 個）")
+    print(f"📦 檔案大小：{size:,} bytes，⏱️ {time.perf_counter() - start:.3f} 秒")
+
+
+if __name__ == "__main__":
+    main()
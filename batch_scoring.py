@@ -0,0 +1,153 @@
+import heapq
+import math
+
+# 可選的向量化套件，未安裝時逐一查詢評分
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+# 每批同時評分的查詢數量，限制查詢 × 職缺分數矩陣的記憶體用量
+DEFAULT_BATCH_SIZE = 256
+
+
+class BatchScorer:
+    """一次評分多個查詢：各查詢詞的稀疏權重欄位一次累加到查詢 × 職缺的分數矩陣
+
+    文件分數是查詢詞權重的和，只需走訪查詢詞的清單，不展開詞 × 職缺的稠密矩陣；
+    薪資與分面（城市等）條件轉為布林陣列，以陣列運算套用到所有查詢。
+    每個查詢為 {"terms": [...], "salary_range": {"min", "max"}, "facets": {...}}，
+    後兩者可省略。結果與 JobIndex.score 相同，只保留至少含一個查詢詞的職缺。
+    """
+
+    def __init__(self, index, batch_size=DEFAULT_BATCH_SIZE):
+        self.index = index
+        self.batch_size = batch_size
+        # 索引加入或刪除文件後，權重欄位與薪資陣列需重新計算
+        self._version = None
+        self._columns = {}
+        self._salary_bounds = None
+
+    def _refresh(self):
+        if self._version != self.index.version:
+            self._version = self.index.version
+            self._columns = {}
+            self._salary_bounds = None
+
+    def _column(self, term):
+        """詞在各文件的權重（稀疏欄位），以陣列快取"""
+        column = self._columns.get(term)
+        if column is None:
+            docs, weights = self.index.term_weights(term)
+            column = (np.array(docs, dtype=np.int64), np.array(weights, dtype=np.float64))
+            self._columns[term] = column
+        return column
+
+    def _salary_arrays(self, n):
+        """前 n 份文件的月薪下限與上限；沒有薪資的文件以 (inf, -inf) 表示，不與任何範圍重疊"""
+        if self._salary_bounds is None or len(self._salary_bounds[0]) != n:
+            lows = np.full(n, np.inf)
+            highs = np.full(n, -np.inf)
+            # 先複製一份，評分期間索引仍可能加入職缺
+            for doc, (low, high) in list(self.index.salary.items()):
+                if doc < n:
+                    lows[doc] = low
+                    highs[doc] = high
+            self._salary_bounds = (lows, highs)
+        return self._salary_bounds
+
+    def _bitmap_mask(self, bitmap, n):
+        """位元圖的前 n 位轉為布林陣列"""
+        bitmap &= (1 << n) - 1
+        packed = np.frombuffer(bitmap.to_bytes((n + 7) // 8, 'little'), dtype=np.uint8)
+        return np.unpackbits(packed, bitorder='little')[:n].astype(bool)
+
+    def score_many(self, queries, k=10):
+        """每個查詢分數最高的 k 個 (分數, 文件編號)，同分時文件編號小的在前"""
+        if not len(self.index) or not queries:
+            return [[] for _ in queries]
+        if np is None:
+            return [self._score_one(query, k) for query in queries]
+
+        self._refresh()
+        results = []
+        for start in range(0, len(queries), self.batch_size):
+            results.extend(self._score_batch(queries[start:start + self.batch_size], k))
+        return results
+
+    def _score_batch(self, queries, k):
+        # 以開始時的文件數為準，評分期間索引仍可加入職缺
+        n = self.index.size
+
+        # 每個 (查詢, 詞) 的稀疏欄位換算為分數矩陣的平坦位置；評分期間新加入的職缺留到下一次
+        positions, weights = [], []
+        for i, query in enumerate(queries):
+            for term in {term.lower() for term in query["terms"]}:
+                docs, values = self._column(term)
+                if len(docs) and docs[-1] >= n:
+                    keep = docs < n
+                    docs, values = docs[keep], values[keep]
+                positions.append(docs + i * n)
+                weights.append(values)
+        positions = np.concatenate(positions) if positions else np.zeros(0, dtype=np.int64)
+        if not len(positions):
+            return [[] for _ in queries]
+
+        # 分數矩陣：查詢 × 職缺，以 bincount 一次累加所有權重，每列連續存放方便逐列取前 k 名
+        scores = np.bincount(positions, weights=np.concatenate(weights),
+                             minlength=len(queries) * n).reshape(len(queries), n)
+        mask = scores > 0
+
+        # 薪資條件：職缺區間與查詢區間重疊
+        salary_queries = [i for i, query in enumerate(queries) if query.get("salary_range")]
+        if salary_queries:
+            lows, highs = self._salary_arrays(n)
+            ranges = [queries[i]["salary_range"] for i in salary_queries]
+            query_low = np.array([r.get("min") or 0 for r in ranges], dtype=float)
+            query_high = np.array([math.inf if r.get("max") is None else r["max"] for r in ranges], dtype=float)
+            mask[salary_queries] &= (lows <= query_high[:, None]) & (highs >= query_low[:, None])
+
+        # 分面條件：相同條件的查詢共用同一個遮罩
+        facet_masks = {}
+        for i, query in enumerate(queries):
+            facets = query.get("facets")
+            if facets:
+                key = repr(sorted(facets.items()))
+                if key not in facet_masks:
+                    facet_masks[key] = self._bitmap_mask(self.index.facets.select(facets), n)
+                mask[i] &= facet_masks[key]
+
+        scores[~mask] = -np.inf
+
+        # 每列以 argpartition 取前 k 名，再依 (分數, 文件編號) 排序
+        size = min(k, n)
+        top = np.argpartition(-scores, size - 1, axis=1)[:, :size]
+        results = []
+        for i in range(len(queries)):
+            row = scores[i]
+            picked = [(float(row[doc]), int(doc)) for doc in top[i] if mask[i, doc]]
+            if len(picked) == size:
+                # 第 k 名同分時 argpartition 不保證取到文件編號較小的，改取同分中編號最小的
+                threshold = min(score for score, _ in picked)
+                picked = [item for item in picked if item[0] > threshold]
+                tied = np.flatnonzero(row == threshold)[:size - len(picked)]
+                picked += [(threshold, int(doc)) for doc in tied]
+            picked.sort(key=lambda item: (-item[0], item[1]))
+            results.append(picked)
+        return results
+
+    def _score_one(self, query, k):
+        """未安裝 numpy 時以倒排索引逐一評分"""
+        scores = self.index.score(query["terms"])
+
+        salary_range = query.get("salary_range")
+        allowed = set(self.index.salary_docs(salary_range)) if salary_range else None
+        facets = query.get("facets")
+        # 與批次評分相同，只考慮開始時已在索引中的文件
+        n = self.index.size
+        mask = self.index.facets.mask(facets, n) if facets else None
+
+        candidates = ((score, doc) for doc, score in scores.items()
+                      if (allowed is None or doc in allowed)
+                      and (mask is None or doc < n and mask[doc >> 3] >> (doc & 7) & 1))
+        return heapq.nlargest(k, candidates, key=lambda item: (item[0], -item[1]))
@@ -0,0 +1,307 @@
+import bisect
+import math
+import re
+import tokenizer
+from job_facets import CITIES
+
+# 可限定欄位的前綴：title 與 company 比對索引欄位，city 比對城市分面
+FIELD_PREFIXES = ("title", "company", "city")
+
+# 詞彙：括號、"|"、詞開頭的 "-"（排除，與 NOT 相同）、可加欄位前綴與引號的詞
+# 前後都是空白的 "-"（如 "40k - 60k"）不是排除，當作一般文字
+_TOKEN_RE = re.compile(
+    r'(?P<lparen>\()|(?P<rparen>\))|(?P<or>\|)|(?P<neg>(?<![^\s(|-])-)(?=[^\s|)])|'
+    r'(?P<word>(?:[A-Za-z]+:)?(?:"[^"]*"?|[^\s()|"]+))'
+)
+_FIELD_RE = re.compile(r'^([A-Za-z]+):(.*)$', re.DOTALL)
+_OPERATORS = {"AND", "OR", "NOT"}
+
+# 全形符號統一為半形，中文輸入法常打出全形的括號與直線
+_FULLWIDTH = str.maketrans({"（": "(", "）": ")", "｜": "|", "－": "-", "：": ":", "＂": '"', "“": '"', "”": '"'})
+
+# 至少含一個文字或數字才視為詞，略過標點與空白
+_WORD_RE = re.compile(r'\w')
+
+
+def is_boolean_query(text):
+    """查詢是否使用布林語法：|、OR、AND、NOT、括號、以 - 排除的詞或欄位前綴"""
+    for kind, value in _lex(text):
+        if kind != "word" or value in _OPERATORS:
+            return True
+        match = _FIELD_RE.match(value)
+        if match and match.group(1).lower() in FIELD_PREFIXES:
+            return True
+    return False
+
+
+def _lex(text):
+    text = (text or "").translate(_FULLWIDTH)
+    return [(match.lastgroup, match.group()) for match in _TOKEN_RE.finditer(text)]
+
+
+class _Parser:
+    """遞迴下降解析，優先順序由高到低：括號、OR（| 或 OR）、NOT（- 或 NOT）、AND（空白或 AND）
+
+    與一般搜尋引擎相同，"台北|新竹" 的 OR 比空白的 AND 緊密；開頭的 "-" 與 NOT 相同，
+    "-外包|派遣" 為 NOT (外包 OR 派遣)。
+    語法錯誤（如括號不成對、運算子缺少運算元）時略過該部分，不會拋出例外。
+    """
+
+    def __init__(self, tokens):
+        self.tokens = tokens
+        self.pos = 0
+
+    def _peek(self):
+        return self.tokens[self.pos] if self.pos < len(self.tokens) else (None, None)
+
+    def parse(self):
+        node = self._and()
+        # 多出的右括號略過後繼續解析
+        while self.pos < len(self.tokens):
+            self.pos += 1
+            rest = self._and()
+            if rest is not None:
+                node = rest if node is None else ("and", [node, rest])
+        return node
+
+    def _and(self):
+        children = []
+        while True:
+            kind, value = self._peek()
+            if kind is None or kind == "rparen":
+                break
+            if kind == "word" and value == "AND" or kind == "or":
+                self.pos += 1
+                continue
+            child = self._not()
+            if child is not None:
+                children.append(child)
+        if not children:
+            return None
+        return children[0] if len(children) == 1 else ("and", children)
+
+    def _not(self):
+        kind, value = self._peek()
+        if kind == "neg" or kind == "word" and value == "NOT":
+            self.pos += 1
+            child = self._not()
+            return None if child is None else ("not", child)
+        return self._or()
+
+    def _or(self):
+        children = [self._primary()]
+        while True:
+            kind, value = self._peek()
+            if kind != "or" and not (kind == "word" and value == "OR"):
+                break
+            self.pos += 1
+            children.append(self._primary())
+        children = [child for child in children if child is not None]
+        if not children:
+            return None
+        return children[0] if len(children) == 1 else ("or", children)
+
+    def _primary(self):
+        kind, value = self._peek()
+        if kind == "lparen":
+            self.pos += 1
+            node = self._and()
+            if self._peek()[0] == "rparen":
+                self.pos += 1
+            return node
+        if kind != "word" or value in _OPERATORS:
+            return None
+
+        self.pos += 1
+        return _term(value)
+
+
+def _term(word):
+    """詞轉為 ("term", 欄位, 文字)，欄位為 None 表示不限欄位"""
+    field = None
+    match = _FIELD_RE.match(word)
+    if match and match.group(1).lower() in FIELD_PREFIXES:
+        field, word = match.group(1).lower(), match.group(2)
+    word = ' '.join(word.strip('"').split())
+    if not _WORD_RE.search(word):
+        return None
+    return "term", field, word
+
+
+def parse_query(text):
+    """解析布林查詢為語法樹，沒有任何詞時回傳 None
+
+    節點為 ("and", [子節點])、("or", [子節點])、("not", 子節點) 與 ("term", 欄位, 文字)，
+    例如 "Python 後端 -外包 台北|新竹" 為 Python AND 後端 AND NOT 外包 AND (台北 OR 新竹)。
+    """
+    return _Parser(_lex(text)).parse()
+
+
+def intersect(a, b):
+    """兩個遞增文件清單的交集
+
+    以較短的清單逐一查詢較長的清單：每隔 √n 個位置設一個跳躍指標，
+    先沿跳躍指標略過不可能相符的區段，再於區段內二分搜尋，
+    不必逐一走訪較長清單的每個元素。
+    """
+    if len(a) > len(b):
+        a, b = b, a
+    result = []
+    n = len(b)
+    if not a or not n:
+        return result
+
+    skip = max(1, math.isqrt(n))
+    j = 0
+    for doc in a:
+        while j + skip < n and b[j + skip] <= doc:
+            j += skip
+        j = bisect.bisect_left(b, doc, j, min(j + skip + 1, n))
+        if j == n:
+            break
+        if b[j] == doc:
+            result.append(doc)
+    return result
+
+
+def difference(a, b):
+    """在 a 但不在 b 的文件，兩者皆為遞增清單，同樣以跳躍指標走訪 b"""
+    n = len(b)
+    if not a or not n:
+        return list(a)
+
+    skip = max(1, math.isqrt(n))
+    result = []
+    j = 0
+    for doc in a:
+        while j + skip < n and b[j + skip] <= doc:
+            j += skip
+        j = bisect.bisect_left(b, doc, j, min(j + skip + 1, n))
+        if j == n or b[j] != doc:
+            result.append(doc)
+    return result
+
+
+def union(lists):
+    """多個遞增清單的聯集（遞增排序）"""
+    lists = [docs for docs in lists if docs]
+    if len(lists) == 1:
+        return list(lists[0])
+    return sorted(set().union(*lists))
+
+
+class _Evaluator:
+    """在 JobIndex 上計算語法樹的相符文件，並收集未被排除的詞作為評分用的查詢詞"""
+
+    def __init__(self, index):
+        self.index = index
+        self.size = index.size
+        self.terms = []
+
+    def docs(self, node, negated=False):
+        kind = node[0]
+        if kind == "term":
+            return self._term_docs(node[1], node[2], negated)
+        if kind == "or":
+            return union(self.docs(child, negated) for child in node[1])
+        if kind == "not":
+            return difference(self._all_docs(), self.docs(node[1], not negated))
+        return self._and_docs(node[1], negated)
+
+    def _and_docs(self, children, negated):
+        included = [child for child in children if child[0] != "not"]
+        excluded = [child[1] for child in children if child[0] == "not"]
+        if not included:
+            # 只有排除條件時以所有有效文件為起點
+            result = self._all_docs()
+        else:
+            # 由最短的清單開始交集，結果只會越來越短
+            lists = sorted((self.docs(child, negated) for child in included), key=len)
+            result = lists[0]
+            for docs in lists[1:]:
+                if not result:
+                    break
+                result = intersect(result, docs)
+
+        for child in excluded:
+            if not result:
+                break
+            result = difference(result, self.docs(child, not negated))
+        return result
+
+    def _all_docs(self):
+        return [doc for doc in self.index.live_docs() if doc < self.size]
+
+    def _term_docs(self, field, text, negated):
+        text = text.lower()
+        if field == "city" or field is None and _city(text):
+            return self._city_docs(text)
+
+        # 整個詞已在索引中（如 "node.js"）時直接查詢，否則分詞後每個詞都需出現
+        if self.index.document_frequency(text):
+            tokens = [text]
+        else:
+            tokens = [token for token in tokenizer.lcut(text) if _WORD_RE.search(token)] or [text]
+
+        lists = []
+        for token in tokens:
+            if negated:
+                # 排除的詞只比對原詞，不以相近的詞代替，以免排除掉拼寫相近但無關的職缺
+                lists.append(self.index.postings(token, field))
+                continue
+            # 拼錯的詞以最接近的索引詞代替
+            resolved = self.index.resolve_terms([token])
+            self.terms.extend(resolved)
+            lists.append(union(self.index.postings(term, field) for term in resolved))
+
+        lists.sort(key=len)
+        result = lists[0]
+        for docs in lists[1:]:
+            result = intersect(result, docs)
+        return [doc for doc in result if doc < self.size]
+
+    def _city_docs(self, text):
+        city = _city(text)
+        if city is None:
+            return []
+        return [doc for doc in self.index.facets.docs("city", city) if doc < self.size]
+
+
+def _city(text):
+    """文字對應的城市分面值，如 "臺北" → "台北"、"remote" → "遠端"；不是城市時回傳 None"""
+    text = text.replace("臺", "台")
+    if text in CITIES or text == "遠端":
+        return text
+    if text == "remote":
+        return "遠端"
+    for city in CITIES:
+        if text in (city + "市", city + "縣"):
+            return city
+    return None
+
+
+def included_terms(node, negated=False):
+    """語法樹中未被排除的文字詞（不含城市條件），例如供標籤索引取得候選職缺"""
+    if node is None:
+        return []
+    kind = node[0]
+    if kind == "term":
+        field, text = node[1], node[2].lower()
+        if negated or field == "city" or field is None and _city(text):
+            return []
+        return [text]
+    if kind == "not":
+        return included_terms(node[1], not negated)
+    return [term for child in node[1] for term in included_terms(child, negated)]
+
+
+def match_docs(node, index):
+    """計算語法樹在 JobIndex 上的相符文件，回傳 (遞增的文件編號, 未被排除的查詢詞)
+
+    只處理開始時已在索引中的文件，查詢期間加入的職缺留到下一次查詢。
+    """
+    if node is None:
+        return [], []
+    evaluator = _Evaluator(index)
+    docs = evaluator.docs(node)
+    return docs, list(dict.fromkeys(evaluator.terms))
@@ -1,14 +1,22 @@
+import hashlib
 import json
-import time
 import random
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
 import urllib.parse
+from fuzzy_match import NGramIndex
+
+# search_many 同時進行的搜尋數量
+DEFAULT_SEARCH_WORKERS = 8
 
 
 class ZeroDependencyCrawler:
     """完全零依賴的職缺生成系統"""
 
     def __init__(self):
+        # 模糊比對用的職稱索引，需要時才建立
+        self._titles = None
+
         # 完整的職缺資料庫
         self.job_database = {
             # 產品管理類
@@ -228,6 +236,17 @@ class ZeroDependencyCrawler:
             }
         }
 
+    def _title_index(self):
+        """職缺分類與職稱的 n-gram 索引，值為所屬分類，第一次模糊比對時建立"""
+        if self._titles is None:
+            titles = NGramIndex()
+            for category, data in self.job_database.items():
+                titles.add(category, category)
+                for title in data['titles']:
+                    titles.add(title, category)
+            self._titles = titles
+        return self._titles
+
     def search_all_platforms(self, keyword, location="", salary_min="", salary_max="", limit_per_platform=5):
         """搜尋所有平台的職缺"""
         print(f"🚀 開始搜尋：{keyword}")
@@ -238,6 +257,30 @@ class ZeroDependencyCrawler:
         print(f"✅ 生成 {len(jobs)} 個職缺")
         return jobs
 
+    def search_many(self, keywords, limit_per_platform=5, max_workers=DEFAULT_SEARCH_WORKERS):
+        """同時搜尋多個關鍵字，回傳 {關鍵字: [職缺]}
+
+        只差在大小寫或空白的關鍵字視為同一個，只搜尋一次並共用結果。
+        """
+        unique = {}
+        for keyword in keywords:
+            unique.setdefault(' '.join(keyword.lower().split()), keyword)
+
+        found = {}
+        if unique:
+            with ThreadPoolExecutor(max_workers=min(max_workers, len(unique))) as executor:
+                futures = {key: executor.submit(self.search_all_platforms, keyword,
+                                                limit_per_platform=limit_per_platform)
+                           for key, keyword in unique.items()}
+                for key, future in futures.items():
+                    try:
+                        found[key] = future.result()
+                    except Exception as e:
+                        print(f"❌ 搜尋「{unique[key]}」失敗：{e}")
+                        found[key] = []
+
+        return {keyword: found[' '.join(keyword.lower().split())] for keyword in keywords}
+
     def generate_jobs_by_keyword(self, keyword, location="", limit=15):
         """根據關鍵字生成職缺"""
 
@@ -261,6 +304,14 @@ class ZeroDependencyCrawler:
                     matched_category = data
                     break
 
+        # 拼寫相近的職稱或分類，如「軟休工程師」→「軟體工程師」
+        if not matched_category:
+            matches = self._title_index().search(keyword_lower, limit=1)
+            if matches:
+                title, category, _ = matches[0]
+                matched_category = self.job_database[category]
+                print(f"🔤 「{keyword}」以相近職稱「{title}」搜尋")
+
         # 如果沒有匹配到，使用通用模板
         if not matched_category:
             matched_category = {
@@ -304,8 +355,12 @@ class ZeroDependencyCrawler:
             color = colors[hash(company + str(i)) % len(colors)]
             logo_url = f"https://via.placeholder.com/80x80/{color}/FFFFFF?text={company_initial}"
 
+            # 以內容產生穩定 ID，同一職缺重複抓取時會更新而非新增
+            job_key = "|".join([keyword, title, company, salary, job_location, platform, description])
+            job_id = hashlib.sha1(job_key.encode('utf-8')).hexdigest()[:16]
+
             job_data = {
-                "id": f"zero_dep_{int(time.time())}_{i}",
+                "id": f"zero_dep_{job_id}",
                 "title": title,
                 "company": company,
                 "salary": salary,
@@ -321,4 +376,8 @@ class ZeroDependencyCrawler:
 
             jobs.append(job_data)
 
-        return jobs
\ No newline at end of file
+        return jobs
+
+
+# 排程與通知模組使用的名稱
+JobCrawler = ZeroDependencyCrawler
@@ -264,8 +264,54 @@ class JobCardBuilder:
         return bubble
 
     @staticmethod
-    def create_job_carousel(jobs_list, search_keyword=""):
-        """建立職缺旋轉木馬卡片"""
+    def create_next_page_bubble(next_page_data, remaining):
+        """建立「下一頁」卡片，點擊後以 postback 取得下一頁結果"""
+        return BubbleContainer(
+            body=BoxComponent(
+                layout="vertical",
+                contents=[
+                    TextComponent(
+                        text="👉 還有更多職缺",
+                        weight="bold",
+                        size="lg",
+                        color="#1DB446"
+                    ),
+                    TextComponent(
+                        text=f"尚有 {remaining} 個職缺未顯示",
+                        size="sm",
+                        color="#999999",
+                        wrap=True,
+                        margin="md"
+                    )
+                ],
+                spacing="md",
+                padding_all="20px"
+            ),
+            footer=BoxComponent(
+                layout="vertical",
+                contents=[
+                    ButtonComponent(
+                        style="primary",
+                        height="sm",
+                        action=PostbackAction(
+                            label="下一頁",
+                            data=next_page_data,
+                            display_text="下一頁"
+                        ),
+                        color="#1DB446"
+                    )
+                ],
+                padding_all="20px"
+            )
+        )
+
+    @staticmethod
+    def create_job_carousel(jobs_list, search_keyword="", next_page_data=None, total=None, offset=0):
+        """建立職缺旋轉木馬卡片
+
+        jobs_list 為分頁結果的一頁時，total 為全部結果數量、offset 為這一頁的起始位置，
+        next_page_data 為「下一頁」的 postback 資料，會在最後加上下一頁卡片。
+        """
 
         if not jobs_list:
             # 如果沒有職缺，返回空結果卡片
@@ -306,17 +352,27 @@ class JobCardBuilder:
             bubble = JobCardBuilder.create_job_bubble(job)
             bubbles.append(bubble)
 
+        # 搜尋結果摘要文字
+        total_jobs = len(jobs_list) if total is None else total
+        display_count = len(display_jobs)
+
+        # 旋轉木馬最多 12 張卡片，最後一張放下一頁
+        remaining = total_jobs - offset - display_count
+        if next_page_data and remaining > 0:
+            bubbles.append(JobCardBuilder.create_next_page_bubble(next_page_data, remaining))
+
         # 建立 Carousel
         carousel = CarouselContainer(contents=bubbles)
 
-        # 搜尋結果摘要文字
-        total_jobs = len(jobs_list)
-        display_count = len(display_jobs)
+        if offset:
+            shown = f"顯示第 {offset + 1}-{offset + display_count} 個結果"
+        else:
+            shown = f"顯示前 {display_count} 個結果"
 
         if search_keyword:
-            alt_text = f"找到 {total_jobs} 個「{search_keyword}」相關職缺，顯示前 {display_count} 個結果"
+            alt_text = f"找到 {total_jobs} 個「{search_keyword}」相關職缺，{shown}"
         else:
-            alt_text = f"找到 {total_jobs} 個職缺，顯示前 {display_count} 個結果"
+            alt_text = f"找到 {total_jobs} 個職缺，{shown}"
 
         flex_message = FlexSendMessage(
             alt_text=alt_text,
@@ -0,0 +1,115 @@
+# n-gram 前後補上的邊界字元，讓開頭與結尾的字元也出現在兩個 n-gram 中
+_START = '\x02'
+_END = '\x03'
+
+
+def default_distance(text):
+    """依長度決定可容許的編輯距離：3 到 6 字 1，較長 2
+
+    兩個字以內太短，不做模糊比對：英數字如 "ai"、"ui"，中文兩字詞差一字就是半個詞（如 "前端" 與 "後端"）。
+    """
+    if len(text) <= 2:
+        return 0
+    return 1 if len(text) <= 6 else 2
+
+
+def edit_distance(a, b, limit=None):
+    """編輯距離（含相鄰字元對調，如 "pyhton" → "python" 為 1）；超過 limit 時提早結束並回傳 limit + 1"""
+    if len(a) < len(b):
+        a, b = b, a
+    if limit is not None and len(a) - len(b) > limit:
+        return limit + 1
+
+    before, previous = None, list(range(len(b) + 1))
+    for i, char_a in enumerate(a, 1):
+        current = [i]
+        for j, char_b in enumerate(b, 1):
+            cost = min(previous[j] + 1, current[j - 1] + 1, previous[j - 1] + (char_a != char_b))
+            if i > 1 and j > 1 and char_a == b[j - 2] and a[i - 2] == char_b:
+                cost = min(cost, before[j - 2] + 1)
+            current.append(cost)
+        # 對調會用到前兩列，兩列都已超過才能確定結果超過 limit
+        if limit is not None and min(current) > limit and min(previous) >= limit:
+            return limit + 1
+        before, previous = previous, current
+    if limit is not None and previous[-1] > limit:
+        return limit + 1
+    return previous[-1]
+
+
+class NGramIndex:
+    """字元 n-gram 索引：先以共同 n-gram 數量篩出候選詞，再以編輯距離確認
+
+    每次編輯最多影響 n + 1 個 n-gram（對調兩字時），編輯距離 d 以內的兩個字串
+    補上邊界後至少共有 len(查詢 n-gram) - d * (n + 1) 個 n-gram，
+    只需走訪查詢 n-gram 的清單計數，不必掃描整個詞庫。
+    門檻最低為 1，沒有任何共同 n-gram 的極短字串（如兩字對調）不視為相近。
+    比對不分大小寫，每個詞可附帶一個值，例如職稱所屬的職缺分類。
+    """
+
+    def __init__(self, n=2):
+        self.n = n
+        self._terms = []
+        self._values = []
+        self._ids = {}
+        # n-gram → [詞編號]；重複出現的 n-gram 以 (n-gram, 第幾次) 區分
+        self._postings = {}
+
+    def __len__(self):
+        return len(self._terms)
+
+    def __contains__(self, term):
+        return term.lower() in self._ids
+
+    def _grams(self, text):
+        padded = _START * (self.n - 1) + text + _END * (self.n - 1)
+        seen = {}
+        grams = []
+        for i in range(len(padded) - self.n + 1):
+            gram = padded[i:i + self.n]
+            grams.append((gram, seen.get(gram, 0)))
+            seen[gram] = seen.get(gram, 0) + 1
+        return grams
+
+    def add(self, term, value=None):
+        """加入詞，已存在時保留第一次加入的值"""
+        key = term.lower()
+        if not key or key in self._ids:
+            return
+
+        term_id = len(self._terms)
+        self._ids[key] = term_id
+        self._terms.append(term)
+        self._values.append(value)
+        for gram in self._grams(key):
+            self._postings.setdefault(gram, []).append(term_id)
+
+    def search(self, query, max_distance=None, limit=5):
+        """拼寫相近的詞，回傳 [(詞, 值, 編輯距離)]，依距離由小到大"""
+        query = query.lower()
+        if max_distance is None:
+            max_distance = default_distance(query)
+
+        grams = self._grams(query)
+        # 門檻至少要 1，否則 n-gram 無法縮小候選範圍
+        threshold = max(1, len(grams) - max_distance * (self.n + 1))
+
+        counts = {}
+        for gram in grams:
+            for term_id in self._postings.get(gram, ()):
+                counts[term_id] = counts.get(term_id, 0) + 1
+
+        matches = []
+        for term_id, count in counts.items():
+            if count < threshold:
+                continue
+            term = self._terms[term_id]
+            if abs(len(term) - len(query)) > max_distance:
+                continue
+            distance = edit_distance(query, term.lower(), max_distance)
+            if distance <= max_distance:
+                matches.append((distance, -count, term_id))
+
+        matches.sort()
+        return [(self._terms[term_id], self._values[term_id], distance)
+                for distance, _, term_id in matches[:limit]]
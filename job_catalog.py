@@ -0,0 +1,215 @@
+import json
+import os
+import sqlite3
+import threading
+import time
+from serializer import read_file
+
+# 職缺預設保留 14 天
+DEFAULT_TTL = 14 * 86400
+
+
+class JobCatalog:
+    """持久化職缺目錄：依 ID 寫入或更新、逐筆到期，並以索引查詢"""
+
+    def __init__(self, db_file='job_catalog.db', default_ttl=DEFAULT_TTL):
+        self.db_file = db_file
+        self.default_ttl = default_ttl
+        self._lock = threading.RLock()
+
+        self._conn = sqlite3.connect(db_file, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.executescript("""
+            CREATE TABLE IF NOT EXISTS jobs (
+                id TEXT PRIMARY KEY,
+                data TEXT NOT NULL,
+                location TEXT,
+                platform TEXT,
+                first_seen INTEGER NOT NULL,
+                updated_at INTEGER NOT NULL,
+                expires_at INTEGER NOT NULL,
+                pinned INTEGER NOT NULL DEFAULT 0
+            );
+            CREATE INDEX IF NOT EXISTS idx_jobs_expires ON jobs(expires_at);
+            CREATE INDEX IF NOT EXISTS idx_jobs_updated ON jobs(updated_at);
+            CREATE INDEX IF NOT EXISTS idx_jobs_first_seen ON jobs(first_seen);
+            CREATE INDEX IF NOT EXISTS idx_jobs_location ON jobs(location);
+            CREATE TABLE IF NOT EXISTS job_tags (
+                tag TEXT NOT NULL,
+                job_id TEXT NOT NULL,
+                PRIMARY KEY (tag, job_id)
+            ) WITHOUT ROWID;
+            CREATE INDEX IF NOT EXISTS idx_job_tags_job ON job_tags(job_id);
+            CREATE TABLE IF NOT EXISTS catalog_meta (
+                key TEXT PRIMARY KEY,
+                value TEXT
+            );
+        """)
+        self._conn.commit()
+
+    def upsert(self, job, ttl=None):
+        """新增或更新單一職缺"""
+        return self.upsert_many([job], ttl)
+
+    def upsert_many(self, jobs, ttl=None):
+        """依 ID 新增或更新職缺，重新整理到期時間，回傳寫入筆數"""
+        now = int(time.time())
+        ttl = self.default_ttl if ttl is None else ttl
+        count = 0
+
+        with self._lock:
+            for job in jobs:
+                job_id = job.get("id")
+                if not job_id:
+                    continue
+
+                expires_at = int(job.get("expires_at") or now + ttl)
+                self._conn.execute(
+                    "INSERT INTO jobs (id, data, location, platform, first_seen, updated_at, expires_at) "
+                    "VALUES (?, ?, ?, ?, ?, ?, ?) "
+                    "ON CONFLICT(id) DO UPDATE SET data = excluded.data, location = excluded.location, "
+                    "platform = excluded.platform, updated_at = excluded.updated_at, "
+                    "expires_at = excluded.expires_at",
+                    (job_id, json.dumps(job, ensure_ascii=False), job.get("location", ""),
+                     job.get("platform", ""), now, now, expires_at)
+                )
+
+                self._conn.execute("DELETE FROM job_tags WHERE job_id = ?", (job_id,))
+                tags = {str(tag).lower() for tag in job.get("tags", []) if tag}
+                self._conn.executemany(
+                    "INSERT OR IGNORE INTO job_tags (tag, job_id) VALUES (?, ?)",
+                    [(tag, job_id) for tag in tags]
+                )
+                count += 1
+
+            self._conn.commit()
+
+        return count
+
+    def get(self, job_id, include_expired=False):
+        """依 ID 取得職缺"""
+        return self.get_many([job_id], include_expired).get(job_id)
+
+    def get_many(self, job_ids, include_expired=False):
+        """依 ID 批次取得職缺，回傳 {職缺ID: 職缺}"""
+        job_ids = list(dict.fromkeys(job_ids))
+        found = {}
+
+        with self._lock:
+            # SQLite 參數數量有限，分批查詢
+            for start in range(0, len(job_ids), 500):
+                batch = job_ids[start:start + 500]
+                sql = f"SELECT id, data FROM jobs WHERE id IN ({','.join('?' * len(batch))})"
+                params = list(batch)
+                if not include_expired:
+                    sql += " AND expires_at > ?"
+                    params.append(int(time.time()))
+                for job_id, data in self._conn.execute(sql, params):
+                    found[job_id] = json.loads(data)
+
+        return found
+
+    def search(self, tags=None, location=None, limit=50):
+        """以標籤與地點索引查詢有效職缺，最近更新的排在前面"""
+        sql = "SELECT jobs.data FROM jobs"
+        where = ["jobs.expires_at > ?"]
+        params = [int(time.time())]
+
+        tags = [tag.lower() for tag in (tags or []) if tag]
+        if tags:
+            sql += " JOIN (SELECT DISTINCT job_id FROM job_tags WHERE tag IN ({})) matched " \
+                   "ON matched.job_id = jobs.id".format(','.join('?' * len(tags)))
+            params = tags + params
+
+        if location:
+            where.append("jobs.location = ?")
+            params.append(location)
+
+        sql += " WHERE " + " AND ".join(where) + " ORDER BY jobs.updated_at DESC LIMIT ?"
+        params.append(limit)
+
+        with self._lock:
+            return [json.loads(row[0]) for row in self._conn.execute(sql, params)]
+
+    def recent(self, limit=50):
+        """取得最近更新的有效職缺"""
+        return self.search(limit=limit)
+
+    def count(self):
+        """有效職缺數量"""
+        with self._lock:
+            return self._conn.execute(
+                "SELECT COUNT(*) FROM jobs WHERE expires_at > ?", (int(time.time()),)
+            ).fetchone()[0]
+
+    def count_since(self, since_ts):
+        """指定時間後首次出現的有效職缺數量"""
+        with self._lock:
+            return self._conn.execute(
+                "SELECT COUNT(*) FROM jobs WHERE first_seen > ? AND expires_at > ?",
+                (since_ts, int(time.time()))
+            ).fetchone()[0]
+
+    def pin(self, job_id):
+        """標記職缺被收藏，壓縮時不會刪除"""
+        with self._lock:
+            self._conn.execute("UPDATE jobs SET pinned = pinned + 1 WHERE id = ?", (job_id,))
+            self._conn.commit()
+
+    def unpin(self, job_id):
+        """取消收藏標記"""
+        with self._lock:
+            self._conn.execute("UPDATE jobs SET pinned = MAX(pinned - 1, 0) WHERE id = ?", (job_id,))
+            self._conn.commit()
+
+    def compact(self):
+        """刪除已到期且未被收藏的職缺，回傳刪除筆數"""
+        with self._lock:
+            now = int(time.time())
+            self._conn.execute(
+                "DELETE FROM job_tags WHERE job_id IN "
+                "(SELECT id FROM jobs WHERE expires_at <= ? AND pinned = 0)", (now,)
+            )
+            removed = self._conn.execute(
+                "DELETE FROM jobs WHERE expires_at <= ? AND pinned = 0", (now,)
+            ).rowcount
+            self._conn.commit()
+            self._conn.execute("PRAGMA optimize")
+
+        return removed
+
+    def import_jobs_file(self, jobs_file):
+        """匯入舊版 jobs.json 的職缺，回傳匯入筆數"""
+        if not os.path.exists(jobs_file):
+            return 0
+
+        try:
+            jobs = read_file(jobs_file).get("jobs", [])
+        except (ValueError, AttributeError):
+            return 0
+
+        return self.upsert_many(jobs)
+
+    def import_legacy_jobs(self, jobs_file):
+        """第一次使用目錄時匯入舊版 jobs.json，回傳匯入筆數；之後不再匯入
+
+        jobs.json 已不再更新，若在目錄沒有有效職缺時重新匯入，過期的職缺會以新的到期時間回來。
+        升級前已有職缺的目錄視為匯入過，只補上標記。
+        """
+        with self._lock:
+            if self._conn.execute("SELECT 1 FROM catalog_meta WHERE key = 'legacy_jobs_imported'").fetchone():
+                return 0
+
+            empty = self._conn.execute("SELECT 1 FROM jobs LIMIT 1").fetchone() is None
+            imported = self.import_jobs_file(jobs_file) if empty else 0
+            self._conn.execute(
+                "INSERT OR REPLACE INTO catalog_meta (key, value) VALUES ('legacy_jobs_imported', ?)",
+                (str(int(time.time())),)
+            )
+            self._conn.commit()
+
+        return imported
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
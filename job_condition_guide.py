@@ -1,5 +1,6 @@
 import re
-import jieba
+import tokenizer
+from query_cache import DEFAULT_CACHE_SIZE, LRUMemo, normalize_query
 from datetime import datetime
 import json
 
@@ -7,7 +8,92 @@ import json
 class JobConditionGuide:
     """智能職缺條件引導系統"""
 
-    def __init__(self):
+    # 直接職位映射（最高優先級），也用來產生 jieba 使用者詞典
+    direct_job_mapping = {
+        # 商務管理類
+        '產品經理': '產品經理',
+        '專案經理': '專案經理',
+        '產品manager': '產品經理',
+        'pm': '產品經理',
+        'product manager': '產品經理',
+        'project manager': '專案經理',
+
+        # 設計類
+        'ui設計師': 'UI設計師',
+        'ux設計師': 'UX設計師',
+        'ui/ux': 'UI/UX設計師',
+        '視覺設計師': '視覺設計師',
+        '平面設計師': '平面設計師',
+        '網頁設計師': '網頁設計師',
+
+        # 工程師類
+        '軟體工程師': '軟體工程師',
+        '前端工程師': '前端工程師',
+        '後端工程師': '後端工程師',
+        '全端工程師': '全端工程師',
+        'python工程師': 'Python工程師',
+        'java工程師': 'Java工程師',
+        'javascript工程師': 'JavaScript工程師',
+
+        # 數據類
+        '數據分析師': '數據分析師',
+        '資料分析師': '數據分析師',
+        '資料科學家': '資料科學家',
+        'data analyst': '數據分析師',
+        'data scientist': '資料科學家',
+
+        # 營運類
+        '營運專員': '營運專員',
+        '行銷專員': '行銷專員',
+        '業務代表': '業務代表',
+        '客服專員': '客服專員',
+
+        # 財務會計類
+        '會計師': '會計師',
+        '財務專員': '財務專員',
+        '稽核': '稽核',
+
+        # 人力資源類
+        '人資專員': '人資專員',
+        '人力資源': '人資專員',
+        'hr': '人資專員',
+
+        # 其他專業類
+        '法務': '法務專員',
+        '律師': '律師',
+        '護理師': '護理師',
+        '醫師': '醫師',
+        '老師': '老師',
+        '講師': '講師',
+        '翻譯': '翻譯',
+        '編輯': '編輯',
+        '記者': '記者',
+
+        # 技術支援類
+        '系統管理員': '系統管理員',
+        'devops': 'DevOps工程師',
+        '測試工程師': '測試工程師',
+        '品質保證': 'QA工程師',
+        '資安工程師': '資安工程師',
+
+        # 銷售類
+        '銷售': '業務代表',
+        '業務': '業務代表',
+        'sales': '業務代表',
+
+        # 實習/新鮮人
+        '實習生': '實習生',
+        '新鮮人': '新鮮人職缺',
+        '應屆畢業生': '新鮮人職缺'
+    }
+
+    def __init__(self, parse_cache_size=DEFAULT_CACHE_SIZE):
+        # 在背景預先載入分詞詞典，避免第一個查詢等待
+        tokenizer.initialize()
+
+        # 解析結果快取：快速回覆按鈕會讓許多用戶送出相同的文字
+        self._parse_cache = LRUMemo(parse_cache_size)
+
         # 薪資關鍵字模式
         self.salary_patterns = {
             'monthly': [r'(\d+)k', r'(\d+)千', r'月薪(\d+)', r'(\d+)萬/月', r'(\d+)萬'],
@@ -48,7 +134,15 @@ class JobConditionGuide:
         }
 
     def parse_natural_language_conditions(self, user_input):
-        """解析用戶的自然語言輸入，提取職缺條件"""
+        """解析用戶的自然語言輸入，提取職缺條件；結果為唯讀且會快取"""
+        return self._parse_cache.get_or_compute(normalize_query(user_input),
+                                                self._parse_natural_language_conditions)
+
+    def parse_cache_stats(self):
+        """條件解析快取的命中統計"""
+        return self._parse_cache.stats()
+
+    def _parse_natural_language_conditions(self, user_input):
 
         # 初始化條件
         conditions = {
@@ -68,7 +162,7 @@ class JobConditionGuide:
         }
 
         # 使用jieba分詞
-        words = jieba.lcut(user_input.lower())
+        words = tokenizer.lcut(user_input.lower())
         text_lower = user_input.lower()
 
         # 1. 提取職位名稱（移除條件詞後的主要關鍵字）
@@ -108,90 +202,11 @@ class JobConditionGuide:
     def _extract_job_title(self, text, words):
         """提取職位名稱 - 完全重寫，確保準確性"""
 
-        # 直接職位映射（最高優先級）
-        direct_job_mapping = {
-            # 商務管理類
-            '產品經理': '產品經理',
-            '專案經理': '專案經理',
-            '產品manager': '產品經理',
-            'pm': '產品經理',
-            'product manager': '產品經理',
-            'project manager': '專案經理',
-
-            # 設計類
-            'ui設計師': 'UI設計師',
-            'ux設計師': 'UX設計師',
-            'ui/ux': 'UI/UX設計師',
-            '視覺設計師': '視覺設計師',
-            '平面設計師': '平面設計師',
-            '網頁設計師': '網頁設計師',
-
-            # 工程師類
-            '軟體工程師': '軟體工程師',
-            '前端工程師': '前端工程師',
-            '後端工程師': '後端工程師',
-            '全端工程師': '全端工程師',
-            'python工程師': 'Python工程師',
-            'java工程師': 'Java工程師',
-            'javascript工程師': 'JavaScript工程師',
-
-            # 數據類
-            '數據分析師': '數據分析師',
-            '資料分析師': '數據分析師',
-            '資料科學家': '資料科學家',
-            'data analyst': '數據分析師',
-            'data scientist': '資料科學家',
-
-            # 營運類
-            '營運專員': '營運專員',
-            '行銷專員': '行銷專員',
-            '業務代表': '業務代表',
-            '客服專員': '客服專員',
-
-            # 財務會計類
-            '會計師': '會計師',
-            '財務專員': '財務專員',
-            '稽核': '稽核',
-
-            # 人力資源類
-            '人資專員': '人資專員',
-            '人力資源': '人資專員',
-            'hr': '人資專員',
-
-            # 其他專業類
-            '法務': '法務專員',
-            '律師': '律師',
-            '護理師': '護理師',
-            '醫師': '醫師',
-            '老師': '老師',
-            '講師': '講師',
-            '翻譯': '翻譯',
-            '編輯': '編輯',
-            '記者': '記者',
-
-            # 技術支援類
-            '系統管理員': '系統管理員',
-            'devops': 'DevOps工程師',
-            '測試工程師': '測試工程師',
-            '品質保證': 'QA工程師',
-            '資安工程師': '資安工程師',
-
-            # 銷售類
-            '銷售': '業務代表',
-            '業務': '業務代表',
-            'sales': '業務代表',
-
-            # 實習/新鮮人
-            '實習生': '實習生',
-            '新鮮人': '新鮮人職缺',
-            '應屆畢業生': '新鮮人職缺'
-        }
-
         # 將輸入文字轉為小寫進行比對
         text_lower = text.lower().strip()
 
         # 1. 直接完全匹配
-        for key, value in direct_job_mapping.items():
+        for key, value in self.direct_job_mapping.items():
             if key in text_lower:
                 return value
 
@@ -204,7 +219,7 @@ class JobConditionGuide:
         ]
 
         # 使用 jieba 分詞
-        words = jieba.lcut(text)
+        words = tokenizer.lcut(text)
 
         # 過濾出可能的職位詞彙
         job_candidates = []
@@ -0,0 +1,278 @@
+import bisect
+import math
+import re
+
+# 可篩選的城市，依序比對職缺地點開頭
+CITIES = ["台北", "新北", "桃園", "新竹", "台中", "台南", "高雄", "基隆", "宜蘭", "苗栗", "彰化", "嘉義", "屏東", "花蓮"]
+
+# 月薪級距：(標籤, 下限)，依職缺薪資下限歸類
+SALARY_BANDS = [("10萬以上", 100000), ("8-10萬", 80000), ("6-8萬", 60000), ("4-6萬", 40000), ("4萬以下", 0)]
+
+# 職位層級，依序比對職稱
+SENIORITY_LEVELS = [
+    ("主管", ["主管", "總監", "director", "head", "lead"]),
+    ("資深", ["資深", "高級", "senior", "sr."]),
+    ("初階", ["實習", "助理", "新鮮人", "junior", "初級"])
+]
+
+# 數字與單位，如 "60,000"、"150萬"、"60k"
+_AMOUNT_RE = re.compile(r'(\d+(?:\.\d+)?)\s*([kK萬千]?)')
+_UNITS = {'k': 1000, 'K': 1000, '千': 1000, '萬': 10000, '': 1}
+
+# 已移除文件的薪資區間
+_REMOVED = (math.nan, math.nan)
+
+
+def parse_salary(text):
+    """解析薪資文字為月薪 (下限, 上限)，上限不明時為 None；無法解析（如面議）時回傳 None
+
+    年薪以 12 個月換算，範圍只在後面標單位時（如 "150-250萬"）兩端共用該單位。
+    """
+    if not text:
+        return None
+
+    text = text.replace(',', '')
+    amounts = _AMOUNT_RE.findall(text)
+    if not amounts:
+        return None
+
+    values = []
+    for i, (number, unit) in enumerate(amounts[:2]):
+        if not unit and i == 0 and len(amounts) > 1:
+            unit = amounts[1][1]
+        values.append(float(number) * _UNITS[unit])
+
+    if "年薪" in text or "/年" in text:
+        values = [value / 12 for value in values]
+
+    low = int(values[0])
+    high = int(values[1]) if len(values) > 1 else None
+    if high is None and "以上" not in text:
+        high = low
+    return low, high
+
+
+def salary_overlaps(salary, low=None, high=None):
+    """薪資區間 (下限, 上限) 是否與 [low, high] 重疊，None 表示該端不設限"""
+    if salary is None:
+        return False
+    job_low, job_high = salary
+    if high is not None and job_low > high:
+        return False
+    if low is not None and job_high is not None and job_high < low:
+        return False
+    return True
+
+
+def job_city(job):
+    location = (job.get("location") or "").strip()
+    if "遠端" in location or "remote" in location.lower():
+        return "遠端"
+    for city in CITIES:
+        if location.startswith(city) or location.startswith(city.replace("台", "臺")):
+            return city
+    return "其他"
+
+
+def job_platform(job):
+    return job.get("platform") or "其他"
+
+
+def job_salary_band(job):
+    salary = parse_salary(job.get("salary", ""))
+    if salary is None:
+        return "面議"
+    for label, minimum in SALARY_BANDS:
+        if salary[0] >= minimum:
+            return label
+    return SALARY_BANDS[-1][0]
+
+
+def job_seniority(job):
+    title = (job.get("title") or "").lower()
+    for level, words in SENIORITY_LEVELS:
+        if any(word in title for word in words):
+            return level
+    return "一般"
+
+
+# 屬性名稱 → 取值函式
+FACET_EXTRACTORS = {
+    "city": job_city,
+    "platform": job_platform,
+    "salary_band": job_salary_band,
+    "seniority": job_seniority
+}
+
+
+def docs_to_bitmap(docs, size):
+    """將文件編號轉為位元圖（Python int，第 n 位代表第 n 份文件）"""
+    bits = bytearray((size + 7) // 8)
+    for doc in docs:
+        bits[doc >> 3] |= 1 << (doc & 7)
+    return int.from_bytes(bits, 'little')
+
+
+class FacetIndex:
+    """各屬性值的位元圖索引，結果集合的分面計數只需 AND 與 popcount"""
+
+    def __init__(self, extractors=None):
+        self.extractors = extractors or FACET_EXTRACTORS
+        self._size = 0
+        # 屬性 → 值 → [文件編號]；位元圖於查詢時建立並快取到下次新增文件
+        self._docs = {attribute: {} for attribute in self.extractors}
+        self._bitmaps = None
+
+    def add(self, doc, job):
+        # 先放大文件數，同時建立位元圖的執行緒不會遇到超出範圍的編號
+        self._size = max(self._size, doc + 1)
+        for attribute, extract in self.extractors.items():
+            self._docs[attribute].setdefault(extract(job), []).append(doc)
+        self._bitmaps = None
+
+    def remove(self, doc, job):
+        """移除文件，job 需與加入時相同才能找到所屬的值"""
+        for attribute, extract in self.extractors.items():
+            values = self._docs[attribute]
+            docs = values.get(extract(job))
+            if docs is not None and doc in docs:
+                # 換成新清單而非原地修改，建立位元圖的執行緒不受影響
+                values[extract(job)] = [other for other in docs if other != doc]
+        self._bitmaps = None
+
+    def _ensure_bitmaps(self):
+        bitmaps = self._bitmaps
+        if bitmaps is None:
+            # 先複製各值的文件清單再讀取文件數：add 先放大文件數才加入編號，複製到的編號都在範圍內
+            snapshot = {attribute: [(value, docs[:]) for value, docs in list(values.items())]
+                        for attribute, values in self._docs.items()}
+            size = self._size
+            bitmaps = {
+                attribute: {value: docs_to_bitmap(docs, size) for value, docs in values}
+                for attribute, values in snapshot.items()
+            }
+            self._bitmaps = bitmaps
+        return bitmaps
+
+    def docs(self, attribute, value):
+        """指定屬性值的文件編號（遞增排序）"""
+        return self._docs.get(attribute, {}).get(value, [])
+
+    def bitmap(self, attribute, value):
+        """指定屬性值的文件位元圖"""
+        return self._ensure_bitmaps().get(attribute, {}).get(value, 0)
+
+    def select(self, facets):
+        """符合所有 {屬性: 值} 的文件位元圖，同屬性可給多個值（任一符合）"""
+        selected = (1 << self._size) - 1
+        for attribute, values in facets.items():
+            if isinstance(values, str):
+                values = [values]
+            union = 0
+            for value in values:
+                union |= self.bitmap(attribute, value)
+            selected &= union
+        return selected
+
+    def mask(self, facets, size):
+        """select 的結果轉為前 size 份文件的位元組遮罩，以 mask[doc >> 3] >> (doc & 7) & 1 判斷文件是否符合
+
+        逐一判斷大量文件時不必每次位移整個位元圖。
+        """
+        bitmap = self.select(facets) & ((1 << size) - 1)
+        return bitmap.to_bytes((size + 7) // 8, 'little')
+
+    def counts(self, result_bitmap, attributes=None):
+        """計算結果集合在各屬性值的數量，回傳 {屬性: [(值, 數量)]}，依數量由多到少"""
+        bitmaps = self._ensure_bitmaps()
+        counts = {}
+        for attribute in attributes or self.extractors:
+            values = [(value, (result_bitmap & bitmap).bit_count())
+                      for value, bitmap in bitmaps.get(attribute, {}).items()]
+            counts[attribute] = sorted((item for item in values if item[1]), key=lambda item: -item[1])
+        return counts
+
+
+class SalaryIndex:
+    """薪資區間索引：職缺月薪下限與上限各自排序，範圍重疊查詢只需兩次二分搜尋"""
+
+    def __init__(self):
+        self._ranges = {}
+        # (月薪下限, 文件編號) 與 (月薪上限, 文件編號)，上限不明時以無限大表示
+        self._by_low = []
+        self._by_high = []
+
+    def __len__(self):
+        return len(self._ranges)
+
+    def items(self):
+        """(文件編號, (月薪下限, 上限))，上限不明時為無限大"""
+        return self._ranges.items()
+
+    def _bounds(self, job):
+        salary = parse_salary(job.get("salary", ""))
+        if salary is None:
+            return None
+        low, high = salary
+        return low, math.inf if high is None else high
+
+    def add(self, doc, job):
+        """加入單一文件，以二分插入維持排序"""
+        bounds = self._bounds(job)
+        if bounds is None:
+            return
+
+        low, high = bounds
+        self._ranges[doc] = bounds
+        bisect.insort(self._by_low, (low, doc))
+        bisect.insort(self._by_high, (high, doc))
+
+    def add_many(self, docs):
+        """批次加入 [(文件編號, 職缺)]：收集後只排序一次，避免逐筆插入的 O(N²)
+
+        排序好的新清單建好後才替換，查詢中的執行緒看到的是替換前或替換後的完整清單。
+        """
+        ranges = {}
+        for doc, job in docs:
+            bounds = self._bounds(job)
+            if bounds is not None:
+                ranges[doc] = bounds
+        if not ranges:
+            return
+
+        by_low = self._by_low + [(low, doc) for doc, (low, _) in ranges.items()]
+        by_high = self._by_high + [(high, doc) for doc, (_, high) in ranges.items()]
+        by_low.sort()
+        by_high.sort()
+        self._ranges.update(ranges)
+        self._by_low, self._by_high = by_low, by_high
+
+    def remove(self, doc):
+        bounds = self._ranges.get(doc)
+        if bounds is None:
+            return
+
+        low, high = bounds
+        del self._by_low[bisect.bisect_left(self._by_low, (low, doc))]
+        del self._by_high[bisect.bisect_left(self._by_high, (high, doc))]
+        self._ranges.pop(doc, None)
+
+    def overlapping(self, low=None, high=None):
+        """薪資區間與 [low, high] 重疊的文件編號（遞增排序），None 表示該端不設限
+
+        下限 <= high 的職缺是 _by_low 的前段，上限 >= low 的職缺是 _by_high 的後段，
+        只走訪較短的一段，再以另一個條件篩選。
+        """
+        low = 0 if low is None else low
+        high = math.inf if high is None else high
+
+        end = bisect.bisect_right(self._by_low, (high, math.inf))
+        start = bisect.bisect_left(self._by_high, (low, -1))
+
+        # 同時有文件被移除時，排序清單中的編號可能已不在 _ranges；NaN 的比較一律為 False，直接略過
+        ranges = self._ranges
+        if end <= len(self._by_high) - start:
+            docs = [doc for _, doc in self._by_low[:end] if ranges.get(doc, _REMOVED)[1] >= low]
+        else:
+            docs = [doc for _, doc in self._by_high[start:] if ranges.get(doc, _REMOVED)[0] <= high]
+        return sorted(docs)
@@ -0,0 +1,174 @@
+import json
+import re
+
+# 容器外要追蹤的字元與字串內要追蹤的字元
+_STRUCTURE_RE = re.compile(r'[{}\[\]"]')
+_STRING_RE = re.compile(r'["\\]')
+_WHITESPACE_RE = re.compile(r'[ \t\r\n]*')
+_PRIMITIVE_RE = re.compile(r'-?[0-9][0-9.eE+\-]*|true|false|null')
+_DECODER = json.JSONDecoder()
+
+
+class JSONStreamError(ValueError):
+    """串流解析錯誤"""
+
+
+class JSONStreamReader:
+    """以固定大小緩衝區逐段解析 JSON 文件，記憶體用量只與單筆資料大小有關
+
+    用法：
+        reader = JSONStreamReader(f)
+        for section in reader.iter_object():
+            if section == "users":
+                for user_id in reader.iter_object():
+                    user = reader.read_value()
+
+    在 iter_object 迴圈中未讀取的值會自動略過；巢狀迴圈不可提前 break。
+    """
+
+    def __init__(self, fp, chunk_size=1 << 16):
+        self.fp = fp
+        self.chunk_size = chunk_size
+        self.buffer = ''
+        self.pos = 0
+        self.eof = False
+        self._value_consumed = True
+
+    def _fill(self):
+        """丟棄 pos 之前的資料並讀入下一段，回傳被丟棄的字元數；已到檔尾時回傳 None"""
+        if self.eof:
+            return None
+
+        chunk = self.fp.read(self.chunk_size)
+        if not chunk:
+            self.eof = True
+            return None
+
+        shift = self.pos
+        self.buffer = self.buffer[shift:] + chunk
+        self.pos = 0
+        return shift
+
+    def _peek(self):
+        """略過空白並回傳下一個字元，檔尾時回傳空字串"""
+        while True:
+            self.pos = _WHITESPACE_RE.match(self.buffer, self.pos).end()
+            if self.pos < len(self.buffer):
+                return self.buffer[self.pos]
+            if self._fill() is None:
+                return ''
+
+    def _expect(self, char):
+        found = self._peek()
+        if found != char:
+            raise JSONStreamError(f"預期 {char!r}，但讀到 {found!r}")
+        self.pos += 1
+
+    def _scan_value(self, keep):
+        """找出目前值的結尾位置；keep 為 False 時邊掃描邊丟棄緩衝區"""
+        first = self._peek()
+        if not first:
+            raise JSONStreamError("非預期的檔案結尾")
+
+        if first not in '{["':
+            while True:
+                match = _PRIMITIVE_RE.match(self.buffer, self.pos)
+                if match and (match.end() < len(self.buffer) or self.eof):
+                    return match.end()
+                if self._fill() is None and not match:
+                    raise JSONStreamError(f"無法解析的值：{self.buffer[self.pos:self.pos + 20]!r}")
+
+        depth = 0
+        in_string = False
+        i = self.pos
+        while True:
+            match = (_STRING_RE if in_string else _STRUCTURE_RE).search(self.buffer, i)
+            if match is None or (match.group() == '\\' and match.end() >= len(self.buffer)):
+                if not keep:
+                    self.pos = i
+                shift = self._fill()
+                if shift is None:
+                    raise JSONStreamError("非預期的檔案結尾")
+                i -= shift
+                continue
+
+            char = match.group()
+            i = match.end()
+            if in_string:
+                if char == '\\':
+                    i += 1
+                    continue
+                in_string = False
+            elif char == '"':
+                in_string = True
+                continue
+            elif char in '{[':
+                depth += 1
+                continue
+            else:
+                depth -= 1
+
+            if depth == 0:
+                return i
+
+    def _decode(self):
+        """以 C 解碼器讀取目前的值，資料不完整時補讀後重試"""
+        self._value_consumed = True
+        if not self._peek():
+            raise JSONStreamError("非預期的檔案結尾")
+
+        while True:
+            try:
+                value, end = _DECODER.raw_decode(self.buffer, self.pos)
+                # 數字可能在緩衝區邊界被截斷，需確認後面接著分隔字元
+                if self.eof or isinstance(value, (str, list, dict)) or \
+                        (end < len(self.buffer) and self.buffer[end] in ' \t\r\n,]}'):
+                    return value, end
+            except json.JSONDecodeError as e:
+                if self.eof:
+                    raise JSONStreamError(str(e))
+            self._fill()
+
+    def read_value_text(self):
+        """讀取目前值的原始 JSON 文字"""
+        _, end = self._decode()
+        text = self.buffer[self.pos:end]
+        self.pos = end
+        return text
+
+    def read_value(self):
+        """讀取並解碼目前的值"""
+        value, self.pos = self._decode()
+        return value
+
+    def skip_value(self):
+        """略過目前的值，不保留其內容"""
+        self._value_consumed = True
+        self.pos = self._scan_value(keep=False)
+
+    def iter_object(self):
+        """逐一產生目前物件的鍵，呼叫端接著讀取或略過對應的值"""
+        self._value_consumed = True
+        self._expect('{')
+        if self._peek() == '}':
+            self.pos += 1
+            return
+
+        while True:
+            if self._peek() != '"':
+                raise JSONStreamError("物件的鍵必須是字串")
+            key = self.read_value()
+            self._expect(':')
+
+            self._value_consumed = False
+            yield key
+            if not self._value_consumed:
+                self.skip_value()
+
+            separator = self._peek()
+            self.pos += 1
+            if separator == '}':
+                self._value_consumed = True
+                return
+            if separator != ',':
+                raise JSONStreamError(f"預期 ',' 或 '}}'，但讀到 {separator!r}")
@@ -1,13 +1,15 @@
 import schedule
 import time
 import threading
-from datetime import datetime, timedelta
 from linebot.models import TextSendMessage, FlexSendMessage
 from crawler import JobCrawler
 from flex_message_templates import JobCardBuilder
-from user_manager import UserManager
+from user_manager import UserManager, now_ts
 from advanced_search import AdvancedJobSearch
 
+# 啟動時從職缺目錄載入常駐索引的最近職缺數量
+CATALOG_SCAN_LIMIT = 5000
+
 
 class NotificationSystem:
     """通知與定時任務系統"""
@@ -19,6 +21,9 @@ class NotificationSystem:
         self.user_manager = UserManager()
         self.advanced_search = AdvancedJobSearch()
 
+        # 常駐索引只在啟動時從職缺目錄載入一次，之後隨職缺更新增量維護
+        self.advanced_search.index_jobs(self.user_manager.job_catalog.recent(CATALOG_SCAN_LIMIT))
+
         # 通知設定
         self.notification_settings = {
             "daily_job_alerts": True,
@@ -77,8 +82,8 @@ class NotificationSystem:
 
             # 為每個熱門關鍵字搜尋職缺
             digest_jobs = []
-            for keyword, count in popular_keywords[:3]:  # 取前3個熱門關鍵字
-                jobs = self.job_crawler.search_all_platforms(keyword, 3)
+            results = self.search_many([keyword for keyword, count in popular_keywords[:3]], 3)  # 取前3個熱門關鍵字
+            for jobs in results.values():
                 digest_jobs.extend(jobs)
 
             if not digest_jobs:
@@ -132,21 +137,27 @@ class NotificationSystem:
             # 獲取有搜尋歷史的用戶
             users_with_history = self._get_users_with_search_history()
 
+            # 獲取用戶偏好，每位用戶的前2個偏好合併為一個查詢
+            profiles = {}
             for user_id in users_with_history:
-                try:
-                    # 獲取用戶偏好
-                    user_stats = self.user_manager.get_user_stats(user_id)
-                    if not user_stats or not user_stats.get("preferred_keywords"):
-                        continue
+                user_stats = self.user_manager.get_user_stats(user_id)
+                if user_stats and user_stats.get("preferred_keywords"):
+                    profiles[user_id] = user_stats["preferred_keywords"][:2]
+
+            # 所有用戶的偏好一次對職缺目錄的常駐索引評分
+            queries = [" ".join(pref["keyword"] for pref in prefs) for prefs in profiles.values()]
+            matches = dict(zip(profiles, self.advanced_search.score_many(None, queries, 6)))
 
-                    # 基於用戶偏好搜尋職缺
-                    preferred_keywords = user_stats["preferred_keywords"][:2]  # 取前2個偏好
+            # 職缺目錄沒有符合的用戶，其偏好關鍵字一起即時搜尋，重複的關鍵字只搜尋一次
+            missing = [pref["keyword"] for user_id, prefs in profiles.items() if not matches[user_id] for pref in prefs]
+            crawled = self.search_many(missing, 3, use_catalog=False)
 
-                    recommendation_jobs = []
-                    for pref in preferred_keywords:
-                        keyword = pref["keyword"]
-                        jobs = self.job_crawler.search_all_platforms(keyword, 3)
-                        recommendation_jobs.extend(jobs)
+            for user_id, preferred_keywords in profiles.items():
+                try:
+                    recommendation_jobs = matches[user_id]
+                    if not recommendation_jobs:
+                        for pref in preferred_keywords:
+                            recommendation_jobs.extend(crawled[pref["keyword"]])
 
                     if recommendation_jobs:
                         # 發送個人化推薦
@@ -180,11 +191,6 @@ class NotificationSystem:
         except Exception as e:
             print(f"❌ 發送個人化推薦失敗：{e}")
 
-    def send_weekly_report(self):
-        """發送週報"""
-        try:
-            print("📊 開始發送週報...")
-
     def send_weekly_report(self):
         """發送週報"""
         try:
@@ -237,6 +243,29 @@ class NotificationSystem:
         except Exception as e:
             print(f"❌ 發送週報失敗：{e}")
 
+    def search_many(self, keywords, limit_per_platform=5, use_catalog=True):
+        """排程任務共用的批次搜尋，回傳 {關鍵字: [職缺]}
+
+        先以一次批次評分從職缺目錄取得結果，數量不足的關鍵字再同時交給爬蟲搜尋；
+        只差在大小寫或空白的關鍵字只搜尋一次。
+        """
+        unique = {}
+        for keyword in keywords:
+            unique.setdefault(' '.join(keyword.lower().split()), keyword)
+
+        limit = limit_per_platform * 3
+        results = {}
+        if use_catalog and unique:
+            for key, jobs in zip(unique, self.advanced_search.score_many(None, list(unique), limit)):
+                if len(jobs) >= limit:
+                    results[key] = jobs
+
+        missing = [key for key in unique if key not in results]
+        if missing:
+            results.update(self.job_crawler.search_many(missing, limit_per_platform))
+
+        return {keyword: results[' '.join(keyword.lower().split())] for keyword in keywords}
+
     def update_trending_jobs(self):
         """更新熱門職缺"""
         try:
@@ -245,24 +274,36 @@ class NotificationSystem:
             # 獲取熱門關鍵字
             popular_keywords = self.user_manager.get_popular_keywords(3)
 
+            # 要更新職缺目錄，直接交給爬蟲搜尋
             all_jobs = []
-            for keyword, count in popular_keywords:
-                jobs = self.job_crawler.search_all_platforms(keyword, 5)
+            results = self.search_many([keyword for keyword, count in popular_keywords], 5, use_catalog=False)
+            for jobs in results.values():
                 all_jobs.extend(jobs)
 
             if all_jobs:
-                # 更新職缺資料
-                jobs_data = {
-                    "jobs": all_jobs,
-                    "last_updated": datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
-                    "total_count": len(all_jobs)
-                }
-                self.user_manager.save_jobs_data(jobs_data)
-                print(f"✅ 更新了 {len(all_jobs)} 個熱門職缺")
+                # 寫入職缺目錄，依 ID 更新既有職缺並延長到期時間
+                updated = self.user_manager.job_catalog.upsert_many(all_jobs)
+                # 常駐索引只加入或取代這次更新的職缺
+                self.advanced_search.index_jobs(all_jobs)
+                print(f"✅ 更新了 {updated} 個熱門職缺")
+
+            self.update_suggestions()
 
         except Exception as e:
             print(f"❌ 更新熱門職缺失敗：{e}")
 
+    def update_suggestions(self):
+        """以職缺目錄與熱門搜尋重建自動補全建議詞，寫入檔案供快速回覆選單使用"""
+        try:
+            popular_keywords = self.user_manager.get_popular_keywords(100)
+
+            trie = self.advanced_search.build_suggestions(None, popular_keywords)
+            trie.save()
+            print(f"🔤 建議詞已更新：{len(trie)} 個")
+
+        except Exception as e:
+            print(f"❌ 更新建議詞失敗：{e}")
+
     def cleanup_old_data(self):
         """清理舊資料"""
         try:
@@ -271,6 +312,17 @@ class NotificationSystem:
             # 清理30天前的搜尋歷史
             self.user_manager.cleanup_old_data(30)
 
+            # 移除職缺目錄中已過期的職缺
+            removed = self.user_manager.job_catalog.compact()
+            print(f"🗑️ 移除 {removed} 個過期職缺")
+
+            # 常駐索引刪除已過期的職缺，並合併刪除標記
+            index_ids = self.advanced_search.index.job_ids()
+            live_jobs = self.user_manager.job_catalog.get_many(index_ids)
+            expired = self.advanced_search.remove_jobs(job_id for job_id in index_ids if job_id not in live_jobs)
+            self.advanced_search.merge_index(force=True)
+            print(f"🗂️ 索引移除 {expired} 個過期職缺")
+
             print("✅ 舊資料清理完成")
 
         except Exception as e:
@@ -311,40 +363,16 @@ class NotificationSystem:
 
     def _get_active_users(self, days=7):
         """獲取活躍用戶列表"""
-        user_data = self.user_manager.load_user_data()
-        active_users = []
-
-        cutoff_date = datetime.now() - timedelta(days=days)
-
-        for user_id, user_info in user_data.get("users", {}).items():
-            last_interaction = user_info.get("last_interaction")
-            if last_interaction:
-                try:
-                    last_date = datetime.strptime(last_interaction, "%Y-%m-%d %H:%M:%S")
-                    if last_date > cutoff_date:
-                        active_users.append(user_id)
-                except ValueError:
-                    continue
-
-        return active_users
+        return self.user_manager.get_active_users(now_ts() - days * 86400)
 
     def _get_users_with_search_history(self):
         """獲取有搜尋歷史的用戶"""
-        user_data = self.user_manager.load_user_data()
-        users_with_history = []
-
-        for user_id, searches in user_data.get("search_history", {}).items():
-            if searches:  # 有搜尋紀錄
-                users_with_history.append(user_id)
-
-        return users_with_history
+        return self.user_manager.get_users_with_search_history()
 
     def _get_weekly_stats(self):
         """獲取本週統計資料"""
-        user_data = self.user_manager.load_user_data()
-
         # 計算本週新增職缺數量
-        jobs_data = self.user_manager.load_jobs_data()
+        new_jobs = self.user_manager.job_catalog.count_since(now_ts() - 7 * 86400)
 
         # 計算活躍用戶數
         active_users_count = len(self._get_active_users(7))
@@ -354,7 +382,7 @@ class NotificationSystem:
         top_keyword = popular[0][0] if popular else "Python"
 
         return {
-            "new_jobs": len(jobs_data.get("jobs", [])),
+            "new_jobs": new_jobs,
             "active_users": active_users_count,
             "top_keyword": top_keyword
         }
@@ -377,14 +405,7 @@ class NotificationSystem:
             return
 
         # 找出搜尋過此關鍵字的用戶
-        user_data = self.user_manager.load_user_data()
-        interested_users = []
-
-        for user_id, searches in user_data.get("search_history", {}).items():
-            for search in searches:
-                if keyword.lower() in search.get("keyword", "").lower():
-                    interested_users.append(user_id)
-                    break
+        interested_users = self.user_manager.find_users_by_keyword(keyword)
 
         # 發送通知
         for user_id in interested_users[:20]:  # 限制通知數量
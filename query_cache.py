@@ -0,0 +1,84 @@
+import threading
+from collections import OrderedDict
+
+# 預設快取的查詢數量
+DEFAULT_CACHE_SIZE = 1024
+
+
+class FrozenDict(dict):
+    """唯讀的 dict：仍是 dict 子類別，可直接 json.dumps 或以 dict() 複製後修改"""
+
+    def _readonly(self, *args, **kwargs):
+        raise TypeError("解析結果為唯讀，請先以 dict() 複製再修改")
+
+    __setitem__ = __delitem__ = __ior__ = _readonly
+    clear = pop = popitem = setdefault = update = _readonly
+
+    def __reduce__(self):
+        # 讓 copy.deepcopy 與 pickle 不經過 __setitem__
+        return FrozenDict, (dict(self),)
+
+
+def freeze(value):
+    """遞迴轉為唯讀結構：dict → FrozenDict、list → tuple、set → frozenset"""
+    if isinstance(value, dict):
+        return FrozenDict((key, freeze(item)) for key, item in value.items())
+    if isinstance(value, (list, tuple)):
+        return tuple(freeze(item) for item in value)
+    if isinstance(value, set):
+        return frozenset(value)
+    return value
+
+
+def normalize_query(text):
+    """去除前後空白並合併連續空白，作為快取鍵"""
+    return ' '.join(text.split())
+
+
+class LRUMemo:
+    """有容量上限的 LRU 快取，儲存唯讀的計算結果並統計命中率"""
+
+    def __init__(self, maxsize=DEFAULT_CACHE_SIZE):
+        self.maxsize = maxsize
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get_or_compute(self, key, compute):
+        """取得快取結果，未命中時以 compute(key) 計算並存入"""
+        with self._lock:
+            if key in self._entries:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return self._entries[key]
+            self.misses += 1
+
+        # 計算在鎖外進行，同一個鍵同時未命中時可能重複計算，結果相同
+        value = freeze(compute(key))
+
+        with self._lock:
+            self._entries[key] = value
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+
+        return value
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self.hits = 0
+            self.misses = 0
+
+    def stats(self):
+        """命中次數、未命中次數、目前筆數與命中率"""
+        with self._lock:
+            total = self.hits + self.misses
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "size": len(self._entries),
+                "maxsize": self.maxsize,
+                "hit_rate": round(self.hits / total, 4) if total else 0.0
+            }
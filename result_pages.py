@@ -0,0 +1,86 @@
+import secrets
+import threading
+import time
+from collections import OrderedDict
+
+# 搜尋結果保留 30 分鐘，最多同時保留的搜尋數量
+DEFAULT_PAGE_TTL = 1800
+DEFAULT_MAX_SESSIONS = 5000
+
+# 「下一頁」回傳資料的前綴，格式為 page:<游標>:<起始位置>
+PAGE_POSTBACK_PREFIX = "page:"
+
+
+class ResultPages:
+    """分頁搜尋結果：整份結果存在短游標 ID 下，翻頁只取出該頁，不必重新搜尋
+
+    每筆結果到期後即失效；因為保留時間相同，最舊的結果一定最先到期，
+    新增時從最舊的開始清除即可。超過數量上限時也會移除最舊的結果。
+    """
+
+    def __init__(self, ttl=DEFAULT_PAGE_TTL, max_sessions=DEFAULT_MAX_SESSIONS):
+        self.ttl = ttl
+        self.max_sessions = max_sessions
+        # 游標 → (到期時間, 關鍵字, 用戶ID, 職缺清單)
+        self._sessions = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._sessions)
+
+    def _evict(self, now):
+        while self._sessions:
+            cursor, session = next(iter(self._sessions.items()))
+            if session[0] > now and len(self._sessions) <= self.max_sessions:
+                break
+            del self._sessions[cursor]
+
+    def create(self, jobs, keyword="", user_id=None):
+        """保存搜尋結果並回傳游標"""
+        now = time.time()
+        with self._lock:
+            cursor = secrets.token_urlsafe(6)
+            while cursor in self._sessions:
+                cursor = secrets.token_urlsafe(6)
+            self._sessions[cursor] = (now + self.ttl, keyword, user_id, list(jobs))
+            self._evict(now)
+        return cursor
+
+    def page(self, cursor, offset, size, user_id=None):
+        """取出一頁結果，回傳 {"jobs", "keyword", "offset", "total", "next_offset"}
+
+        游標不存在、已到期或屬於其他用戶時回傳 None；沒有下一頁時 next_offset 為 None。
+        """
+        with self._lock:
+            session = self._sessions.get(cursor)
+        if session is None:
+            return None
+
+        expires_at, keyword, owner, jobs = session
+        if expires_at <= time.time() or (user_id is not None and owner is not None and owner != user_id):
+            return None
+
+        offset = max(offset, 0)
+        end = offset + size
+        return {
+            "jobs": jobs[offset:end],
+            "keyword": keyword,
+            "offset": offset,
+            "total": len(jobs),
+            "next_offset": end if end < len(jobs) else None
+        }
+
+
+def page_postback_data(cursor, offset):
+    """「下一頁」按鈕的回傳資料"""
+    return f"{PAGE_POSTBACK_PREFIX}{cursor}:{offset}"
+
+
+def parse_page_postback(data):
+    """解析「下一頁」回傳資料為 (游標, 起始位置)，格式不符時回傳 None"""
+    if not data or not data.startswith(PAGE_POSTBACK_PREFIX):
+        return None
+    cursor, _, offset = data[len(PAGE_POSTBACK_PREFIX):].partition(":")
+    if not cursor or not offset.isdigit():
+        return None
+    return cursor, int(offset)
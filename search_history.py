@@ -0,0 +1,178 @@
+import bisect
+import threading
+
+# 每位用戶保留的搜尋紀錄筆數
+HISTORY_CAPACITY = 50
+
+
+class KeywordTable:
+    """搜尋關鍵字字串表：每個關鍵字只存一次，其他地方以整數 ID 參照"""
+
+    def __init__(self, keywords=None):
+        # 直接包裝資料中的清單，新增的關鍵字會一併寫回
+        self.keywords = keywords if keywords is not None else []
+        self._ids = {keyword: i for i, keyword in enumerate(self.keywords)}
+        # 字串表可能由多個執行緒共用，新增關鍵字時需避免重複編號
+        self._lock = threading.Lock()
+
+    def intern(self, keyword):
+        """取得關鍵字 ID，不存在時新增"""
+        keyword_id = self._ids.get(keyword)
+        if keyword_id is None:
+            with self._lock:
+                keyword_id = self._ids.get(keyword)
+                if keyword_id is None:
+                    keyword_id = len(self.keywords)
+                    self.keywords.append(keyword)
+                    self._ids[keyword] = keyword_id
+        return keyword_id
+
+    def lookup(self, keyword_id):
+        return self.keywords[keyword_id]
+
+    def ids_matching(self, text):
+        """找出包含指定文字（不分大小寫）的所有關鍵字 ID"""
+        text = text.lower()
+        return {i for i, keyword in enumerate(self.keywords) if text in keyword.lower()}
+
+
+class SharedKeywordTable:
+    """存在鍵值後端、由多個行程共用的關鍵字字串表
+
+    新關鍵字先以後端的原子計數器取得 ID 並寫入 ID → 關鍵字，再以「不存在才寫入」
+    佔用 關鍵字 → ID。兩個行程同時加入同一個關鍵字時只有一方佔用成功，另一方改用
+    勝出的 ID；落敗的 ID 同樣對應到該關鍵字，已存的紀錄不會解讀錯誤。
+    已分配的 ID 不會改變，讀過的對應直接快取在本機。
+    """
+
+    def __init__(self, backend, prefix="keywords:"):
+        self.backend = backend
+        self.prefix = prefix
+        self._ids = {}
+        self._keywords = {}
+
+    def _remember(self, keyword_id, keyword):
+        self._ids[keyword] = keyword_id
+        self._keywords[keyword_id] = keyword
+
+    def import_keywords(self, keywords):
+        """匯入舊版整份存放的字串表，ID 維持清單位置；後端已有字串表時不做任何事"""
+        if not keywords or self.backend.get(f"{self.prefix}seq") is not None:
+            return
+        for keyword_id, keyword in enumerate(keywords):
+            self.backend.set(f"{self.prefix}word:{keyword_id}", keyword)
+            self.backend.setnx(f"{self.prefix}id:{keyword}", keyword_id)
+        # 多個行程同時匯入時寫入的內容相同，計數器只由第一個設定
+        self.backend.setnx(f"{self.prefix}seq", len(keywords))
+
+    def intern(self, keyword):
+        """取得關鍵字 ID，不存在時新增"""
+        keyword_id = self._ids.get(keyword)
+        if keyword_id is not None:
+            return keyword_id
+
+        key = f"{self.prefix}id:{keyword}"
+        keyword_id = self.backend.get(key)
+        if keyword_id is None:
+            new_id = self.backend.incr(f"{self.prefix}seq") - 1
+            self.backend.set(f"{self.prefix}word:{new_id}", keyword)
+            # 佔用失敗時（其他行程先加入，或重試時已寫入）讀回實際生效的 ID
+            keyword_id = new_id if self.backend.setnx(key, new_id) else self.backend.get(key)
+
+        self._remember(keyword_id, keyword)
+        return keyword_id
+
+    def lookup(self, keyword_id):
+        """ID 對應的關鍵字；分配後未寫入（行程中斷）的 ID 回傳空字串"""
+        keyword = self._keywords.get(keyword_id)
+        if keyword is None:
+            keyword = self.backend.get(f"{self.prefix}word:{keyword_id}")
+            if keyword is None:
+                return ""
+            self._keywords[keyword_id] = keyword
+        return keyword
+
+    def keywords(self):
+        """依 ID 排列的關鍵字清單，可作為 KeywordTable 的內容；空缺的 ID 以空字串補位"""
+        prefix = f"{self.prefix}word:"
+        words = {}
+        for key in self.backend.keys(prefix):
+            keyword = self.backend.get(key)
+            if keyword is not None:
+                words[int(key[len(prefix):])] = keyword
+
+        keywords = [""] * (max(words) + 1 if words else 0)
+        for keyword_id, keyword in words.items():
+            keywords[keyword_id] = keyword
+        return keywords
+
+
+class SearchHistoryRing:
+    """固定容量的搜尋紀錄環狀緩衝區
+
+    資料以 {"head": 起點, "kw": [關鍵字ID], "ts": [epoch秒]} 存放，
+    未滿時 head 為 0；滿了之後新紀錄覆寫 head 位置的最舊紀錄。
+    """
+
+    def __init__(self, record=None, capacity=HISTORY_CAPACITY):
+        self.record = record if record is not None else new_history_record()
+        self.capacity = capacity
+
+    def __len__(self):
+        return len(self.record["kw"])
+
+    def _index(self, i):
+        """邏輯位置（由舊到新）轉為實際位置"""
+        return (self.record["head"] + i) % len(self.record["kw"])
+
+    def append(self, keyword_id, ts):
+        record = self.record
+        if len(record["kw"]) < self.capacity:
+            record["kw"].append(keyword_id)
+            record["ts"].append(ts)
+        else:
+            head = record["head"]
+            record["kw"][head] = keyword_id
+            record["ts"][head] = ts
+            record["head"] = (head + 1) % self.capacity
+
+    def entries(self):
+        """由舊到新的 (關鍵字ID, 時間)"""
+        kw, ts = self.record["kw"], self.record["ts"]
+        return [(kw[self._index(i)], ts[self._index(i)]) for i in range(len(kw))]
+
+    def keyword_ids(self):
+        return self.record["kw"]
+
+    def drop_before(self, cutoff_ts):
+        """移除 cutoff_ts（含）以前的紀錄，回傳移除筆數"""
+        size = len(self)
+        if not size:
+            return 0
+
+        ts = self.record["ts"]
+        keep_from = bisect.bisect_right(range(size), cutoff_ts, key=lambda i: ts[self._index(i)])
+        if keep_from:
+            kept = self.entries()[keep_from:]
+            self.record["head"] = 0
+            self.record["kw"] = [keyword_id for keyword_id, _ in kept]
+            self.record["ts"] = [searched_at for _, searched_at in kept]
+        return keep_from
+
+    def to_records(self, table):
+        """轉為可讀的 [{"keyword", "searched_at"}] 清單"""
+        return [{"keyword": table.lookup(keyword_id), "searched_at": searched_at}
+                for keyword_id, searched_at in self.entries()]
+
+
+def new_history_record():
+    return {"head": 0, "kw": [], "ts": []}
+
+
+def history_from_records(records, table, capacity=HISTORY_CAPACITY):
+    """將舊版 [{"keyword", "searched_at"}] 清單轉為環狀緩衝區資料"""
+    ring = SearchHistoryRing(capacity=capacity)
+    # 只保留最近 capacity 筆，較舊的紀錄不寫入字串表
+    for search in sorted(records, key=lambda search: search["searched_at"])[-capacity:]:
+        ring.append(table.intern(search["keyword"]), search["searched_at"])
+    return ring.record
@@ -0,0 +1,329 @@
+import math
+import re
+import tokenizer
+from fuzzy_match import NGramIndex
+from job_facets import FacetIndex, SalaryIndex, docs_to_bitmap
+
+# 建立索引的職缺欄位與 BM25F 欄位權重
+INDEXED_FIELDS = ("title", "description", "company", "tags")
+FIELD_WEIGHTS = (3.0, 1.0, 1.5, 2.0)
+
+# BM25 參數：k1 控制詞頻飽和速度，b 控制文件長度正規化程度
+BM25_K1 = 1.2
+BM25_B = 0.75
+
+# 已刪除文件超過此比例時合併索引
+MERGE_THRESHOLD = 0.25
+
+# 至少含一個文字或數字才視為詞，略過標點與空白
+_WORD_RE = re.compile(r'\w')
+
+
+def tokenize(text):
+    """將文字轉小寫後以 jieba 搜尋模式分詞，長詞會額外切出子詞以提高召回率"""
+    if not text:
+        return []
+    return [token for token in tokenizer.lcut_for_search(text.lower())
+            if _WORD_RE.search(token)]
+
+
+class JobIndex:
+    """職缺倒排索引：詞 → 含有該詞的文件編號清單（遞增排序）與各欄位詞頻
+
+    文件編號即職缺加入索引的順序，查詢時只需處理至少含一個查詢詞的職缺。
+    phrases 為需完整比對的多字詞（如 "node.js"、"google analytics"），
+    出現在職缺內容中時會整個加入索引。
+
+    加入文件時同步累計各欄位長度，BM25F 所需的平均長度與 IDF
+    都可由這些統計值與清單長度直接算出，不需重新掃描。
+    城市、平台、薪資級距與職位層級另以 facets 位元圖索引，薪資區間以 salary 排序索引。
+    所有索引詞另以 vocabulary n-gram 索引，拼錯的查詢詞可找到最接近的索引詞。
+
+    有 ID 的職缺可增量更新與刪除：刪除只加上標記並扣除統計值，更新為刪除後再加入，
+    成本只與變動的職缺有關；已刪除的文件在查詢時略過，比例過高時以 merged()
+    產生只含有效文件的新索引。加入與刪除不會改動既有文件編號，查詢可同時進行。
+    """
+
+    def __init__(self, jobs=None, phrases=(), field_weights=FIELD_WEIGHTS, k1=BM25_K1, b=BM25_B):
+        self.phrases = sorted({phrase.lower() for phrase in phrases})
+        self.field_weights = field_weights
+        self.k1 = k1
+        self.b = b
+        self._jobs = []
+        # 詞 → ([文件編號], [各欄位詞頻])
+        self._postings = {}
+        # 每份文件的詞（刪除時扣除文件頻率用）與各欄位詞數，以及有效文件的欄位詞數總和
+        self._doc_terms = []
+        self._field_lengths = []
+        self._field_totals = [0] * len(INDEXED_FIELDS)
+        # 職缺 ID → 文件編號、已刪除的文件編號，以及各詞含有的已刪除文件數
+        self._ids = {}
+        self._deleted = set()
+        self._deleted_df = {}
+        # 每次加入或刪除都會遞增，供快取判斷索引是否改變
+        self.version = 0
+        self.facets = FacetIndex()
+        self.salary = SalaryIndex()
+        self.vocabulary = NGramIndex()
+        if jobs:
+            self.add_many(jobs)
+
+    def __len__(self):
+        """有效文件數"""
+        return len(self._jobs) - len(self._deleted)
+
+    @property
+    def size(self):
+        """文件編號上限（含已刪除的文件），位元圖與陣列依此配置"""
+        return len(self._jobs)
+
+    @property
+    def deleted_ratio(self):
+        return len(self._deleted) / len(self._jobs) if self._jobs else 0.0
+
+    def is_deleted(self, doc):
+        return doc in self._deleted
+
+    def live_docs(self):
+        """依編號逐一產生有效文件"""
+        deleted = self._deleted
+        return (doc for doc in range(len(self._jobs)) if doc not in deleted)
+
+    def job_ids(self):
+        """索引中有效職缺的 ID"""
+        return list(self._ids)
+
+    def _field_counts(self, job):
+        """計算職缺各欄位的詞頻，回傳 [{詞: 次數}]"""
+        counts = []
+        for field in INDEXED_FIELDS:
+            value = job.get(field) or ""
+            counter = {}
+            if field == "tags":
+                # 標籤整個當作一個詞，同時分詞
+                tags = [str(tag).lower() for tag in value if tag]
+                for tag in tags:
+                    counter[tag] = counter.get(tag, 0) + 1
+                value = " ".join(tags)
+
+            text = value.lower()
+            for token in tokenize(text):
+                counter[token] = counter.get(token, 0) + 1
+            for phrase in self.phrases:
+                if phrase not in counter and phrase in text:
+                    counter[phrase] = text.count(phrase)
+            counts.append(counter)
+        return counts
+
+    def add(self, job):
+        """加入職缺並回傳文件編號；已有相同 ID 的職缺時取代舊的，內容相同則不變"""
+        doc, added = self._add(job)
+        if added:
+            self.salary.add(doc, job)
+            self.version += 1
+        return doc
+
+    def add_many(self, jobs):
+        """批次加入職缺，薪資索引在最後一次排序建立"""
+        added = []
+        for job in jobs:
+            doc, is_new = self._add(job)
+            if is_new:
+                added.append((doc, job))
+
+        # 同一批中被後來的版本取代的文件已刪除，不加入薪資索引
+        self.salary.add_many((doc, job) for doc, job in added if doc not in self._deleted)
+        if added:
+            self.version += 1
+
+    def _add(self, job):
+        """加入文件與倒排清單（不含薪資索引），回傳 (文件編號, 是否為新文件)"""
+        job_id = job.get("id")
+        if job_id is not None and job_id in self._ids:
+            old = self._ids[job_id]
+            if self._jobs[old] == job:
+                return old, False
+            self.remove(job_id)
+
+        # 先分詞，再依序寫入文件資料與清單：查詢中的執行緒看到的編號都已有完整資料
+        counts = self._field_counts(job)
+        lengths = tuple(sum(counter.values()) for counter in counts)
+        terms = set().union(*counts)
+
+        doc = len(self._jobs)
+        self._field_lengths.append(lengths)
+        self._doc_terms.append(tuple(terms))
+        self._jobs.append(job)
+        for i, length in enumerate(lengths):
+            self._field_totals[i] += length
+
+        for term in terms:
+            if term not in self._postings:
+                self.vocabulary.add(term)
+            docs, freqs = self._postings.setdefault(term, ([], []))
+            freqs.append(tuple(counter.get(term, 0) for counter in counts))
+            docs.append(doc)
+
+        self.facets.add(doc, job)
+        if job_id is not None:
+            self._ids[job_id] = doc
+        self.version += 1
+        return doc, True
+
+    def remove(self, job_id):
+        """刪除職缺：標記文件並扣除統計值，清單中的編號留到合併時才移除"""
+        doc = self._ids.pop(job_id, None)
+        if doc is None:
+            return False
+
+        self._deleted.add(doc)
+        for i, length in enumerate(self._field_lengths[doc]):
+            self._field_totals[i] -= length
+        for term in self._doc_terms[doc]:
+            self._deleted_df[term] = self._deleted_df.get(term, 0) + 1
+
+        job = self._jobs[doc]
+        self.facets.remove(doc, job)
+        self.salary.remove(doc)
+        self.version += 1
+        return True
+
+    def merged(self):
+        """合併刪除標記：回傳只含有效文件、重新編號的新索引，沿用既有詞頻不需重新分詞"""
+        index = JobIndex(phrases=self.phrases, field_weights=self.field_weights, k1=self.k1, b=self.b)
+
+        remap = {}
+        salaries = []
+        for doc in self.live_docs():
+            new_doc = len(index._jobs)
+            remap[doc] = new_doc
+            job = self._jobs[doc]
+            index._jobs.append(job)
+            index._field_lengths.append(self._field_lengths[doc])
+            index._doc_terms.append(self._doc_terms[doc])
+            index.facets.add(new_doc, job)
+            salaries.append((new_doc, job))
+        index.salary.add_many(salaries)
+        index._field_totals = list(self._field_totals)
+
+        for term, (docs, freqs) in self._postings.items():
+            kept = [(remap[doc], freq) for doc, freq in zip(docs, freqs) if doc in remap]
+            if kept:
+                index._postings[term] = ([doc for doc, _ in kept], [freq for _, freq in kept])
+                index.vocabulary.add(term)
+
+        index._ids = {job_id: remap[doc] for job_id, doc in self._ids.items()}
+        return index
+
+    def job(self, doc):
+        return self._jobs[doc]
+
+    def bitmap(self, docs):
+        """文件編號集合轉為位元圖"""
+        return docs_to_bitmap(docs, len(self._jobs))
+
+    def postings(self, term, field=None):
+        """含有指定詞的有效文件編號（遞增排序）；指定欄位（如 "title"）時只取該欄位含有此詞的文件"""
+        entry = self._postings.get(term.lower())
+        if not entry:
+            return []
+        deleted = self._deleted
+        if field is not None:
+            i = INDEXED_FIELDS.index(field)
+            return [doc for doc, freqs in zip(*entry) if freqs[i] and doc not in deleted]
+        return [doc for doc in entry[0] if doc not in deleted] if deleted else entry[0]
+
+    def document_frequency(self, term):
+        term = term.lower()
+        entry = self._postings.get(term)
+        return len(entry[0]) - self._deleted_df.get(term, 0) if entry else 0
+
+    def idf(self, term):
+        """BM25 的 IDF，文件數與清單長度隨索引更新，不需另外重算"""
+        n = len(self)
+        df = self.document_frequency(term)
+        return math.log(1 + (n - df + 0.5) / (df + 0.5))
+
+    def resolve_terms(self, terms, limit=3):
+        """查詢詞都不在索引中時，改用拼寫最接近的索引詞，如 "pythn" → "python"、"軟休" → "軟體"
+
+        只要有一個詞能直接比對到職缺就不做模糊比對，避免沒收錄的詞被換成不相干的詞；
+        不會換成單一字元的索引詞。同樣接近的詞最多取 limit 個，找不到時保留原詞。
+        """
+        terms = [term.lower() for term in terms]
+        if any(self.document_frequency(term) for term in terms):
+            return terms
+
+        resolved = []
+        for term in terms:
+            matches = [match for match in self.vocabulary.search(term, limit=limit) if len(match[0]) > 1]
+            if matches:
+                best = matches[0][2]
+                resolved.extend(match for match, _, distance in matches if distance == best)
+            else:
+                resolved.append(term)
+        return resolved
+
+    def candidates(self, terms, salary_range=None):
+        """至少含有一個查詢詞的文件編號，依加入順序排列
+
+        指定 salary_range {"min", "max"} 時再與薪資索引的結果取交集。
+        """
+        docs = set()
+        for term in terms:
+            docs.update(self.postings(term))
+        if salary_range:
+            docs.intersection_update(self.salary_docs(salary_range))
+        return sorted(docs)
+
+    def salary_docs(self, salary_range):
+        """薪資區間與查詢範圍重疊的文件編號"""
+        return self.salary.overlapping(salary_range.get("min"), salary_range.get("max"))
+
+    def _field_averages(self):
+        n = len(self) or 1
+        return [total / n or 1 for total in self._field_totals]
+
+    def _term_weights(self, term, fields):
+        """逐一產生 (文件編號, 權重)：依欄位權重與欄位長度合併詞頻後套用 BM25 飽和函數"""
+        entry = self._postings.get(term)
+        if not entry:
+            return
+
+        k1, b = self.k1, self.b
+        idf = self.idf(term)
+        deleted = self._deleted
+        for doc, freqs in zip(*entry):
+            if doc in deleted:
+                continue
+            lengths = self._field_lengths[doc]
+            tf = 0.0
+            for (weight, average), freq, length in zip(fields, freqs, lengths):
+                if freq:
+                    tf += weight * freq / (1 - b + b * length / average)
+            yield doc, idf * tf / (k1 + tf)
+
+    def term_weights(self, term):
+        """單一詞在各文件的 BM25F 權重，回傳 ([文件編號], [權重])；文件分數即查詢詞權重的和"""
+        if not len(self):
+            return [], []
+        fields = list(zip(self.field_weights, self._field_averages()))
+        pairs = list(self._term_weights(term.lower(), fields))
+        return [doc for doc, _ in pairs], [weight for _, weight in pairs]
+
+    def score(self, terms):
+        """以 BM25F 計算至少含一個查詢詞的文件分數，回傳 {文件編號: 分數}
+
+        每個詞先依欄位權重與欄位長度合併為單一詞頻，再套用 BM25 飽和函數，
+        計算量只與查詢詞的清單長度有關。
+        """
+        if not len(self):
+            return {}
+
+        fields = list(zip(self.field_weights, self._field_averages()))
+        scores = {}
+        for term in {term.lower() for term in terms}:
+            for doc, weight in self._term_weights(term, fields):
+                scores[doc] = scores.get(doc, 0.0) + weight
+
+        return scores
@@ -0,0 +1,225 @@
+import gzip
+import io
+import json
+import os
+import time
+
+# 可選的加速套件，未安裝時退回標準函式庫
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+try:
+    import msgpack
+except ImportError:
+    msgpack = None
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+GZIP_MAGIC = b'\x1f\x8b'
+ZSTD_MAGIC = b'\x28\xb5\x2f\xfd'
+
+
+class JSONSerializer:
+    """標準函式庫 JSON，輸出不含縮排的精簡格式"""
+
+    name = 'json'
+    is_json = True
+
+    def dumps(self, obj):
+        return json.dumps(obj, ensure_ascii=False, separators=(',', ':')).encode('utf-8')
+
+    def loads(self, data):
+        return json.loads(data)
+
+
+class OrjsonSerializer:
+    """orjson：輸出與 JSONSerializer 相容的精簡 JSON"""
+
+    name = 'orjson'
+    is_json = True
+
+    def dumps(self, obj):
+        return orjson.dumps(obj)
+
+    def loads(self, data):
+        return orjson.loads(data)
+
+
+class MsgpackSerializer:
+    """MessagePack 二進位格式（不支援串流讀取）"""
+
+    name = 'msgpack'
+    is_json = False
+
+    def dumps(self, obj):
+        return msgpack.packb(obj, use_bin_type=True)
+
+    def loads(self, data):
+        return msgpack.unpackb(data, raw=False)
+
+
+def get_serializer(name='auto'):
+    """取得序列化器：auto 優先使用 orjson，否則使用標準 JSON"""
+    if name == 'auto':
+        return OrjsonSerializer() if orjson is not None else JSONSerializer()
+    if name == 'orjson' and orjson is not None:
+        return OrjsonSerializer()
+    if name == 'msgpack' and msgpack is not None:
+        return MsgpackSerializer()
+    if name in ('json', 'orjson', 'msgpack'):
+        if name != 'json':
+            print(f"⚠️ 未安裝 {name}，改用標準 JSON")
+        return JSONSerializer()
+    raise ValueError(f"不支援的序列化格式：{name}")
+
+
+def compress(data, method=None):
+    """壓縮資料：None、gzip 或 zstd"""
+    if not method:
+        return data
+    if method == 'gzip':
+        return gzip.compress(data, compresslevel=6)
+    if method == 'zstd':
+        if zstandard is None:
+            print("⚠️ 未安裝 zstandard，改用 gzip 壓縮")
+            return gzip.compress(data, compresslevel=6)
+        return zstandard.ZstdCompressor(level=3).compress(data)
+    raise ValueError(f"不支援的壓縮方式：{method}")
+
+
+def decompress(data):
+    """依檔頭自動判斷並解壓縮"""
+    if data.startswith(GZIP_MAGIC):
+        return gzip.decompress(data)
+    if data.startswith(ZSTD_MAGIC):
+        if zstandard is None:
+            raise ValueError("檔案以 zstd 壓縮，但未安裝 zstandard")
+        # 串流寫入的 zstd 檔頭沒有內容大小，需用 decompressobj 解壓
+        return zstandard.ZstdDecompressor().decompressobj().decompress(data)
+    return data
+
+
+def _detect_loader(data, serializer):
+    """依內容判斷格式：JSON 以 { 或空白開頭，否則視為 MessagePack"""
+    first = data.lstrip()[:1]
+    if first in (b'{', b'['):
+        return serializer if serializer.is_json else get_serializer('auto')
+    if msgpack is None:
+        raise ValueError("檔案為 MessagePack 格式，但未安裝 msgpack")
+    return MsgpackSerializer()
+
+
+def write_file(path, obj, serializer=None, compression=None):
+    """序列化後以原子方式寫入檔案，回傳寫入的位元組數"""
+    serializer = serializer or get_serializer()
+    payload = compress(serializer.dumps(obj), compression)
+
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, 'wb') as f:
+        f.write(payload)
+    os.replace(tmp_path, path)
+
+    return len(payload)
+
+
+def read_file(path, serializer=None):
+    """讀取檔案，自動處理壓縮與格式"""
+    serializer = serializer or get_serializer()
+    with open(path, 'rb') as f:
+        data = decompress(f.read())
+    return _detect_loader(data, serializer).loads(data)
+
+
+def open_text_stream(path):
+    """以文字串流開啟 JSON 檔案（可為壓縮檔），供逐段解析使用"""
+    raw = open(path, 'rb')
+    magic = raw.read(4)
+    raw.seek(0)
+
+    if magic.startswith(GZIP_MAGIC):
+        return io.TextIOWrapper(gzip.GzipFile(fileobj=raw), encoding='utf-8')
+    if magic.startswith(ZSTD_MAGIC):
+        if zstandard is None:
+            raw.close()
+            raise ValueError("檔案以 zstd 壓縮，但未安裝 zstandard")
+        return io.TextIOWrapper(zstandard.ZstdDecompressor().stream_reader(raw, closefd=True),
+                                encoding='utf-8')
+
+    first = magic.lstrip()[:1]
+    if first and first not in (b'{', b'['):
+        raw.close()
+        raise ValueError("檔案不是 JSON 格式，無法串流讀取")
+    return io.TextIOWrapper(raw, encoding='utf-8')
+
+
+def open_text_writer(path, compression=None):
+    """以文字串流寫入檔案，可選 gzip/zstd 壓縮"""
+    if compression == 'gzip' or (compression == 'zstd' and zstandard is None):
+        return io.TextIOWrapper(gzip.open(path, 'wb', compresslevel=6), encoding='utf-8')
+    if compression == 'zstd':
+        raw = open(path, 'wb')
+        return io.TextIOWrapper(zstandard.ZstdCompressor(level=3).stream_writer(raw, closefd=True),
+                                encoding='utf-8')
+    return open(path, 'w', encoding='utf-8')
+
+
+def benchmark(data, repeat=5):
+    """比較各種格式與舊版 indent=2 JSON 的檔案大小與儲存時間"""
+
+    def measure(dump):
+        start = time.perf_counter()
+        for _ in range(repeat):
+            payload = dump()
+        return len(payload), (time.perf_counter() - start) * 1000 / repeat
+
+    base_bytes, base_ms = measure(
+        lambda: json.dumps(data, ensure_ascii=False, indent=2).encode('utf-8')
+    )
+    print(f"{'格式':<18}{'位元組':>12}{'毫秒':>10}{'省下位元組':>12}{'省下毫秒':>10}")
+    print(f"{'json indent=2':<18}{base_bytes:>12,}{base_ms:>10.1f}{0:>12,}{0:>10.1f}")
+
+    names = ['json', 'orjson', 'msgpack']
+    methods = [None, 'gzip'] + (['zstd'] if zstandard is not None else [])
+    results = []
+
+    for name in names:
+        if (name == 'orjson' and orjson is None) or (name == 'msgpack' and msgpack is None):
+            continue
+        serializer = get_serializer(name)
+        for method in methods:
+            size, ms = measure(lambda: compress(serializer.dumps(data), method))
+            label = name + (f"+{method}" if method else "")
+            results.append((label, size, ms))
+            print(f"{label:<18}{size:>12,}{ms:>10.1f}{base_bytes - size:>12,}{base_ms - ms:>10.1f}")
+
+    return {"baseline": (base_bytes, base_ms), "results": results}
+
+
+if __name__ == "__main__":
+    # 產生模擬用戶資料進行測試
+    users = {}
+    search_history = {}
+    favorites = {}
+    for i in range(20000):
+        user_id = f"U{i:032x}"
+        users[user_id] = {
+            "first_interaction": 1700000000 + i,
+            "last_interaction": 1760000000 + i,
+            "search_count": i % 50,
+            "favorite_count": i % 7,
+            "preferred_keywords": [{"keyword": "軟體工程師", "count": 3, "last_searched": 1760000000}],
+            "user_info": {}
+        }
+        search_history[user_id] = [
+            {"keyword": kw, "searched_at": 1760000000 + j}
+            for j, kw in enumerate(["軟體工程師", "產品經理", "python 台北"] * 5)
+        ]
+        favorites[user_id] = [{"job_id": f"zero_dep_{i:016x}", "added_at": 1760000000}]
+
+    benchmark({"schema_version": 2, "users": users, "favorites": favorites,
+               "search_history": search_history, "settings": {}})
@@ -0,0 +1,320 @@
+import json
+import os
+import socket
+import sqlite3
+import threading
+import urllib.parse
+
+# 重複執行會改變結果的 Redis 指令，送出後連線中斷時不能重試
+NON_IDEMPOTENT_COMMANDS = {'INCR', 'INCRBY', 'DECR', 'DECRBY', 'APPEND', 'LPUSH', 'RPUSH', 'HINCRBY'}
+
+
+class StorageError(Exception):
+    """儲存後端錯誤"""
+
+
+def _encode(value):
+    return json.dumps(value, ensure_ascii=False, separators=(',', ':'))
+
+
+def _decode(raw):
+    if raw is None:
+        return None
+    if isinstance(raw, bytes):
+        raw = raw.decode('utf-8')
+    return json.loads(raw)
+
+
+class StorageBackend:
+    """鍵值儲存後端介面，值皆為可 JSON 序列化的物件"""
+
+    def get(self, key, default=None):
+        raise NotImplementedError
+
+    def set(self, key, value):
+        raise NotImplementedError
+
+    def setnx(self, key, value):
+        """鍵不存在時才寫入，回傳是否寫入；多個行程同時寫入同一個鍵時只有一個成功"""
+        raise NotImplementedError
+
+    def delete(self, key):
+        raise NotImplementedError
+
+    def keys(self, prefix=''):
+        """列出指定前綴的所有鍵"""
+        raise NotImplementedError
+
+    def incr(self, key, amount=1):
+        """原子地增加整數計數器並回傳新值"""
+        raise NotImplementedError
+
+    def close(self):
+        pass
+
+
+class MemoryBackend(StorageBackend):
+    """記憶體儲存後端（單機、測試用）"""
+
+    def __init__(self):
+        self._store = {}
+        self._lock = threading.Lock()
+
+    def get(self, key, default=None):
+        with self._lock:
+            raw = self._store.get(key)
+        return default if raw is None else _decode(raw)
+
+    def set(self, key, value):
+        encoded = _encode(value)
+        with self._lock:
+            self._store[key] = encoded
+
+    def setnx(self, key, value):
+        encoded = _encode(value)
+        with self._lock:
+            if key in self._store:
+                return False
+            self._store[key] = encoded
+        return True
+
+    def delete(self, key):
+        with self._lock:
+            self._store.pop(key, None)
+
+    def keys(self, prefix=''):
+        with self._lock:
+            return [key for key in self._store if key.startswith(prefix)]
+
+    def incr(self, key, amount=1):
+        with self._lock:
+            value = _decode(self._store.get(key)) or 0
+            value += amount
+            self._store[key] = _encode(value)
+        return value
+
+
+class SQLiteBackend(StorageBackend):
+    """SQLite 儲存後端"""
+
+    def __init__(self, path='storage.db'):
+        self.path = path
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("CREATE TABLE IF NOT EXISTS kv (key TEXT PRIMARY KEY, value TEXT NOT NULL)")
+        self._conn.commit()
+
+    def get(self, key, default=None):
+        with self._lock:
+            row = self._conn.execute("SELECT value FROM kv WHERE key = ?", (key,)).fetchone()
+        return default if row is None else _decode(row[0])
+
+    def set(self, key, value):
+        encoded = _encode(value)
+        with self._lock:
+            self._conn.execute(
+                "INSERT INTO kv (key, value) VALUES (?, ?) "
+                "ON CONFLICT(key) DO UPDATE SET value = excluded.value",
+                (key, encoded)
+            )
+            self._conn.commit()
+
+    def setnx(self, key, value):
+        encoded = _encode(value)
+        with self._lock:
+            cursor = self._conn.execute("INSERT OR IGNORE INTO kv (key, value) VALUES (?, ?)", (key, encoded))
+            self._conn.commit()
+        return cursor.rowcount == 1
+
+    def delete(self, key):
+        with self._lock:
+            self._conn.execute("DELETE FROM kv WHERE key = ?", (key,))
+            self._conn.commit()
+
+    def keys(self, prefix=''):
+        with self._lock:
+            if not prefix:
+                rows = self._conn.execute("SELECT key FROM kv").fetchall()
+            else:
+                # 以範圍查詢取代 LIKE，才能使用主鍵索引
+                rows = self._conn.execute(
+                    "SELECT key FROM kv WHERE key >= ? AND key < ?",
+                    (prefix, prefix + '\U0010ffff')
+                ).fetchall()
+        return [row[0] for row in rows]
+
+    def incr(self, key, amount=1):
+        with self._lock:
+            # 先取得寫入鎖再讀取，多個行程共用同一個資料庫檔案時也不會讀到相同的舊值
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                row = self._conn.execute("SELECT value FROM kv WHERE key = ?", (key,)).fetchone()
+                value = (_decode(row[0]) if row else 0) + amount
+                self._conn.execute(
+                    "INSERT INTO kv (key, value) VALUES (?, ?) "
+                    "ON CONFLICT(key) DO UPDATE SET value = excluded.value",
+                    (key, _encode(value))
+                )
+                self._conn.commit()
+            except Exception:
+                self._conn.rollback()
+                raise
+        return value
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+
+class RedisBackend(StorageBackend):
+    """Redis 協定（RESP）儲存後端，不依賴 redis 套件"""
+
+    def __init__(self, host='localhost', port=6379, db=0, password=None, timeout=5):
+        self.host = host
+        self.port = port
+        self.db = db
+        self.password = password
+        self.timeout = timeout
+        self._lock = threading.Lock()
+        self._sock = None
+        self._reader = None
+
+    def _connect(self):
+        self._sock = socket.create_connection((self.host, self.port), timeout=self.timeout)
+        self._reader = self._sock.makefile('rb')
+        if self.password:
+            self._call('AUTH', self.password)
+        if self.db:
+            self._call('SELECT', self.db)
+
+    def _disconnect(self):
+        try:
+            if self._reader:
+                self._reader.close()
+            if self._sock:
+                self._sock.close()
+        finally:
+            self._sock = None
+            self._reader = None
+
+    def _send(self, *args):
+        parts = [b'*%d\r\n' % len(args)]
+        for arg in args:
+            if not isinstance(arg, bytes):
+                arg = str(arg).encode('utf-8')
+            parts.append(b'$%d\r\n%s\r\n' % (len(arg), arg))
+        self._sock.sendall(b''.join(parts))
+
+    def _call(self, *args):
+        self._send(*args)
+        return self._read_reply()
+
+    def _read_reply(self):
+        line = self._reader.readline()
+        if not line:
+            raise ConnectionError("Redis 連線已中斷")
+
+        prefix, payload = line[:1], line[1:-2]
+        if prefix == b'+':
+            return payload.decode('utf-8')
+        if prefix == b'-':
+            raise StorageError(payload.decode('utf-8'))
+        if prefix == b':':
+            return int(payload)
+        if prefix == b'$':
+            length = int(payload)
+            if length == -1:
+                return None
+            data = self._reader.read(length + 2)
+            return data[:-2]
+        if prefix == b'*':
+            length = int(payload)
+            if length == -1:
+                return None
+            return [self._read_reply() for _ in range(length)]
+
+        raise StorageError(f"無法解析的 Redis 回應：{line!r}")
+
+    def execute(self, *args):
+        """執行 Redis 指令，連線中斷時重連一次
+
+        指令送出後才中斷時，伺服器可能已執行該指令，只有重複執行結果不變的指令才重試。
+        """
+        retryable = str(args[0]).upper() not in NON_IDEMPOTENT_COMMANDS
+        with self._lock:
+            for attempt in range(2):
+                sent = False
+                try:
+                    if self._sock is None:
+                        self._connect()
+                    self._send(*args)
+                    sent = True
+                    return self._read_reply()
+                except OSError as e:
+                    self._disconnect()
+                    if attempt == 1 or (sent and not retryable):
+                        raise StorageError(f"Redis 連線失敗：{e}")
+
+    def get(self, key, default=None):
+        raw = self.execute('GET', key)
+        return default if raw is None else _decode(raw)
+
+    def set(self, key, value):
+        self.execute('SET', key, _encode(value))
+
+    def setnx(self, key, value):
+        # 送出後斷線重試時，第一次已寫入會使重試回傳失敗，呼叫端需讀回現值確認
+        return self.execute('SET', key, _encode(value), 'NX') is not None
+
+    def delete(self, key):
+        self.execute('DEL', key)
+
+    def keys(self, prefix=''):
+        # 跳脫 glob 特殊字元，避免前綴被當成樣式
+        pattern = ''.join('\\' + ch if ch in '*?[]\\' else ch for ch in prefix) + '*'
+        found = []
+        cursor = '0'
+        while True:
+            cursor, batch = self.execute('SCAN', cursor, 'MATCH', pattern, 'COUNT', 1000)
+            cursor = cursor.decode('utf-8') if isinstance(cursor, bytes) else str(cursor)
+            found.extend(key.decode('utf-8') for key in batch)
+            if cursor == '0':
+                break
+        return found
+
+    def incr(self, key, amount=1):
+        return self.execute('INCRBY', key, amount)
+
+    def close(self):
+        with self._lock:
+            self._disconnect()
+
+
+def create_backend(url):
+    """根據 URL 建立儲存後端，例如 memory://、sqlite:///data.db、redis://host:6379/0"""
+    parsed = urllib.parse.urlparse(url)
+
+    if parsed.scheme == 'memory':
+        return MemoryBackend()
+
+    if parsed.scheme == 'sqlite':
+        path = parsed.path[1:] if parsed.path.startswith('/') else parsed.path
+        return SQLiteBackend(path or 'storage.db')
+
+    if parsed.scheme == 'redis':
+        db = int(parsed.path.lstrip('/') or 0)
+        return RedisBackend(
+            host=parsed.hostname or 'localhost',
+            port=parsed.port or 6379,
+            db=db,
+            password=parsed.password
+        )
+
+    raise ValueError(f"不支援的儲存後端：{url}")
+
+
+def backend_from_env():
+    """從環境變數 STORAGE_BACKEND_URL 建立儲存後端，未設定時回傳 None"""
+    url = os.getenv('STORAGE_BACKEND_URL')
+    return create_backend(url) if url else None
@@ -0,0 +1,21 @@
+import threading
+
+# 預設分段數，同時處理的不同用戶數量上限
+DEFAULT_STRIPES = 64
+
+
+class StripedLock:
+    """依鍵值雜湊分段的鎖：相同的鍵必定取得同一把鎖，不同的鍵大多可平行執行"""
+
+    def __init__(self, stripes=DEFAULT_STRIPES):
+        if stripes < 1:
+            raise ValueError("分段數至少為 1")
+        # 使用 RLock，同一執行緒在持有鎖時可再次進入同一用戶的操作
+        self._locks = [threading.RLock() for _ in range(stripes)]
+
+    def __len__(self):
+        return len(self._locks)
+
+    def lock_for(self, key):
+        """取得指定鍵對應的鎖"""
+        return self._locks[hash(key) % len(self._locks)]
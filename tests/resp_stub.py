@@ -0,0 +1,100 @@
+import fnmatch
+import socketserver
+import threading
+
+
+class RESPStub:
+    """在同一個行程內執行的 Redis 協定替身，只實作 RedisBackend 用到的指令
+
+    drop_next 設為指令名稱（如 "INCRBY"）時，下一次收到該指令會先執行再直接斷線、不回覆，
+    模擬指令已送達但回覆遺失的情況。
+    """
+
+    def __init__(self):
+        self.store = {}
+        self.commands = []
+        self.drop_next = None
+        self._lock = threading.Lock()
+
+        stub = self
+
+        class Handler(socketserver.StreamRequestHandler):
+            def handle(self):
+                while True:
+                    args = self._read_command()
+                    if args is None:
+                        return
+                    reply = stub.execute(args)
+                    if reply is None:
+                        return
+                    self.wfile.write(reply)
+
+            def _read_command(self):
+                line = self.rfile.readline()
+                if not line:
+                    return None
+                args = []
+                for _ in range(int(line[1:-2])):
+                    length = int(self.rfile.readline()[1:-2])
+                    args.append(self.rfile.read(length + 2)[:-2])
+                return args
+
+        self._server = socketserver.ThreadingTCPServer(('127.0.0.1', 0), Handler)
+        self._server.daemon_threads = True
+        self.port = self._server.server_address[1]
+        threading.Thread(target=self._server.serve_forever, args=(0.05,), daemon=True).start()
+
+    def close(self):
+        self._server.shutdown()
+        self._server.server_close()
+
+    def execute(self, args):
+        """執行指令並回傳 RESP 回覆；需模擬斷線時回傳 None"""
+        command = args[0].decode().upper()
+        with self._lock:
+            self.commands.append(command)
+            reply = self._execute(command, args[1:])
+            if self.drop_next == command:
+                self.drop_next = None
+                return None
+        return reply
+
+    def _execute(self, command, args):
+        store = self.store
+        if command in ('AUTH', 'SELECT', 'PING'):
+            return b'+OK\r\n'
+        if command == 'GET':
+            value = store.get(args[0])
+            return b'$-1\r\n' if value is None else _bulk(value)
+        if command == 'SET':
+            if b'NX' in [arg.upper() for arg in args[2:]] and args[0] in store:
+                return b'$-1\r\n'
+            store[args[0]] = args[1]
+            return b'+OK\r\n'
+        if command == 'DEL':
+            return b':%d\r\n' % (store.pop(args[0], None) is not None)
+        if command == 'INCRBY':
+            value = int(store.get(args[0], b'0')) + int(args[1])
+            store[args[0]] = str(value).encode()
+            return b':%d\r\n' % value
+        if command == 'SCAN':
+            pattern = args[args.index(b'MATCH') + 1].decode()
+            keys = [key for key in store if fnmatch.fnmatchcase(key.decode(), _unescape(pattern))]
+            return b'*2\r\n' + _bulk(b'0') + b'*%d\r\n' % len(keys) + b''.join(_bulk(key) for key in keys)
+        return b'-ERR unknown command\r\n'
+
+
+def _bulk(value):
+    return b'$%d\r\n%s\r\n' % (len(value), value)
+
+
+def _unescape(pattern):
+    """Redis 樣式的反斜線跳脫轉為 fnmatch 的 [字元] 寫法"""
+    result = []
+    chars = iter(pattern)
+    for char in chars:
+        if char == '\\':
+            result.append('[' + next(chars, '\\') + ']')
+        else:
+            result.append(char)
+    return ''.join(result)
@@ -0,0 +1,58 @@
+import random
+
+import pytest
+
+import batch_scoring
+from batch_scoring import BatchScorer
+from search_index import JobIndex
+
+TITLES = ["Python 後端工程師", "Java 工程師", "前端 React 工程師", "資料分析師 Python SQL", "Golang 後端", "PM 專案經理"]
+CITIES = ["台北市", "新竹市", "台中市"]
+
+
+@pytest.fixture
+def index():
+    rng = random.Random(7)
+    index = JobIndex()
+    for i in range(300):
+        index.add({
+            "id": f"job-{i}",
+            "title": rng.choice(TITLES),
+            "company": f"公司{i % 11}",
+            "location": rng.choice(CITIES),
+            "salary": f"月薪 {rng.randrange(30, 100)},000 元"
+        })
+    for i in range(0, 300, 13):
+        index.remove(f"job-{i}")
+    return index
+
+
+def make_queries():
+    return [
+        {"terms": ["python"]},
+        {"terms": ["python", "sql"], "salary_range": {"min": 50000, "max": None}},
+        {"terms": ["工程"], "facets": {"city": "新竹"}},
+        {"terms": ["java", "react", "golang"], "salary_range": {"min": 0, "max": 60000}, "facets": {"city": ["台北", "台中"]}},
+        {"terms": ["不存在的詞"]},
+        {"terms": []},
+    ]
+
+
+def test_batch_scores_match_inverted_index(index):
+    pytest.importorskip("numpy")
+    scorer = BatchScorer(index, batch_size=4)
+    queries = make_queries()
+
+    batched = scorer.score_many(queries, k=15)
+    expected = [scorer._score_one(query, 15) for query in queries]
+    assert [[doc for _, doc in result] for result in batched] == [[doc for _, doc in result] for result in expected]
+    for result, reference in zip(batched, expected):
+        assert [score for score, _ in result] == pytest.approx([score for score, _ in reference])
+    assert batched[4] == batched[5] == []
+
+
+def test_batch_scorer_without_numpy(index, monkeypatch):
+    monkeypatch.setattr(batch_scoring, "np", None)
+    results = BatchScorer(index).score_many(make_queries(), k=5)
+    assert [len(result) for result in results][4:] == [0, 0]
+    assert all(len(result) == 5 for result in results[:4])
@@ -0,0 +1,124 @@
+import random
+
+import pytest
+
+from advanced_search import AdvancedJobSearch
+from boolean_query import _city, difference, intersect, is_boolean_query, match_docs, parse_query, union
+from job_facets import job_city
+from search_index import INDEXED_FIELDS, JobIndex
+
+WORDS = ["python", "java", "golang", "react", "sql", "docker", "派遣", "前端", "資料"]
+COMPANIES = ["alpha", "beta", "gamma"]
+LOCATIONS = ["台北市信義區", "新竹市", "台中市", "遠端"]
+
+
+def make_jobs(count, seed=3):
+    rng = random.Random(seed)
+    return [
+        {"id": f"job-{i}", "title": " ".join(rng.sample(WORDS, 2)), "company": rng.choice(COMPANIES),
+         "description": " ".join(rng.sample(WORDS, 2)), "location": rng.choice(LOCATIONS)}
+        for i in range(count)
+    ]
+
+
+def brute_force(node, index, counts=None):
+    """以集合與逐份文件重新分詞的結果計算相符文件，作為倒排清單運算的對照"""
+    if counts is None:
+        counts = {doc: index._field_counts(index.job(doc)) for doc in index.live_docs()}
+    kind = node[0]
+    if kind == "term":
+        field, text = node[1], node[2].lower()
+        if field == "city" or field is None and _city(text):
+            return {doc for doc in counts if job_city(index.job(doc)) == _city(text)}
+        fields = range(len(INDEXED_FIELDS)) if field is None else [INDEXED_FIELDS.index(field)]
+        return {doc for doc, counters in counts.items() if any(text in counters[i] for i in fields)}
+    if kind == "not":
+        return set(counts) - brute_force(node[1], index, counts)
+    sets = [brute_force(child, index, counts) for child in node[1]]
+    return set.union(*sets) if kind == "or" else set.intersection(*sets)
+
+
+def random_query(rng, depth=0):
+    """隨機產生布林查詢字串，子查詢一律加上括號"""
+    roll = rng.random()
+    if depth >= 3 or roll < 0.35:
+        word = rng.choice(WORDS + ["台北", "city:新竹", "遠端"])
+        if rng.random() < 0.15:
+            word = rng.choice(["title:", "company:"]) + rng.choice(WORDS + COMPANIES)
+        return word
+    if roll < 0.5:
+        return rng.choice(["-", "NOT "]) + random_query(rng, depth + 1)
+    children = [random_query(rng, depth + 1) for _ in range(rng.randint(2, 3))]
+    separator = rng.choice([" | ", " OR "]) if roll < 0.75 else rng.choice([" ", " AND "])
+    return "(" + separator.join(children) + ")"
+
+
+@pytest.fixture(scope="module")
+def index():
+    index = JobIndex(make_jobs(400))
+    for i in range(0, 400, 9):
+        index.remove(f"job-{i}")
+    return index
+
+
+def test_set_operations():
+    rng = random.Random(1)
+    for _ in range(200):
+        a = sorted(rng.sample(range(500), rng.randint(0, 80)))
+        b = sorted(rng.sample(range(500), rng.randint(0, 300)))
+        assert intersect(a, b) == sorted(set(a) & set(b))
+        assert difference(a, b) == sorted(set(a) - set(b))
+        assert union([a, b, []]) == sorted(set(a) | set(b))
+
+
+def test_matches_brute_force(index):
+    rng = random.Random(5)
+    counts = {doc: index._field_counts(index.job(doc)) for doc in index.live_docs()}
+    for _ in range(300):
+        query = random_query(rng)
+        node = parse_query(query)
+        docs, _ = match_docs(node, index)
+        assert docs == sorted(brute_force(node, index, counts)), query
+
+
+@pytest.mark.parametrize("query, expected", [
+    ("-外包|派遣", ("not", ("or", [("term", None, "外包"), ("term", None, "派遣")]))),
+    ("NOT 外包|派遣", ("not", ("or", [("term", None, "外包"), ("term", None, "派遣")]))),
+    ("python -java", ("and", [("term", None, "python"), ("not", ("term", None, "java"))])),
+    ("-(java python) go", ("and", [("not", ("and", [("term", None, "java"), ("term", None, "python")])),
+                                   ("term", None, "go")])),
+    ("node-js", ("term", None, "node-js")),
+])
+def test_leading_minus_binds_like_not(query, expected):
+    assert parse_query(query) == expected
+
+
+def test_bare_minus_is_not_boolean():
+    assert not is_boolean_query("40k - 60k")
+    assert not is_boolean_query("python - java")
+    assert not is_boolean_query("node-js")
+    assert is_boolean_query("python -java")
+    assert is_boolean_query("-(外包 派遣)")
+
+
+def test_excluded_terms_are_not_fuzzy_resolved(index):
+    # 拼錯的詞用於比對時以相近的詞代替，用於排除時只比對原詞
+    included, terms = match_docs(parse_query("pythn"), index)
+    assert included == index.postings("python") and terms == ["python"]
+
+    everything, _ = match_docs(parse_query("-pythn"), index)
+    assert everything == list(index.live_docs())
+    assert match_docs(parse_query("sql -pythn"), index)[0] == index.postings("sql")
+
+
+def test_search_catalog_uses_resident_index():
+    search = AdvancedJobSearch()
+    jobs = make_jobs(600, seed=11)
+    search.index_jobs(jobs)
+
+    node = parse_query("(python|java) -docker")
+    expected = brute_force(node, search.index)
+    assert len(expected) > 250
+    # 沒有職缺目錄也能查詢，且結果不受目錄標籤查詢的筆數限制
+    results = search.search_catalog("(python|java) -docker", limit=1000)
+    assert sorted(job["id"] for job in results) == sorted(search.index.job(doc)["id"] for doc in expected)
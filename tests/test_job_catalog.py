@@ -0,0 +1,38 @@
+import json
+
+from job_catalog import JobCatalog
+
+
+def write_legacy_jobs(path, job_ids):
+    path.write_text(json.dumps({"jobs": [{"id": job_id, "title": "工程師"} for job_id in job_ids]}))
+
+
+def test_legacy_jobs_are_imported_once(tmp_path):
+    jobs_file = tmp_path / "jobs.json"
+    write_legacy_jobs(jobs_file, ["a", "b"])
+    db_file = str(tmp_path / "catalog.db")
+
+    catalog = JobCatalog(db_file)
+    assert catalog.import_legacy_jobs(str(jobs_file)) == 2
+
+    # 職缺全部過期並清除後，重新啟動不會再從 jobs.json 匯入
+    catalog._conn.execute("UPDATE jobs SET expires_at = 0")
+    catalog._conn.commit()
+    assert catalog.compact() == 2
+    catalog.close()
+
+    catalog = JobCatalog(db_file)
+    assert catalog.import_legacy_jobs(str(jobs_file)) == 0
+    assert catalog.count() == 0
+    catalog.close()
+
+
+def test_existing_catalog_is_marked_without_import(tmp_path):
+    jobs_file = tmp_path / "jobs.json"
+    write_legacy_jobs(jobs_file, ["a", "b"])
+
+    catalog = JobCatalog(str(tmp_path / "catalog.db"))
+    catalog.upsert({"id": "c", "title": "設計師"}, ttl=-1)
+    assert catalog.import_legacy_jobs(str(jobs_file)) == 0
+    assert catalog.get("a", include_expired=True) is None
+    catalog.close()
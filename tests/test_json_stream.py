@@ -0,0 +1,92 @@
+import io
+import json
+import random
+
+import pytest
+
+from json_stream import JSONStreamError, JSONStreamReader
+
+STRINGS = ['', 'python', '後端工程師', 'a"b', 'back\\slash', '\\"', 'line\nbreak', 'tab\t', ' ', '😀', '{[]}', ',:']
+NUMBERS = [0, -1, 7, 123456789, -0.5, 3.25, 1e-07, -2.5e+20, 12345.678]
+
+
+def random_value(rng, depth=0):
+    roll = rng.random()
+    if depth >= 3 or roll < 0.4:
+        return rng.choice(STRINGS + NUMBERS + [True, False, None])
+    if roll < 0.7:
+        return [random_value(rng, depth + 1) for _ in range(rng.randint(0, 4))]
+    return {rng.choice(STRINGS) + str(i): random_value(rng, depth + 1) for i in range(rng.randint(0, 4))}
+
+
+def random_document(rng):
+    return {f"key{i}": random_value(rng) for i in range(rng.randint(1, 6))}
+
+
+def dumps(doc, rng):
+    return json.dumps(doc, ensure_ascii=rng.random() < 0.5, indent=rng.choice([None, 1]),
+                      separators=None if rng.random() < 0.5 else (',', ':'))
+
+
+def read_like(reader, expected, rng):
+    """依預期的結構讀取：物件以 iter_object 逐鍵讀取，其他值隨機以 read_value、read_value_text 或略過"""
+    if isinstance(expected, dict):
+        result = {}
+        for key in reader.iter_object():
+            value = read_like(reader, expected[key], rng)
+            if value is not _SKIPPED:
+                result[key] = value
+        return result
+
+    mode = rng.random()
+    if mode < 0.4:
+        return reader.read_value()
+    if mode < 0.7:
+        return json.loads(reader.read_value_text())
+    if mode < 0.85:
+        reader.skip_value()
+    # 其餘情況不讀取，由 iter_object 自動略過
+    return _SKIPPED
+
+
+_SKIPPED = object()
+
+
+def drop_skipped(expected, actual):
+    """預期結果中只保留實際讀到的鍵"""
+    if isinstance(expected, dict) and isinstance(actual, dict):
+        return {key: drop_skipped(expected[key], value) for key, value in actual.items()}
+    return expected
+
+
+@pytest.mark.parametrize("chunk_size", [1, 2, 3, 5, 7, 64])
+def test_stream_matches_json_loads(chunk_size):
+    rng = random.Random(chunk_size)
+    for _ in range(150):
+        text = dumps(random_document(rng), rng)
+        expected = json.loads(text)
+
+        reader = JSONStreamReader(io.StringIO(text), chunk_size=chunk_size)
+        actual = read_like(reader, expected, rng)
+        assert actual == drop_skipped(expected, actual), text
+
+
+@pytest.mark.parametrize("chunk_size", [1, 2, 4])
+def test_values_split_at_buffer_edges(chunk_size):
+    text = '{"a": -12.5e+3, "b": "x\\\\\\"y\\u4e2d", "c": 100000, "d": [1, "\\\\"], "e": true}'
+    reader = JSONStreamReader(io.StringIO(text), chunk_size=chunk_size)
+    values = {}
+    for key in reader.iter_object():
+        if key in ("a", "c"):
+            values[key] = reader.read_value()
+        elif key == "b":
+            values[key] = json.loads(reader.read_value_text())
+    assert values == {"a": -12500.0, "b": 'x\\"y中', "c": 100000}
+
+
+@pytest.mark.parametrize("text", ['{"a": [1, 2', '{"a": "abc', '{"a" 1}', '{"a": 1 "b": 2}', '{1: 2}', '{"a": tru}'])
+def test_malformed_documents_raise(text):
+    reader = JSONStreamReader(io.StringIO(text), chunk_size=2)
+    with pytest.raises(JSONStreamError):
+        for _ in reader.iter_object():
+            reader.skip_value()
@@ -0,0 +1,74 @@
+import pytest
+
+import result_pages
+from result_pages import ResultPages, page_postback_data, parse_page_postback
+
+
+class Clock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def time(self):
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = Clock()
+    monkeypatch.setattr(result_pages.time, "time", clock.time)
+    return clock
+
+
+def test_pages_through_results(clock):
+    pages = ResultPages()
+    cursor = pages.create(range(20), "python", "u1")
+
+    first = pages.page(cursor, 0, 8, "u1")
+    assert first["jobs"] == list(range(8)) and first["next_offset"] == 8
+    assert first["keyword"] == "python" and first["total"] == 20
+    last = pages.page(cursor, 16, 8, "u1")
+    assert last["jobs"] == [16, 17, 18, 19] and last["next_offset"] is None
+    assert pages.page(cursor, -5, 8, "u1")["offset"] == 0
+
+
+def test_only_owner_can_read_page(clock):
+    pages = ResultPages()
+    cursor = pages.create([1, 2, 3], "go", "u1")
+
+    assert pages.page(cursor, 0, 8, "u2") is None
+    assert pages.page(cursor, 0, 8, "u1")["jobs"] == [1, 2, 3]
+    # 沒有記錄擁有者的結果任何人都可讀取
+    shared = pages.create([4], "go")
+    assert pages.page(shared, 0, 8, "u2")["jobs"] == [4]
+    assert pages.page("missing", 0, 8, "u1") is None
+
+
+def test_pages_expire_and_are_evicted(clock):
+    pages = ResultPages(ttl=60)
+    old = pages.create([1], "a", "u1")
+    clock.now += 30
+    newer = pages.create([2], "b", "u1")
+
+    clock.now += 30
+    assert pages.page(old, 0, 8, "u1") is None
+    assert pages.page(newer, 0, 8, "u1")["jobs"] == [2]
+
+    # 新增結果時清除已到期的舊結果
+    pages.create([3], "c", "u1")
+    assert len(pages) == 2
+    clock.now += 31
+    assert pages.page(newer, 0, 8, "u1") is None
+
+
+def test_oldest_results_evicted_over_capacity(clock):
+    pages = ResultPages(max_sessions=3)
+    cursors = [pages.create([i], str(i), "u1") for i in range(5)]
+
+    assert len(pages) == 3
+    assert [pages.page(cursor, 0, 8, "u1") is None for cursor in cursors] == [True, True, False, False, False]
+
+
+def test_postback_round_trip():
+    assert parse_page_postback(page_postback_data("abc_-12", 16)) == ("abc_-12", 16)
+    for data in [None, "", "page:", "page:abc", "page:abc:x", "page::8", "other:abc:8"]:
+        assert parse_page_postback(data) is None
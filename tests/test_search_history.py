@@ -0,0 +1,55 @@
+import random
+
+from search_history import KeywordTable, SearchHistoryRing, history_from_records
+
+
+def filled_ring(count, capacity=5):
+    ring = SearchHistoryRing(capacity=capacity)
+    for i in range(count):
+        ring.append(i, 100 + i)
+    return ring
+
+
+def test_ring_keeps_newest_entries_after_wraparound():
+    ring = filled_ring(12)
+    assert ring.record["head"] == 2
+    assert ring.entries() == [(i, 100 + i) for i in range(7, 12)]
+
+
+def test_drop_before_after_wraparound():
+    for count in range(0, 13):
+        for cutoff in range(95, 115):
+            ring = filled_ring(count)
+            expected = [entry for entry in ring.entries() if entry[1] > cutoff]
+            dropped = len(ring) - len(expected)
+
+            assert ring.drop_before(cutoff) == dropped, (count, cutoff)
+            assert ring.entries() == expected
+
+            # 清理後繼續寫入，仍維持由舊到新的順序與容量上限
+            ring.append(99, 200)
+            assert ring.entries() == (expected + [(99, 200)])[-5:]
+
+
+def test_drop_before_random_histories():
+    rng = random.Random(2)
+    for _ in range(200):
+        ring = SearchHistoryRing(capacity=rng.randint(1, 8))
+        ts = 0
+        for _ in range(rng.randint(0, 20)):
+            ts += rng.randint(0, 3)
+            ring.append(rng.randint(0, 9), ts)
+        cutoff = rng.randint(-1, ts + 1)
+        expected = [entry for entry in ring.entries() if entry[1] > cutoff]
+        ring.drop_before(cutoff)
+        assert ring.entries() == expected
+
+
+def test_history_from_records_only_interns_kept_searches():
+    table = KeywordTable()
+    records = [{"keyword": "舊關鍵字", "searched_at": 1}] + \
+              [{"keyword": f"kw{i % 3}", "searched_at": 10 + i} for i in range(5)]
+    ring = SearchHistoryRing(history_from_records(records, table, capacity=5))
+
+    assert [table.lookup(keyword_id) for keyword_id, _ in ring.entries()] == [f"kw{i % 3}" for i in range(5)]
+    assert "舊關鍵字" not in table.keywords
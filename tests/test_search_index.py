@@ -0,0 +1,144 @@
+import threading
+
+from advanced_search import AdvancedJobSearch
+from job_facets import SalaryIndex
+from search_index import JobIndex
+
+SALARIES = ["月薪 40,000~60,000 元", "月薪 70,000 元以上", "年薪 1,200,000 元", "待遇面議", "月薪 35,000~45,000 元", "時薪 200 元"]
+
+
+def make_jobs(count):
+    return [
+        {"id": f"job-{i}", "title": f"Python工程師 {i}", "company": f"公司{i % 5}", "location": "台北市",
+         "salary": SALARIES[i % len(SALARIES)]}
+        for i in range(count)
+    ]
+
+
+def test_bulk_salary_index_matches_incremental():
+    jobs = make_jobs(60)
+    incremental = SalaryIndex()
+    for doc, job in enumerate(jobs):
+        incremental.add(doc, job)
+    bulk = SalaryIndex()
+    bulk.add_many(enumerate(jobs[:30]))
+    bulk.add_many(enumerate(jobs[30:], 30))
+
+    assert len(bulk) == len(incremental)
+    for low, high in [(None, None), (50000, None), (None, 45000), (60000, 80000), (200000, None)]:
+        assert bulk.overlapping(low, high) == incremental.overlapping(low, high)
+
+    bulk.remove(1)
+    incremental.remove(1)
+    assert bulk.overlapping(60000, None) == incremental.overlapping(60000, None)
+
+
+def test_add_many_skips_replaced_jobs_in_salary_index():
+    index = JobIndex()
+    first, second = make_jobs(2)
+    index.add_many([first, second, dict(first, salary="月薪 30,000 元")])
+
+    docs = index.salary_docs({"min": 0, "max": 32000})
+    assert [index.job(doc)["id"] for doc in docs] == ["job-0"]
+    assert len(index.salary) == 2
+    merged = index.merged()
+    assert [merged.job(doc)["id"] for doc in merged.salary_docs({"min": 0, "max": 32000})] == ["job-0"]
+
+
+def test_salary_range_filters_keyword_results():
+    search = AdvancedJobSearch()
+    jobs = make_jobs(12)
+    conditions = search.parse_search_query("Python 月薪5萬以上")
+    assert conditions["salary_range"] and conditions["main_keywords"] + conditions["skills"]
+
+    expected = {job["id"] for job in jobs if job["salary"] in (SALARIES[0], SALARIES[1], SALARIES[2])}
+    assert {job["id"] for job in search.filter_jobs(jobs, conditions)} == expected
+    assert {job["id"] for job in search.top_jobs(jobs, conditions, k=20)} == expected
+
+    counts = dict(search.facet_counts(jobs, conditions, ["city"])["city"])
+    assert sum(counts.values()) == len(expected)
+
+
+class PausingJobs(list):
+    """索引建好後第一次取長度時暫停，讓另一個查詢在中間執行"""
+
+    def __init__(self, jobs):
+        super().__init__(jobs)
+        self.built = False
+        self.paused, self.resume = threading.Event(), threading.Event()
+
+    def __len__(self):
+        if self.built and not self.paused.is_set():
+            self.paused.set()
+            self.resume.wait(5)
+        return super().__len__()
+
+
+def test_concurrent_list_queries_use_their_own_index():
+    search = AdvancedJobSearch()
+    jobs_a = PausingJobs(dict(job, id="A") for job in make_jobs(1))
+    jobs_b = [dict(job, id="B") for job in make_jobs(1)]
+    conditions = search.parse_search_query("Python")
+
+    new_index = search._new_index
+
+    def build(jobs=None):
+        index = new_index(jobs)
+        if jobs is jobs_a:
+            jobs_a.built = True
+        return index
+
+    search._new_index = build
+    results = {}
+
+    def run(name, jobs):
+        results[name] = {job["id"] for job in search.filter_jobs(jobs, conditions)}
+
+    # A 建好索引後暫停，B 在中間完成查詢並更新快取
+    thread = threading.Thread(target=run, args=("A", jobs_a))
+    thread.start()
+    assert jobs_a.paused.wait(5)
+    run("B", jobs_b)
+    jobs_a.resume.set()
+    thread.join()
+
+    assert results == {"A": {"A"}, "B": {"B"}}
+
+
+def test_short_terms_are_not_fuzzy_resolved():
+    search = AdvancedJobSearch()
+    jobs = [
+        {"id": "1", "title": "後端工程師", "company": "甲公司", "location": "台北市"},
+        {"id": "2", "title": "商品企劃", "company": "乙公司", "location": "台北市"},
+        {"id": "3", "title": "Python 工程師", "company": "丙公司", "location": "台北市"},
+    ]
+    index = search._index_for(jobs)
+
+    # 兩字以內只做完全比對，也不會換成單一字元的索引詞
+    assert index.resolve_terms(["前端"]) == ["前端"]
+    assert index.resolve_terms(["產品"]) == ["產品"]
+    assert search.filter_jobs(jobs, search.parse_search_query("前端")) == []
+    assert search.filter_jobs(jobs, search.parse_search_query("產品")) == []
+
+    # 較長的拼錯詞仍以最接近的索引詞代替，但已有詞直接比對到職缺時不做模糊比對
+    assert index.resolve_terms(["pythn"]) == ["python"]
+    assert index.resolve_terms(["python", "pythn"]) == ["python", "pythn"]
+    assert [job["id"] for job in search.filter_jobs(jobs, search.parse_search_query("pythn"))] == ["3"]
+
+
+def test_facet_mask_matches_bitmap():
+    search = AdvancedJobSearch()
+    jobs = make_jobs(30)
+    for i, job in enumerate(jobs):
+        job["location"] = ["台北市", "新竹市", "遠端"][i % 3]
+    index = search._index_for(jobs)
+
+    facets = {"city": ["新竹", "遠端"]}
+    bitmap = index.facets.select(facets)
+    mask = index.facets.mask(facets, 30)
+    assert [doc for doc in range(30) if mask[doc >> 3] >> (doc & 7) & 1] == [doc for doc in range(30) if bitmap >> doc & 1]
+    assert index.facets.select({}) == (1 << 30) - 1
+
+    results = search.boolean_search(jobs, "Python -新竹", facets=facets)
+    assert {job["location"] for job in results} == {"遠端"}
+    assert len(results) == 10
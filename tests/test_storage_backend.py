@@ -0,0 +1,104 @@
+import pytest
+
+from resp_stub import RESPStub
+from storage_backend import MemoryBackend, RedisBackend, SQLiteBackend, StorageError, create_backend
+
+
+@pytest.fixture
+def stub():
+    server = RESPStub()
+    yield server
+    server.close()
+
+
+@pytest.fixture(params=["memory", "sqlite", "redis"])
+def backend(request, tmp_path):
+    if request.param == "memory":
+        store = MemoryBackend()
+    elif request.param == "sqlite":
+        store = SQLiteBackend(str(tmp_path / "storage.db"))
+    else:
+        store = RedisBackend(port=request.getfixturevalue("stub").port)
+    yield store
+    store.close()
+
+
+def test_get_set_delete(backend):
+    assert backend.get("users:u1") is None
+    assert backend.get("users:u1", {}) == {}
+
+    backend.set("users:u1", {"name": "小明", "tags": ["python", 1]})
+    assert backend.get("users:u1") == {"name": "小明", "tags": ["python", 1]}
+
+    backend.set("users:u1", [1, 2])
+    assert backend.get("users:u1") == [1, 2]
+
+    backend.delete("users:u1")
+    backend.delete("users:missing")
+    assert backend.get("users:u1") is None
+
+
+def test_keys_by_prefix(backend):
+    for key in ["users:a", "users:b", "favorites:a", "users*:x"]:
+        backend.set(key, 1)
+
+    assert sorted(backend.keys("users:")) == ["users:a", "users:b"]
+    # glob 特殊字元只當作一般字元
+    assert backend.keys("users*") == ["users*:x"]
+    assert sorted(backend.keys()) == ["favorites:a", "users*:x", "users:a", "users:b"]
+
+
+def test_setnx(backend):
+    assert backend.setnx("keywords:id:python", 0)
+    assert not backend.setnx("keywords:id:python", 1)
+    assert backend.get("keywords:id:python") == 0
+
+
+def test_incr(backend):
+    assert backend.incr("meta:counter") == 1
+    assert backend.incr("meta:counter", 5) == 6
+    assert backend.get("meta:counter") == 6
+
+
+def test_create_backend(tmp_path):
+    assert isinstance(create_backend("memory://"), MemoryBackend)
+    assert isinstance(create_backend(f"sqlite:///{tmp_path}/data.db"), SQLiteBackend)
+
+    redis = create_backend("redis://:secret@example.com:6380/2")
+    assert (redis.host, redis.port, redis.db, redis.password) == ("example.com", 6380, 2, "secret")
+
+    with pytest.raises(ValueError):
+        create_backend("mongodb://localhost")
+
+
+def test_redis_retries_idempotent_command_after_disconnect(stub):
+    backend = RedisBackend(port=stub.port)
+    backend.set("users:u1", {"n": 1})
+
+    stub.drop_next = "GET"
+    assert backend.get("users:u1") == {"n": 1}
+    assert stub.commands.count("GET") == 2
+    backend.close()
+
+
+def test_redis_does_not_retry_incr_after_send(stub):
+    backend = RedisBackend(port=stub.port)
+    assert backend.incr("meta:counter") == 1
+
+    # 指令已執行但回覆遺失，重試會重複累加
+    stub.drop_next = "INCRBY"
+    with pytest.raises(StorageError):
+        backend.incr("meta:counter")
+    assert stub.commands.count("INCRBY") == 2
+    assert backend.get("meta:counter") == 2
+    backend.close()
+
+
+def test_redis_retries_incr_when_connection_fails_before_send(stub):
+    backend = RedisBackend(port=stub.port)
+    backend.set("meta:counter", 1)
+
+    # 連線已被關閉，傳送失敗時指令尚未送出，可以安全重連
+    backend._sock.close()
+    assert backend.incr("meta:counter") == 2
+    backend.close()
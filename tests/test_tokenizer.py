@@ -0,0 +1,34 @@
+import tokenizer
+from serializer import read_file
+
+
+class LockProbe(tuple):
+    """轉換為清單時記錄分詞快取的鎖是否可取得"""
+
+    lock_free = []
+
+    def __iter__(self):
+        acquired = tokenizer._token_cache_lock.acquire(blocking=False)
+        LockProbe.lock_free.append(acquired)
+        if acquired:
+            tokenizer._token_cache_lock.release()
+        return super().__iter__()
+
+
+def test_save_token_cache_converts_and_writes_outside_lock(tmp_path, monkeypatch):
+    tokenizer.initialize(background=False)
+    path = tmp_path / "tokens.json.gz"
+    monkeypatch.setattr(tokenizer, "TOKEN_CACHE_FILE", str(path))
+    monkeypatch.setattr(LockProbe, "lock_free", [])
+    monkeypatch.setitem(tokenizer._token_cache, "probe", LockProbe(("probe",)))
+    tokens = tokenizer.lcut("資深 python 後端工程師 token-cache-test")
+
+    # 轉換與寫檔期間其他執行緒仍可取得鎖、加入新的分詞結果
+    assert tokenizer.save_token_cache() > 0
+    assert LockProbe.lock_free == [True]
+    saved = read_file(str(path))["tokens"]
+    assert saved["probe"] == ["probe"]
+    assert tokens in saved.values()
+
+    # 沒有新結果時不再寫入
+    assert tokenizer.save_token_cache() == 0
@@ -0,0 +1,137 @@
+import functools
+import io
+import json
+
+import pytest
+
+import user_data_migration
+import user_manager
+from json_stream import JSONStreamReader
+from search_history import HISTORY_CAPACITY
+from user_data_migration import UserDataMigration
+from user_manager import SCHEMA_VERSION, UserManager, to_epoch
+
+
+def legacy_data():
+    """第 1 版格式：字串時間、偏好關鍵字存文字、搜尋歷史為清單，另有重複收藏與孤立資料"""
+    history = [{"keyword": f"關鍵字{i % 7}", "searched_at": f"2024-01-01 10:{i // 60:02d}:{i % 60:02d}"}
+               for i in range(HISTORY_CAPACITY + 12)]
+    return {
+        "users": {
+            "u1": {
+                "first_interaction": "2024-01-01 09:00:00",
+                "last_interaction": "2024-01-02 18:30:00",
+                "search_count": len(history),
+                "favorite_count": 3,
+                "preferred_keywords": [
+                    {"keyword": "python", "count": 5, "last_searched": "2024-01-02 18:00:00"},
+                    {"keyword": "後端", "count": 2, "last_searched": "2024-01-01 12:00:00"}
+                ],
+                "user_info": {"name": "小明 \"阿明\""}
+            },
+            "u2": {"first_interaction": "2024-01-03 08:00:00", "last_interaction": "2024-01-03 08:00:00"}
+        },
+        "favorites": {
+            "u1": [
+                {"job_id": "job-1", "added_at": "2024-01-02 10:00:00"},
+                {"job_id": "job-2", "added_at": "2024-01-02 11:00:00"},
+                {"job_id": "job-1", "added_at": "2024-01-02 12:00:00"}
+            ],
+            "ghost": [{"job_id": "job-9", "added_at": "2024-01-01 00:00:00"}]
+        },
+        "search_history": {
+            "u1": history,
+            "u2": [{"keyword": "python", "searched_at": "2024-01-03 08:00:00"}]
+        }
+    }
+
+
+@pytest.fixture(autouse=True, params=[None, 3])
+def chunk_size(request, monkeypatch):
+    """以預設與極小的緩衝區串流讀取，值與字串會被切在緩衝區邊界"""
+    if request.param is not None:
+        reader = functools.partial(JSONStreamReader, chunk_size=request.param)
+        monkeypatch.setattr(user_manager, "JSONStreamReader", reader)
+        monkeypatch.setattr(user_data_migration, "JSONStreamReader", reader)
+    return request.param
+
+
+@pytest.fixture
+def legacy_file(tmp_path):
+    path = tmp_path / "user_data.json"
+    path.write_text(json.dumps(legacy_data(), ensure_ascii=False, indent=2), encoding="utf-8")
+    return path
+
+
+def make_manager(tmp_path, path):
+    return UserManager(user_data_file=str(path), jobs_file=str(tmp_path / "jobs.json"),
+                       catalog_file=str(tmp_path / "catalog.db"), serializer="json")
+
+
+def exported(manager):
+    output = io.StringIO()
+    count = manager.export_all_users(output)
+    records = {}
+    for line in output.getvalue().splitlines():
+        record = json.loads(line)
+        record.pop("exported_at")
+        records[record.pop("user_id")] = record
+    assert count == len(records)
+    return records
+
+
+def test_migration_upgrades_legacy_file(tmp_path, legacy_file):
+    output = tmp_path / "migrated.json"
+    report = UserDataMigration(str(legacy_file), str(output)).run()
+
+    assert report["from_version"] == 1 and report["to_version"] == SCHEMA_VERSION
+    assert report["users"] == 2
+    assert report["duplicate_favorites"] == 1
+    assert report["orphaned_entries"] == 1
+    assert report["trimmed_searches"] == 12
+
+    data = json.loads(output.read_text(encoding="utf-8"))
+    assert data["schema_version"] == SCHEMA_VERSION
+    assert "ghost" not in data["favorites"]
+    assert [fav["job_id"] for fav in data["favorites"]["u1"]] == ["job-1", "job-2"]
+    assert data["favorites"]["u1"][0]["added_at"] == to_epoch("2024-01-02 10:00:00")
+    user = data["users"]["u1"]
+    assert user["last_interaction"] == to_epoch("2024-01-02 18:30:00")
+    assert user["favorite_count"] == 2
+    assert [data["keywords"][item["kw"]] for item in user["preferred_keywords"]] == ["python", "後端"]
+    # 只保留仍被參照的關鍵字
+    assert sorted(data["keywords"]) == sorted({"python", "後端"} | {f"關鍵字{i}" for i in range(7)})
+
+    # 已是目前版本的檔案再遷移一次，關鍵字可能重新編號，但匯出內容不變
+    again = tmp_path / "again.json"
+    report = UserDataMigration(str(output), str(again)).run()
+    assert report["from_version"] == SCHEMA_VERSION and report["duplicate_favorites"] == 0
+    assert exported(make_manager(tmp_path, again)) == exported(make_manager(tmp_path, output))
+
+
+def test_export_round_trip_matches_before_and_after_migration(tmp_path, legacy_file):
+    before = exported(make_manager(tmp_path, legacy_file))
+
+    output = tmp_path / "migrated.json"
+    UserDataMigration(str(legacy_file), str(output)).run()
+    after = exported(make_manager(tmp_path, output))
+
+    # 遷移移除重複收藏、重算收藏數並補齊缺少的欄位，其餘匯出內容相同
+    before["u1"]["favorites"] = before["u1"]["favorites"][:2]
+    before["u1"]["user_info"]["favorite_count"] = 2
+    before["u2"]["user_info"].update({"search_count": 0, "favorite_count": 0, "user_info": {}})
+    assert after == before
+
+    history = after["u1"]["search_history"]
+    assert len(history) == HISTORY_CAPACITY
+    assert history[-1]["keyword"] == f"關鍵字{(HISTORY_CAPACITY + 11) % 7}"
+    assert after["u1"]["user_info"]["user_info"] == {"name": "小明 \"阿明\""}
+
+
+def test_streaming_export_matches_single_user_export(tmp_path, legacy_file):
+    manager = make_manager(tmp_path, legacy_file)
+    for user_id, record in exported(manager).items():
+        single = manager.export_user_data(user_id)
+        single.pop("exported_at")
+        record.pop("settings")
+        assert record == single
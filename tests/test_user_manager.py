@@ -0,0 +1,232 @@
+import io
+import json
+import threading
+from datetime import datetime
+
+import pytest
+
+from resp_stub import RESPStub
+from storage_backend import MemoryBackend, RedisBackend, SQLiteBackend
+from user_manager import TIME_FORMAT, UserManager
+
+
+class FailingBackend(MemoryBackend):
+    """寫入用戶收藏時失敗的後端"""
+
+    def __init__(self):
+        super().__init__()
+        self.fail_writes = False
+
+    def set(self, key, value):
+        if self.fail_writes and key.startswith("favorites:"):
+            raise OSError("disk full")
+        super().set(key, value)
+
+
+def make_manager(tmp_path, backend=None, name="a"):
+    return UserManager(
+        user_data_file=str(tmp_path / f"user_data_{name}.json"),
+        jobs_file=str(tmp_path / f"jobs_{name}.json"),
+        catalog_file=str(tmp_path / f"catalog_{name}.db"),
+        backend=backend
+    )
+
+
+def pinned(manager, job_id):
+    row = manager.job_catalog._conn.execute("SELECT pinned FROM jobs WHERE id = ?", (job_id,)).fetchone()
+    return row[0]
+
+
+@pytest.fixture
+def job():
+    return {"id": "job-1", "title": "Python工程師", "company": "測試公司", "location": "台北市"}
+
+
+@pytest.mark.parametrize("use_backend", [False, True])
+def test_favorite_pins_job_only_after_save(tmp_path, job, use_backend):
+    manager = make_manager(tmp_path, MemoryBackend() if use_backend else None)
+    manager.job_catalog.upsert(job)
+
+    assert manager.add_favorite("u1", "job-1")
+    assert pinned(manager, "job-1") == 1
+    assert not manager.add_favorite("u1", "job-1")
+    assert pinned(manager, "job-1") == 1
+
+    assert manager.remove_favorite("u1", "job-1")
+    assert pinned(manager, "job-1") == 0
+    assert manager.remove_favorite("u1", "job-1")
+    assert pinned(manager, "job-1") == 0
+
+
+def test_failed_save_leaves_job_unpinned(tmp_path, job):
+    backend = FailingBackend()
+    manager = make_manager(tmp_path, backend)
+    manager.job_catalog.upsert(job)
+
+    backend.fail_writes = True
+    assert not manager.add_favorite("u1", "job-1")
+    assert pinned(manager, "job-1") == 0
+
+    backend.fail_writes = False
+    assert manager.add_favorite("u1", "job-1")
+    backend.fail_writes = True
+    assert not manager.remove_favorite("u1", "job-1")
+    assert pinned(manager, "job-1") == 1
+
+
+@pytest.fixture(params=["memory", "sqlite", "redis"])
+def shared_backends(request, tmp_path):
+    """同一個儲存空間的兩個連線，模擬兩個行程"""
+    if request.param == "memory":
+        backend = MemoryBackend()
+        yield backend, backend
+        return
+
+    if request.param == "sqlite":
+        first = SQLiteBackend(str(tmp_path / "shared.db"))
+        second = SQLiteBackend(str(tmp_path / "shared.db"))
+    else:
+        stub = RESPStub()
+        first, second = RedisBackend(port=stub.port), RedisBackend(port=stub.port)
+    yield first, second
+    first.close()
+    second.close()
+    if request.param == "redis":
+        stub.close()
+
+
+def history_keywords(manager, user_id):
+    return [search["keyword"] for search in manager.export_user_data(user_id)["search_history"]]
+
+
+def test_two_instances_share_keyword_ids(tmp_path, shared_backends):
+    first = make_manager(tmp_path, shared_backends[0], "a")
+    second = make_manager(tmp_path, shared_backends[1], "b")
+
+    # 兩個行程各自加入新關鍵字，不能分配到同一個 ID
+    assert first.record_search("u1", "python")
+    assert second.record_search("u2", "java")
+    assert second.record_search("u2", "python")
+    assert first.record_search("u1", "golang")
+
+    for manager in (first, second):
+        assert history_keywords(manager, "u1") == ["python", "golang"]
+        assert history_keywords(manager, "u2") == ["java", "python"]
+        assert dict(manager.get_popular_keywords()) == {"python": 2, "java": 1, "golang": 1}
+        assert manager.find_users_by_keyword("java") == ["u2"]
+
+
+def test_concurrent_instances_intern_consistently(tmp_path, shared_backends):
+    managers = [make_manager(tmp_path, shared_backends[0], "a"), make_manager(tmp_path, shared_backends[1], "b")]
+    keywords = [f"keyword-{i % 7}" for i in range(40)]
+
+    def record(i):
+        manager = managers[i % 2]
+        assert manager.record_search(f"user-{i}", keywords[i])
+
+    threads = [threading.Thread(target=record, args=(i,)) for i in range(len(keywords))]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    for manager in managers:
+        for i, keyword in enumerate(keywords):
+            assert history_keywords(manager, f"user-{i}") == [keyword]
+
+
+def test_whole_data_save_remaps_local_keywords(tmp_path, shared_backends):
+    first = make_manager(tmp_path, shared_backends[0], "a")
+    second = make_manager(tmp_path, shared_backends[1], "b")
+    first.record_search("u1", "python")
+
+    # 整份資料在本機加入關鍵字，同時另一個行程用掉了同一個 ID
+    data = first.load_user_data()
+    local_id = len(data["keywords"])
+    data["keywords"].append("rust")
+    data["search_history"]["u9"] = {"head": 0, "kw": [local_id], "ts": [1700000000]}
+    second.record_search("u2", "go")
+    assert first.save_user_data(data)
+
+    # 整份寫入會以載入時的內容覆蓋 u2，但 "go" 的 ID 仍屬於 "go"
+    second.record_search("u3", "go")
+    for manager in (first, second):
+        assert history_keywords(manager, "u9") == ["rust"]
+        assert history_keywords(manager, "u3") == ["go"]
+        assert history_keywords(manager, "u1") == ["python"]
+
+
+def test_imports_legacy_keyword_list(tmp_path):
+    backend = MemoryBackend()
+    backend.set("meta:keywords", ["python", "java"])
+    backend.set("search_history:u1", {"head": 0, "kw": [1, 0], "ts": [1700000000, 1700000001]})
+
+    first = make_manager(tmp_path, backend, "a")
+    second = make_manager(tmp_path, backend, "b")
+    assert history_keywords(first, "u1") == ["java", "python"]
+
+    second.record_search("u2", "rust")
+    first.record_search("u2", "java")
+    assert history_keywords(first, "u2") == ["rust", "java"]
+    assert first.load_user_data()["keywords"] == ["python", "java", "rust"]
+
+
+def test_activity_index_sees_other_instance_writes(tmp_path, shared_backends):
+    first = make_manager(tmp_path, shared_backends[0], "a")
+    second = make_manager(tmp_path, shared_backends[1], "b")
+    first.add_user("u1")
+    assert first.get_active_users(0) == ["u1"]
+
+    # 另一個實例新增的用戶，已建立索引的實例也要看得到
+    second.add_user("u2")
+    assert set(first.get_active_users(0)) == {"u1", "u2"}
+
+    # 本實例的寫入就地更新索引，之後仍能察覺其他實例的寫入
+    first.record_search("u1", "python")
+    assert set(first.get_active_users(0)) == {"u1", "u2"}
+    second.record_search("u3", "java")
+    assert set(first.get_active_users(0)) == {"u1", "u2", "u3"}
+
+
+def test_activity_index_sees_other_instance_writes_in_file_mode(tmp_path):
+    first, second = make_manager(tmp_path), make_manager(tmp_path)
+    first.add_user("u1")
+    assert first.get_active_users(0) == ["u1"]
+
+    second.add_user("u2")
+    assert set(first.get_active_users(0)) == {"u1", "u2"}
+
+    first.add_favorite("u3", "job-1")
+    second.record_search("u4", "go")
+    assert set(first.get_active_users(0)) == {"u1", "u2", "u3", "u4"}
+    assert set(second.get_active_users(0)) == {"u1", "u2", "u3", "u4"}
+
+
+def test_activity_index_updates_in_place_for_own_writes(tmp_path):
+    manager = make_manager(tmp_path, MemoryBackend())
+    manager.add_user("u1")
+    manager.get_active_users(0)
+    index = manager._activity_index
+
+    manager.add_user("u2")
+    assert manager._activity_index is index
+    assert set(manager.get_active_users(0)) == {"u1", "u2"}
+    assert manager._activity_index is index
+
+
+@pytest.mark.parametrize("use_backend", [False, True])
+def test_preferred_keywords_use_formatted_timestamps(tmp_path, use_backend):
+    manager = make_manager(tmp_path, MemoryBackend() if use_backend else None)
+    manager.record_search("u1", "python")
+
+    stats = manager.get_user_stats("u1")
+    preferred = stats["preferred_keywords"]
+    assert [item["keyword"] for item in preferred] == ["python"]
+    # 與 first_interaction、last_interaction 相同的字串格式
+    assert preferred[0]["last_searched"] == stats["last_interaction"]
+    assert datetime.strptime(preferred[0]["last_searched"], TIME_FORMAT)
+
+    assert manager.export_user_data("u1")["user_info"]["preferred_keywords"] == preferred
+    output = io.StringIO()
+    manager.export_all_users(output)
+    assert json.loads(output.getvalue())["user_info"]["preferred_keywords"] == preferred
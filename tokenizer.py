@@ -0,0 +1,200 @@
+import atexit
+import hashlib
+import logging
+import os
+import threading
+import time
+import jieba
+from serializer import read_file, write_file
+
+# jieba 前綴詞典快取，重新啟動時直接載入，不必重新建立
+CACHE_FILE = os.getenv(
+    'JIEBA_CACHE_FILE',
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), '.cache', 'jieba.cache')
+)
+
+# 分詞結果快取：內容雜湊 → 詞清單，重新啟動後沿用，未改變的文字不必重新分詞
+TOKEN_CACHE_FILE = os.getenv(
+    'TOKEN_CACHE_FILE',
+    os.path.join(os.path.dirname(CACHE_FILE), 'tokens.json.gz')
+)
+TOKEN_CACHE_SIZE = 200000
+
+# 自動儲存的最短間隔（秒），結束程式時一定會儲存
+TOKEN_CACHE_SAVE_INTERVAL = 300
+
+_ready = threading.Event()
+_init_lock = threading.Lock()
+_init_thread = None
+
+# 職稱 → 加入詞典前的切法與其中包含的較短職稱，搜尋模式會一併產生
+_subwords = {}
+
+# 分詞模式與內容雜湊 → 詞 tuple；詞典簽章不同（職稱或 jieba 版本改變）時不沿用檔案中的結果
+_token_cache = {}
+_token_cache_lock = threading.Lock()
+_token_cache_state = {"signature": None, "dirty": False, "saved_at": 0}
+
+
+def _job_title_words():
+    """由爬蟲職缺分類與職位對照表產生使用者詞典"""
+    # 延遲匯入，避免與使用本模組的模組互相匯入
+    from crawler import ZeroDependencyCrawler
+    from job_condition_guide import JobConditionGuide
+
+    words = set()
+    for category, data in ZeroDependencyCrawler().job_database.items():
+        words.add(category)
+        words.update(data.get('titles', []))
+    for key, value in JobConditionGuide.direct_job_mapping.items():
+        words.update((key, value))
+
+    # jieba 不會把空白切在同一個詞內；英文職稱另外加入小寫版本
+    words = {word for word in words if word and ' ' not in word}
+    return sorted(words | {word.lower() for word in words})
+
+
+def _initialize():
+    try:
+        os.makedirs(os.path.dirname(CACHE_FILE), exist_ok=True)
+        jieba.dt.cache_file = CACHE_FILE
+        jieba.setLogLevel(logging.WARNING)
+        jieba.initialize()
+
+        words = _job_title_words()
+
+        # 先記下原本的切法，「前端工程師」整詞收錄後仍能以「前端」搜尋到
+        subwords = {}
+        for word in words:
+            parts = {part for part in jieba.lcut(word) if part.strip() and part != word}
+            parts.update(other for other in words if other != word and other in word)
+            if parts:
+                subwords[word] = sorted(parts)
+
+        for word in words:
+            # 不指定詞頻時 jieba 會計算足以讓整個詞不被切開的詞頻
+            jieba.add_word(word)
+        _subwords.update(subwords)
+
+        _token_cache_state["signature"] = _dictionary_signature(words)
+        _load_token_cache()
+    except Exception as e:
+        print(f"❌ jieba 初始化失敗：{e}")
+    finally:
+        _ready.set()
+
+
+def initialize(background=True):
+    """載入 jieba 詞典與職稱詞典；background 為 True 時在背景執行緒進行"""
+    global _init_thread
+
+    with _init_lock:
+        if _init_thread is None and not _ready.is_set():
+            _init_thread = threading.Thread(target=_initialize, daemon=True)
+            _init_thread.start()
+
+    if not background:
+        _ready.wait()
+
+
+def is_ready():
+    return _ready.is_set()
+
+
+def _dictionary_signature(words):
+    """分詞結果取決於 jieba 版本與使用者詞典，兩者都納入簽章"""
+    digest = hashlib.blake2b(digest_size=16)
+    digest.update(getattr(jieba, '__version__', '').encode('utf-8'))
+    for word in words:
+        digest.update(b'\n' + word.encode('utf-8'))
+    return digest.hexdigest()
+
+
+def _load_token_cache():
+    path = TOKEN_CACHE_FILE
+    if not os.path.exists(path):
+        return
+    try:
+        data = read_file(path)
+    except Exception as e:
+        print(f"❌ 讀取分詞快取失敗：{e}")
+        return
+    if data.get("signature") != _token_cache_state["signature"]:
+        return
+
+    with _token_cache_lock:
+        for key, tokens in data.get("tokens", {}).items():
+            _token_cache.setdefault(key, tuple(tokens))
+
+
+def save_token_cache(force=True):
+    """將分詞快取寫入檔案，回傳寫入的位元組數；沒有新結果時不寫入
+
+    force 為 False 時距離上次儲存未滿 TOKEN_CACHE_SAVE_INTERVAL 秒則略過，供頻繁呼叫的地方使用。
+    """
+    state = _token_cache_state
+    if not state["dirty"] or state["signature"] is None:
+        return 0
+    if not force and time.time() - state["saved_at"] < TOKEN_CACHE_SAVE_INTERVAL:
+        return 0
+
+    # 鎖內只複製 (鍵, 分詞結果) 的參照，轉換與寫檔在鎖外進行，不阻擋同時進行的分詞
+    with _token_cache_lock:
+        items = list(_token_cache.items())
+        state["dirty"] = False
+        state["saved_at"] = time.time()
+
+    tokens = {key: list(value) for key, value in items}
+    try:
+        os.makedirs(os.path.dirname(TOKEN_CACHE_FILE) or '.', exist_ok=True)
+        return write_file(TOKEN_CACHE_FILE, {"signature": state["signature"], "tokens": tokens},
+                          compression='gzip')
+    except Exception as e:
+        state["dirty"] = True
+        print(f"❌ 儲存分詞快取失敗：{e}")
+        return 0
+
+
+def token_cache_size():
+    return len(_token_cache)
+
+
+def _cached_cut(mode, text, cut):
+    """以 (模式, 內容雜湊) 查詢分詞快取，未命中時分詞並存入"""
+    key = mode + hashlib.blake2b(text.encode('utf-8'), digest_size=16).hexdigest()
+    tokens = _token_cache.get(key)
+    if tokens is None:
+        tokens = tuple(cut(text))
+        with _token_cache_lock:
+            if len(_token_cache) >= TOKEN_CACHE_SIZE:
+                # 超過上限時移除最早加入的結果
+                del _token_cache[next(iter(_token_cache))]
+            _token_cache[key] = tokens
+            _token_cache_state["dirty"] = True
+    return list(tokens)
+
+
+def _cut_for_search(text):
+    tokens = []
+    for token in jieba.cut_for_search(text):
+        tokens.append(token)
+        tokens.extend(_subwords.get(token, ()))
+    return tokens
+
+
+def lcut(text):
+    """精確模式分詞，詞典尚未載入完成時等待"""
+    if not _ready.is_set():
+        initialize(background=False)
+    return _cached_cut('p', text, jieba.lcut)
+
+
+def lcut_for_search(text):
+    """搜尋模式分詞，長詞與職稱會額外切出子詞"""
+    if not _ready.is_set():
+        initialize(background=False)
+    return _cached_cut('s', text, _cut_for_search)
+
+
+# 結束程式時保存本次新增的分詞結果
+atexit.register(save_token_cache)
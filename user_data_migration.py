@@ -0,0 +1,179 @@
+import argparse
+import json
+import os
+import time
+from json_stream import JSONStreamReader
+from search_history import HISTORY_CAPACITY, KeywordTable
+from serializer import open_text_stream, open_text_writer
+from user_manager import (
+    SCHEMA_VERSION, USER_SECTIONS,
+    migrate_favorites, migrate_search_history, migrate_user_record
+)
+
+
+def _dumps(value):
+    return json.dumps(value, ensure_ascii=False, separators=(',', ':'))
+
+
+def _iter_section(path, section):
+    """串流讀取指定區塊的 (用戶ID, 資料)"""
+    with open_text_stream(path) as f:
+        reader = JSONStreamReader(f)
+        for key in reader.iter_object():
+            if key == section:
+                for user_id in reader.iter_object():
+                    yield user_id, reader.read_value()
+
+
+def _dedupe_favorites(favorites):
+    """依 job_id 去除重複收藏，保留最早加入的一筆"""
+    seen = set()
+    unique = []
+    for fav in sorted(favorites, key=lambda fav: fav["added_at"]):
+        job_id = fav.get("job_id")
+        if job_id and job_id not in seen:
+            seen.add(job_id)
+            unique.append(fav)
+    return unique
+
+
+class UserDataMigration:
+    """user_data.json 串流遷移與壓縮工具"""
+
+    def __init__(self, input_file='user_data.json', output_file=None, compression=None):
+        self.input_file = input_file
+        self.output_file = output_file or input_file
+        self.compression = compression
+        # 舊字串表與重新編號後只含仍被使用關鍵字的新字串表
+        self.old_table = KeywordTable()
+        self.new_table = KeywordTable()
+        self.stats = {
+            "users": 0,
+            "duplicate_favorites": 0,
+            "orphaned_entries": 0,
+            "trimmed_searches": 0
+        }
+
+    def _scan(self):
+        """第一次掃描：取得版本、關鍵字字串表、用戶 ID 與去重後的收藏數"""
+        schema_version = 1
+        user_ids = set()
+        favorite_counts = {}
+
+        with open_text_stream(self.input_file) as f:
+            reader = JSONStreamReader(f)
+            for key in reader.iter_object():
+                if key == "schema_version":
+                    schema_version = reader.read_value()
+                elif key == "keywords":
+                    self.old_table = KeywordTable(reader.read_value())
+                elif key == "users":
+                    for user_id in reader.iter_object():
+                        user_ids.add(user_id)
+                elif key == "favorites":
+                    for user_id in reader.iter_object():
+                        favorites = reader.read_value()
+                        favorite_counts[user_id] = len({fav.get("job_id") for fav in favorites
+                                                        if fav.get("job_id")})
+
+        return schema_version, user_ids, favorite_counts
+
+    def _remap(self, keyword_id):
+        """舊字串表 ID 轉為新字串表 ID"""
+        return self.new_table.intern(self.old_table.lookup(keyword_id))
+
+    def _migrate_record(self, section, record, favorite_count):
+        """升級單筆資料，回傳 None 表示應丟棄"""
+        if section == "users":
+            # 新版資料的偏好關鍵字先重新編號，舊版資料直接寫入新字串表
+            for item in record.get("preferred_keywords", []):
+                if "kw" in item:
+                    item["kw"] = self._remap(item["kw"])
+            migrate_user_record(record, self.new_table)
+            record.setdefault("search_count", 0)
+            record.setdefault("preferred_keywords", [])
+            record.setdefault("user_info", {})
+            record["favorite_count"] = favorite_count
+            return record
+
+        if section == "favorites":
+            favorites = _dedupe_favorites(migrate_favorites(record))
+            self.stats["duplicate_favorites"] += len(record) - len(favorites)
+            return favorites or None
+
+        if section == "search_history":
+            if isinstance(record, dict):
+                record["kw"] = [self._remap(keyword_id) for keyword_id in record["kw"]]
+                history = record
+            else:
+                self.stats["trimmed_searches"] += max(len(record) - HISTORY_CAPACITY, 0)
+                history = migrate_search_history(record, self.new_table)
+            return history if history["kw"] else None
+
+        return record
+
+    def run(self):
+        """執行遷移並回傳報告"""
+        start = time.perf_counter()
+        size_before = os.path.getsize(self.input_file)
+
+        schema_version, user_ids, favorite_counts = self._scan()
+        self.stats["users"] = len(user_ids)
+
+        tmp_file = f"{self.output_file}.migrating"
+        with open_text_writer(tmp_file, self.compression) as out:
+            out.write('{"schema_version":%d' % SCHEMA_VERSION)
+
+            # 依固定順序逐區塊寫出，缺少的區塊寫成空物件
+            for section in USER_SECTIONS:
+                out.write(',%s:{' % _dumps(section))
+                first = True
+                for user_id, record in _iter_section(self.input_file, section):
+                    if user_id not in user_ids:
+                        self.stats["orphaned_entries"] += 1
+                        continue
+
+                    record = self._migrate_record(section, record, favorite_counts.get(user_id, 0))
+                    if record is None:
+                        continue
+
+                    out.write(('' if first else ',') + _dumps(user_id) + ':' + _dumps(record))
+                    first = False
+                out.write('}')
+
+            # 字串表最後寫出，只包含仍被參照的關鍵字
+            out.write(',"keywords":' + _dumps(self.new_table.keywords))
+            out.write('}')
+
+        os.replace(tmp_file, self.output_file)
+
+        return {
+            "from_version": schema_version,
+            "to_version": SCHEMA_VERSION,
+            "size_before": size_before,
+            "size_after": os.path.getsize(self.output_file),
+            "seconds": round(time.perf_counter() - start, 3),
+            "keywords": len(self.new_table.keywords),
+            **self.stats
+        }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="升級並壓縮 user_data.json")
+    parser.add_argument("input", nargs="?", default="user_data.json")
+    parser.add_argument("--output", help="輸出檔案（預設覆寫輸入檔）")
+    parser.add_argument("--compression", choices=["gzip", "zstd"], help="輸出壓縮方式")
+    args = parser.parse_args()
+
+    report = UserDataMigration(args.input, args.output, args.compression).run()
+
+    print(f"✅ 遷移完成：v{report['from_version']} → v{report['to_version']}")
+    print(f"📦 檔案大小：{report['size_before']:,} → {report['size_after']:,} bytes")
+    print(f"⏱️ 執行時間：{report['seconds']} 秒")
+    print(f"👤 用戶 {report['users']} 位，移除重複收藏 {report['duplicate_favorites']} 筆，"
+          f"孤立資料 {report['orphaned_entries']} 筆，超量搜尋紀錄 {report['trimmed_searches']} 筆")
+    print(f"🔤 關鍵字字串表：{report['keywords']} 個")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,21 +1,164 @@
+import bisect
 import json
+import sqlite3
+import tempfile
+import threading
+import time
 from datetime import datetime
 import os
+from job_catalog import JobCatalog
+from json_stream import JSONStreamReader
+from search_history import (
+    KeywordTable, SearchHistoryRing, SharedKeywordTable, history_from_records, new_history_record
+)
+from serializer import get_serializer, open_text_stream, read_file, write_file
+from storage_backend import backend_from_env
+from striped_lock import DEFAULT_STRIPES, StripedLock
+
+# 以用戶 ID 為鍵的資料區塊，在鍵值後端中存成「區塊:用戶ID」
+USER_SECTIONS = ("users", "favorites", "search_history", "settings")
+
+# 鍵值後端的用戶資料版本，每次寫入遞增，其他實例據此判斷活躍度索引是否過期
+DATA_VERSION_KEY = "activity:version"
+
+# 第 2 版起所有時間戳記都存成整數 epoch 秒
+# 第 3 版起關鍵字集中存在 keywords 字串表，搜尋歷史改為固定容量的環狀緩衝區
+SCHEMA_VERSION = 3
+TIME_FORMAT = "%Y-%m-%d %H:%M:%S"
+
+
+def now_ts():
+    """目前時間的 epoch 秒"""
+    return int(time.time())
+
+
+def format_timestamp(ts):
+    """將 epoch 秒轉為顯示用字串"""
+    if not ts:
+        return ""
+    return datetime.fromtimestamp(ts).strftime(TIME_FORMAT)
+
+
+def to_epoch(value):
+    """將舊版字串時間或數字轉為 epoch 秒，無法解析時回傳 0"""
+    if isinstance(value, (int, float)):
+        return int(value)
+    if isinstance(value, str) and value:
+        try:
+            return int(datetime.strptime(value, TIME_FORMAT).timestamp())
+        except ValueError:
+            return 0
+    return 0
+
+
+def migrate_user_record(user, table):
+    """升級單筆用戶資料：時間戳記轉為 epoch 秒，偏好關鍵字改存字串表 ID"""
+    user["first_interaction"] = to_epoch(user.get("first_interaction"))
+    user["last_interaction"] = to_epoch(user.get("last_interaction"))
+
+    preferred = []
+    for item in user.get("preferred_keywords", []):
+        if "keyword" in item:
+            item = {
+                "kw": table.intern(item["keyword"]),
+                "count": item.get("count", 0),
+                "last_searched": to_epoch(item.get("last_searched"))
+            }
+        preferred.append(item)
+    user["preferred_keywords"] = preferred
+
+    return user
+
+
+def migrate_favorites(favorites):
+    """將收藏清單的時間戳記轉為 epoch 秒"""
+    for fav in favorites:
+        fav["added_at"] = to_epoch(fav.get("added_at"))
+    return favorites
+
+
+def migrate_search_history(history, table):
+    """將舊版搜尋歷史清單轉為環狀緩衝區，已是新格式時原樣回傳"""
+    if isinstance(history, dict):
+        return history
+
+    for search in history:
+        search["searched_at"] = to_epoch(search.get("searched_at"))
+    return history_from_records(history, table)
+
+
+def resolve_preferred_keywords(preferred, table):
+    """將偏好關鍵字的字串表 ID 與時間戳記轉回可讀格式"""
+    return [{"keyword": table.lookup(item["kw"]), "count": item["count"],
+             "last_searched": format_timestamp(item.get("last_searched"))} for item in preferred]
+
+
+def migrate_user_data(data):
+    """補齊缺少的資料區塊並升級到目前的資料版本，有變更時回傳 True"""
+    # 舊檔案可能只有 users 與 favorites
+    for section in USER_SECTIONS:
+        data.setdefault(section, {})
+    data.setdefault("keywords", [])
+
+    if data.get("schema_version", 1) >= SCHEMA_VERSION:
+        return False
+
+    table = KeywordTable(data["keywords"])
+
+    for user in data["users"].values():
+        migrate_user_record(user, table)
+
+    for favorites in data["favorites"].values():
+        migrate_favorites(favorites)
+
+    for user_id, history in data["search_history"].items():
+        data["search_history"][user_id] = migrate_search_history(history, table)
+
+    data["schema_version"] = SCHEMA_VERSION
+    return True
 
 
 class UserManager:
     """用戶資料管理器"""
 
-    def __init__(self, user_data_file='user_data.json', jobs_file='jobs.json'):
+    def __init__(self, user_data_file='user_data.json', jobs_file='jobs.json', backend=None,
+                 catalog_file='job_catalog.db', serializer='auto', compression=None,
+                 lock_stripes=DEFAULT_STRIPES):
         self.user_data_file = user_data_file
         self.jobs_file = jobs_file
+        # 檔案格式：精簡 JSON（有 orjson 時使用）或 msgpack，可選 gzip/zstd 壓縮
+        self.serializer = get_serializer(serializer)
+        self.compression = compression
+        self.job_catalog = JobCatalog(catalog_file)
+        # 未指定後端時讀取 STORAGE_BACKEND_URL，皆無則沿用 JSON 檔案
+        self.backend = backend if backend is not None else backend_from_env()
+
+        # 依最後互動時間排序的 (時間, 用戶ID) 索引，首次查詢時建立，之後由本實例的寫入維護；
+        # 記下建立時的資料版本，其他實例或行程改過資料（版本不符）時重新建立
+        self._activity_lock = threading.Lock()
+        self._activity_index = None
+        self._activity_version = None
+        self._last_seen = {}
+
+        # 依用戶 ID 分段的鎖：不同用戶的更新可平行進行，同一用戶的更新依序執行
+        self._user_locks = StripedLock(lock_stripes)
+        # JSON 檔案是單一文件，讀取到寫回之間須獨占，鍵值後端則只鎖單一用戶
+        self._file_lock = threading.RLock()
+        # 鍵值後端的關鍵字字串表存在後端，多個行程共用同一套 ID；舊版整份存放的字串表首次使用時匯入
+        self._keyword_table = None
+        if self.backend is not None:
+            self._keyword_table = SharedKeywordTable(self.backend)
+            self._keyword_table.import_keywords(self.backend.get("meta:keywords"))
+
         self.init_files()
 
     def init_files(self):
         """初始化資料檔案"""
         # 初始化 user_data.json
-        if not os.path.exists(self.user_data_file):
+        if self.backend is None and not os.path.exists(self.user_data_file):
             initial_data = {
+                "schema_version": SCHEMA_VERSION,
+                "keywords": [],
                 "users": {},
                 "favorites": {},
                 "search_history": {},
@@ -32,50 +175,189 @@ class UserManager:
             }
             self.save_jobs_data(initial_jobs)
 
+        # 首次使用職缺目錄時匯入舊版 jobs.json，只匯入一次
+        self.job_catalog.import_legacy_jobs(self.jobs_file)
+
     def load_user_data(self):
         """載入用戶資料"""
-        try:
-            with open(self.user_data_file, 'r', encoding='utf-8') as f:
-                return json.load(f)
-        except (FileNotFoundError, json.JSONDecodeError):
-            return {"users": {}, "favorites": {}, "search_history": {}, "settings": {}}
+        if self.backend is not None:
+            data = self._load_from_backend()
+        else:
+            try:
+                data = read_file(self.user_data_file, self.serializer)
+            except (FileNotFoundError, ValueError):
+                data = {"schema_version": SCHEMA_VERSION, "keywords": [],
+                        "users": {}, "favorites": {}, "search_history": {}, "settings": {}}
+
+        migrate_user_data(data)
+        return data
 
     def save_user_data(self, data):
         """儲存用戶資料"""
         try:
-            with open(self.user_data_file, 'w', encoding='utf-8') as f:
-                json.dump(data, f, ensure_ascii=False, indent=2)
+            if self.backend is not None:
+                self._save_to_backend(data)
+                return True
+
+            write_file(self.user_data_file, data, self.serializer, self.compression)
             return True
         except Exception as e:
             print(f"❌ 儲存用戶資料失敗：{e}")
             return False
 
+    def _load_from_backend(self):
+        """從鍵值後端組回完整的用戶資料"""
+        data = {section: {} for section in USER_SECTIONS}
+
+        for section in USER_SECTIONS:
+            prefix = f"{section}:"
+            for key in self.backend.keys(prefix):
+                value = self.backend.get(key)
+                if value is not None:
+                    data[section][key[len(prefix):]] = value
+
+        # 其他頂層欄位存成 meta:欄位名稱；字串表另外存放，meta:keywords 只是匯入前的舊版資料
+        for key in self.backend.keys("meta:"):
+            if key != "meta:keywords":
+                data[key[len("meta:"):]] = self.backend.get(key)
+        data["keywords"] = self._keyword_table.keywords()
+
+        return data
+
+    def _save_to_backend(self, data):
+        """將用戶資料拆成每位用戶一筆寫入鍵值後端"""
+        self._reconcile_keywords(data)
+
+        for section in USER_SECTIONS:
+            prefix = f"{section}:"
+            records = data.get(section, {})
+
+            # 移除已不存在的用戶紀錄
+            for key in self.backend.keys(prefix):
+                if key[len(prefix):] not in records:
+                    self.backend.delete(key)
+
+            for user_id, record in records.items():
+                self.backend.set(prefix + user_id, record)
+
+        for key, value in data.items():
+            if key not in USER_SECTIONS and key != "keywords":
+                self.backend.set(f"meta:{key}", value)
+        self.backend.incr(DATA_VERSION_KEY)
+
+    def _reconcile_keywords(self, data):
+        """整份資料在本機加入的關鍵字改由後端字串表分配 ID，並更新資料中的參照
+
+        載入後其他行程可能已用掉同一個 ID，清單位置與後端不同的關鍵字都重新取得 ID。
+        """
+        table = self._keyword_table
+        remap = {}
+        for keyword_id, keyword in enumerate(data.get("keywords", [])):
+            if keyword and table.lookup(keyword_id) != keyword:
+                remap[keyword_id] = table.intern(keyword)
+        if not remap:
+            return
+
+        for user in data.get("users", {}).values():
+            for item in user.get("preferred_keywords", []):
+                item["kw"] = remap.get(item["kw"], item["kw"])
+        for history in data.get("search_history", {}).values():
+            history["kw"] = [remap.get(keyword_id, keyword_id) for keyword_id in history["kw"]]
+        data["keywords"] = table.keywords()
+
     def load_jobs_data(self):
         """載入職缺資料"""
         try:
-            with open(self.jobs_file, 'r', encoding='utf-8') as f:
-                return json.load(f)
-        except (FileNotFoundError, json.JSONDecodeError):
+            return read_file(self.jobs_file, self.serializer)
+        except (FileNotFoundError, ValueError):
             return {"jobs": [], "last_updated": "", "total_count": 0}
 
     def save_jobs_data(self, data):
         """儲存職缺資料"""
         try:
-            with open(self.jobs_file, 'w', encoding='utf-8') as f:
-                json.dump(data, f, ensure_ascii=False, indent=2)
+            write_file(self.jobs_file, data, self.serializer, self.compression)
             return True
         except Exception as e:
             print(f"❌ 儲存職缺資料失敗：{e}")
             return False
 
-    def add_user(self, user_id, user_info=None):
-        """新增或更新用戶"""
-        data = self.load_user_data()
+    def _update_user(self, user_id, mutate, on_saved=None):
+        """在用戶鎖內讀取、修改並寫回單一用戶的資料
+
+        mutate(records, table) 直接修改 {區塊: 資料}，區塊設為 None 代表刪除；
+        回傳假值時不寫回。儲存成功時回傳 mutate 的回傳值，失敗時回傳 False。
+        on_saved 在儲存成功後、釋放用戶鎖前呼叫，用於只能在資料寫入後進行的副作用。
+        """
+        with self._user_locks.lock_for(user_id):
+            if self.backend is not None:
+                result, records, versions = self._update_backend_user(user_id, mutate)
+            else:
+                with self._file_lock:
+                    before = self._data_version()
+                    data = self.load_user_data()
+                    records = {section: data[section].get(user_id) for section in USER_SECTIONS}
+
+                    result = mutate(records, KeywordTable(data["keywords"]))
+                    if not result:
+                        return result
+
+                    for section, record in records.items():
+                        if record is None:
+                            data[section].pop(user_id, None)
+                        else:
+                            data[section][user_id] = record
+
+                    if not self.save_user_data(data):
+                        return False
+                    versions = (before, self._data_version())
+
+            if result:
+                self._touch_activity(user_id, records["users"], versions)
+                if on_saved is not None:
+                    on_saved()
+            return result
+
+    def _update_backend_user(self, user_id, mutate):
+        """只讀寫單一用戶的鍵，呼叫端須持有該用戶的鎖
+
+        回傳 (mutate 的回傳值, 修改後的紀錄, (寫入前, 寫入後) 的資料版本)，儲存失敗時回傳值為 False。
+        """
+        table = self._keyword_table
+
+        records = {section: self.backend.get(f"{section}:{user_id}") for section in USER_SECTIONS}
+        existing = {section for section, record in records.items() if record is not None}
+
+        # 後端中的紀錄可能仍是舊版格式，讀取時逐筆升級
+        if records["users"] is not None:
+            migrate_user_record(records["users"], table)
+        if records["favorites"] is not None:
+            migrate_favorites(records["favorites"])
+        if records["search_history"] is not None:
+            records["search_history"] = migrate_search_history(records["search_history"], table)
+
+        result = mutate(records, table)
+        if not result:
+            return result, records, None
 
-        if user_id not in data["users"]:
-            data["users"][user_id] = {
-                "first_interaction": datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
-                "last_interaction": datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
+        try:
+            for section, record in records.items():
+                if record is not None:
+                    self.backend.set(f"{section}:{user_id}", record)
+                elif section in existing:
+                    self.backend.delete(f"{section}:{user_id}")
+            version = self.backend.incr(DATA_VERSION_KEY)
+        except Exception as e:
+            print(f"❌ 儲存用戶資料失敗：{e}")
+            return False, records, None
+
+        return result, records, (version - 1, version)
+
+    def _ensure_user(self, records, now, user_info=None):
+        """確保用戶存在並更新最後互動時間，回傳用戶資料"""
+        if records["users"] is None:
+            records["users"] = {
+                "first_interaction": now,
+                "last_interaction": now,
                 "search_count": 0,
                 "favorite_count": 0,
                 "preferred_keywords": [],
@@ -83,139 +365,199 @@ class UserManager:
             }
         else:
             # 更新最後互動時間
-            data["users"][user_id]["last_interaction"] = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+            records["users"]["last_interaction"] = now
+        return records["users"]
 
-        return self.save_user_data(data)
+    def add_user(self, user_id, user_info=None):
+        """新增或更新用戶"""
+        now = now_ts()
+
+        def mutate(records, table):
+            self._ensure_user(records, now, user_info)
+            return True
+
+        return self._update_user(user_id, mutate)
+
+    def _data_version(self):
+        """用戶資料的版本：鍵值後端為每次寫入遞增的計數，JSON 檔案為檔案的 inode、修改時間與大小"""
+        if self.backend is not None:
+            return self.backend.get(DATA_VERSION_KEY, 0)
+        try:
+            stat = os.stat(self.user_data_file)
+        except OSError:
+            return None
+        return stat.st_ino, stat.st_mtime_ns, stat.st_size
+
+    def _ensure_activity_index(self):
+        """建立活躍度索引，資料版本改變時重建（呼叫端須持有 _activity_lock）"""
+        # 先取版本再讀資料，讀取期間的寫入會讓下一次查詢重建
+        version = self._data_version()
+        if self._activity_index is not None and version == self._activity_version:
+            return
+
+        data = self.load_user_data()
+        self._activity_index = sorted(
+            (user.get("last_interaction", 0), user_id) for user_id, user in data["users"].items()
+        )
+        self._last_seen = {user_id: ts for ts, user_id in self._activity_index}
+        self._activity_version = version
+
+    def _touch_activity(self, user_id, user, versions):
+        """本實例寫入用戶資料後更新活躍度索引，versions 為 (寫入前, 寫入後) 的資料版本
+
+        只有索引正好是寫入前的版本時才就地更新；否則其間有其他實例或行程寫入，留到下次查詢時重建。
+        """
+        with self._activity_lock:
+            # 尚未建立索引時，之後建立會直接讀到最新資料
+            if self._activity_index is None:
+                return
+            if versions is None or versions[0] != self._activity_version:
+                self._activity_index = None
+                return
+
+            old_ts = self._last_seen.pop(user_id, None)
+            if old_ts is not None:
+                i = bisect.bisect_left(self._activity_index, (old_ts, user_id))
+                if i < len(self._activity_index) and self._activity_index[i] == (old_ts, user_id):
+                    del self._activity_index[i]
+
+            if user is not None:
+                ts = user.get("last_interaction", 0)
+                bisect.insort(self._activity_index, (ts, user_id))
+                self._last_seen[user_id] = ts
+            self._activity_version = versions[1]
+
+    def get_active_users(self, since_ts):
+        """取得最後互動時間晚於 since_ts 的用戶，最近互動的排在前面"""
+        with self._activity_lock:
+            self._ensure_activity_index()
+            start = bisect.bisect_right(self._activity_index, since_ts, key=lambda entry: entry[0])
+            return [user_id for _, user_id in reversed(self._activity_index[start:])]
 
     def add_favorite(self, user_id, job_id):
         """將職缺加入用戶收藏"""
-        data = self.load_user_data()
+        now = now_ts()
 
-        # 確保用戶存在
-        self.add_user(user_id)
+        def mutate(records, table):
+            # 確保用戶存在
+            user = self._ensure_user(records, now)
+            favorites = records["favorites"] or []
 
-        # 初始化收藏列表
-        if user_id not in data["favorites"]:
-            data["favorites"][user_id] = []
+            # 檢查是否已經收藏
+            if any(fav.get("job_id") == job_id for fav in favorites):
+                return False
 
-        # 檢查是否已經收藏
-        if job_id not in data["favorites"][user_id]:
-            data["favorites"][user_id].append({
+            favorites.append({
                 "job_id": job_id,
-                "added_at": datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+                "added_at": now
             })
+            records["favorites"] = favorites
 
             # 更新收藏統計
-            if user_id in data["users"]:
-                data["users"][user_id]["favorite_count"] = len(data["favorites"][user_id])
-
-            self.save_user_data(data)
+            user["favorite_count"] = len(favorites)
             return True
 
-        return False  # 已經收藏過了
+        # 收藏中的職缺不會因過期被目錄清除；收藏寫入成功後才標記，儲存失敗時不會留下標記
+        added = self._update_user(user_id, mutate, on_saved=lambda: self.job_catalog.pin(job_id))
+        return added  # False 代表已經收藏過了
 
     def remove_favorite(self, user_id, job_id):
         """移除用戶收藏的職缺"""
-        data = self.load_user_data()
+        removed = []
+
+        def mutate(records, table):
+            favorites = records["favorites"]
+            if favorites is None:
+                return False
 
-        if user_id in data["favorites"]:
             # 找到並移除職缺
-            data["favorites"][user_id] = [
-                fav for fav in data["favorites"][user_id]
-                if fav.get("job_id") != job_id
-            ]
+            remaining = [fav for fav in favorites if fav.get("job_id") != job_id]
+            removed.append(len(remaining) < len(favorites))
+            records["favorites"] = remaining
 
             # 更新收藏統計
-            if user_id in data["users"]:
-                data["users"][user_id]["favorite_count"] = len(data["favorites"][user_id])
-
-            self.save_user_data(data)
+            if records["users"] is not None:
+                records["users"]["favorite_count"] = len(remaining)
             return True
 
-        return False
+        def unpin():
+            if removed[-1]:
+                self.job_catalog.unpin(job_id)
+
+        # 收藏移除並寫入成功後才取消標記
+        return self._update_user(user_id, mutate, on_saved=unpin)
 
     def get_user_favorites(self, user_id):
         """取得用戶收藏的職缺"""
         data = self.load_user_data()
-        jobs_data = self.load_jobs_data()
 
         if user_id not in data["favorites"]:
             return []
 
-        favorite_jobs = []
         user_favorites = data["favorites"][user_id]
 
-        for fav_item in user_favorites:
-            job_id = fav_item.get("job_id")
-            added_at = fav_item.get("added_at")
+        # 以 ID 索引批次查詢職缺目錄，收藏的職缺即使過期也保留
+        jobs_by_id = self.job_catalog.get_many(
+            [fav.get("job_id") for fav in user_favorites], include_expired=True
+        )
 
-            # 在職缺資料中找到對應的職缺
-            for job in jobs_data.get("jobs", []):
-                if job.get("id") == job_id:
-                    job_copy = job.copy()
-                    job_copy["favorited_at"] = added_at
-                    favorite_jobs.append(job_copy)
-                    break
+        favorite_jobs = []
+        for fav_item in user_favorites:
+            job = jobs_by_id.get(fav_item.get("job_id"))
+            if job:
+                job_copy = dict(job)
+                job_copy["favorited_at"] = format_timestamp(fav_item.get("added_at"))
+                favorite_jobs.append(job_copy)
 
         return favorite_jobs
 
     def record_search(self, user_id, keyword):
         """記錄用戶搜尋歷史"""
-        data = self.load_user_data()
+        now = now_ts()
 
-        # 確保用戶存在
-        self.add_user(user_id)
+        def mutate(records, table):
+            # 確保用戶存在
+            user = self._ensure_user(records, now)
 
-        # 初始化搜尋歷史
-        if user_id not in data["search_history"]:
-            data["search_history"][user_id] = []
+            # 關鍵字只存一次，歷史紀錄以 ID 參照
+            keyword_id = table.intern(keyword)
 
-        # 記錄搜尋
-        search_record = {
-            "keyword": keyword,
-            "searched_at": datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-        }
-
-        data["search_history"][user_id].append(search_record)
-
-        # 只保留最近 50 次搜尋
-        data["search_history"][user_id] = data["search_history"][user_id][-50:]
+            # 記錄搜尋，環狀緩衝區只保留最近 50 次
+            history = records["search_history"] or new_history_record()
+            SearchHistoryRing(history).append(keyword_id, now)
+            records["search_history"] = history
 
-        # 更新搜尋統計
-        if user_id in data["users"]:
-            data["users"][user_id]["search_count"] += 1
-
-            # 更新偏好關鍵字
-            self._update_preferred_keywords(data, user_id, keyword)
+            # 更新搜尋統計與偏好關鍵字
+            user["search_count"] = user.get("search_count", 0) + 1
+            self._update_preferred_keywords(user, keyword_id, table, now)
+            return True
 
-        return self.save_user_data(data)
+        return self._update_user(user_id, mutate)
 
-    def _update_preferred_keywords(self, data, user_id, keyword):
+    def _update_preferred_keywords(self, user, keyword_id, table, now):
         """更新用戶偏好關鍵字"""
-        if "preferred_keywords" not in data["users"][user_id]:
-            data["users"][user_id]["preferred_keywords"] = []
-
-        preferred = data["users"][user_id]["preferred_keywords"]
+        preferred = user.setdefault("preferred_keywords", [])
+        keyword_lower = table.lookup(keyword_id).lower()
 
         # 找到是否已存在此關鍵字
         found = False
         for item in preferred:
-            if item["keyword"].lower() == keyword.lower():
+            if item["kw"] == keyword_id or table.lookup(item["kw"]).lower() == keyword_lower:
                 item["count"] += 1
-                item["last_searched"] = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+                item["last_searched"] = now
                 found = True
                 break
 
         if not found:
             preferred.append({
-                "keyword": keyword,
+                "kw": keyword_id,
                 "count": 1,
-                "last_searched": datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+                "last_searched": now
             })
 
         # 按搜尋次數排序，保留前 10 個
         preferred.sort(key=lambda x: x["count"], reverse=True)
-        data["users"][user_id]["preferred_keywords"] = preferred[:10]
+        user["preferred_keywords"] = preferred[:10]
 
     def get_user_stats(self, user_id):
         """取得用戶統計資訊"""
@@ -225,57 +567,188 @@ class UserManager:
             return None
 
         user_data = data["users"][user_id]
+        table = KeywordTable(data["keywords"])
         favorite_count = len(data["favorites"].get(user_id, []))
-        search_history_count = len(data["search_history"].get(user_id, []))
+        search_history_count = len(SearchHistoryRing(data["search_history"].get(user_id)))
 
         return {
-            "first_interaction": user_data.get("first_interaction"),
-            "last_interaction": user_data.get("last_interaction"),
+            "first_interaction": format_timestamp(user_data.get("first_interaction")),
+            "last_interaction": format_timestamp(user_data.get("last_interaction")),
             "search_count": search_history_count,
             "favorite_count": favorite_count,
-            "preferred_keywords": user_data.get("preferred_keywords", [])
+            "preferred_keywords": resolve_preferred_keywords(user_data.get("preferred_keywords", []), table)
         }
 
     def get_popular_keywords(self, limit=10):
         """取得熱門搜尋關鍵字"""
         data = self.load_user_data()
-        keyword_counts = {}
+        table = KeywordTable(data["keywords"])
+
+        # 先以關鍵字 ID 計數，再合併大小寫不同的關鍵字
+        id_counts = {}
+        for history in data["search_history"].values():
+            for keyword_id in history["kw"]:
+                id_counts[keyword_id] = id_counts.get(keyword_id, 0) + 1
 
-        # 統計所有用戶的搜尋關鍵字
-        for user_id, searches in data["search_history"].items():
-            for search in searches:
-                keyword = search["keyword"].lower()
-                keyword_counts[keyword] = keyword_counts.get(keyword, 0) + 1
+        keyword_counts = {}
+        for keyword_id, count in id_counts.items():
+            keyword = table.lookup(keyword_id).lower()
+            keyword_counts[keyword] = keyword_counts.get(keyword, 0) + count
 
         # 排序並回傳前 N 個
         popular = sorted(keyword_counts.items(), key=lambda x: x[1], reverse=True)
         return popular[:limit]
 
+    def get_users_with_search_history(self):
+        """取得有搜尋紀錄的用戶"""
+        data = self.load_user_data()
+        return [user_id for user_id, history in data["search_history"].items() if history["kw"]]
+
+    def find_users_by_keyword(self, keyword):
+        """找出搜尋過包含指定關鍵字的用戶"""
+        data = self.load_user_data()
+
+        # 先在字串表找出符合的 ID，再比對每位用戶的 ID 清單
+        matching_ids = KeywordTable(data["keywords"]).ids_matching(keyword)
+        if not matching_ids:
+            return []
+
+        return [user_id for user_id, history in data["search_history"].items()
+                if not matching_ids.isdisjoint(history["kw"])]
+
     def cleanup_old_data(self, days=30):
         """清理舊資料"""
-        from datetime import datetime, timedelta
+        cutoff_ts = now_ts() - days * 86400
 
-        cutoff_date = datetime.now() - timedelta(days=days)
-        data = self.load_user_data()
+        # 清理搜尋歷史：紀錄依時間排序，以二分搜尋找出保留起點
+        if self.backend is not None:
+            # 鍵值後端逐一用戶清理，只鎖住正在處理的用戶
+            def mutate(records, table):
+                history = records["search_history"]
+                return history is not None and SearchHistoryRing(history).drop_before(cutoff_ts) > 0
 
-        # 清理搜尋歷史
-        for user_id in data["search_history"]:
-            data["search_history"][user_id] = [
-                search for search in data["search_history"][user_id]
-                if datetime.strptime(search["searched_at"], "%Y-%m-%d %H:%M:%S") > cutoff_date
-            ]
+            for key in self.backend.keys("search_history:"):
+                self._update_user(key[len("search_history:"):], mutate)
+            return True
 
-        return self.save_user_data(data)
+        with self._file_lock:
+            data = self.load_user_data()
+            for history in data["search_history"].values():
+                SearchHistoryRing(history).drop_before(cutoff_ts)
+            return self.save_user_data(data)
 
     def export_user_data(self, user_id):
         """匯出用戶資料"""
         data = self.load_user_data()
+        table = KeywordTable(data["keywords"])
+
+        user_info = dict(data["users"].get(user_id, {}))
+        user_info["preferred_keywords"] = resolve_preferred_keywords(user_info.get("preferred_keywords", []), table)
 
         user_export = {
-            "user_info": data["users"].get(user_id, {}),
+            "user_info": user_info,
             "favorites": data["favorites"].get(user_id, []),
-            "search_history": data["search_history"].get(user_id, []),
+            "search_history": SearchHistoryRing(data["search_history"].get(user_id)).to_records(table),
             "exported_at": datetime.now().strftime("%Y-%m-%d %H:%M:%S")
         }
 
-        return user_export
\ No newline at end of file
+        return user_export
+
+    def export_all_users(self, output, active_since=None, has_favorites=False):
+        """以 NDJSON 串流匯出所有用戶資料，可篩選活躍時間與是否有收藏，回傳匯出筆數"""
+        exported_at = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+        count = 0
+
+        for user_id, user_info, lookup, table in self._iter_user_records():
+            user_info = migrate_user_record(user_info, table) if user_info is not None else {}
+            user_info["preferred_keywords"] = resolve_preferred_keywords(user_info["preferred_keywords"], table)
+
+            if active_since is not None and user_info.get("last_interaction", 0) <= active_since:
+                continue
+
+            favorites = migrate_favorites(lookup("favorites") or [])
+            if has_favorites and not favorites:
+                continue
+
+            record = {
+                "user_id": user_id,
+                "user_info": user_info,
+                "favorites": favorites,
+                "search_history": SearchHistoryRing(
+                    migrate_search_history(lookup("search_history") or [], table)
+                ).to_records(table),
+                "settings": lookup("settings") or {},
+                "exported_at": exported_at
+            }
+            output.write(json.dumps(record, ensure_ascii=False, separators=(',', ':')))
+            output.write("\n")
+            count += 1
+
+        return count
+
+    def _iter_user_records(self):
+        """逐一產生 (用戶ID, 用戶資料, 查詢其他區塊的函式, 關鍵字字串表)，不載入整份資料"""
+        if self.backend is not None:
+            table = self._keyword_table
+            for key in self.backend.keys("users:"):
+                user_id = key[len("users:"):]
+                yield user_id, self.backend.get(key), \
+                    lambda section, user_id=user_id: self.backend.get(f"{section}:{user_id}"), table
+            return
+
+        if not os.path.exists(self.user_data_file):
+            return
+
+        # MessagePack 檔案無法串流解析，退回完整載入
+        if not self.serializer.is_json:
+            data = self.load_user_data()
+            table = KeywordTable(data["keywords"])
+            for user_id, user_info in data["users"].items():
+                yield user_id, user_info, \
+                    lambda section, user_id=user_id: data.get(section, {}).get(user_id), table
+            return
+
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            # 第一次掃描：把收藏、歷史、設定暫存到磁碟上的 SQLite，供第二次掃描依用戶查詢
+            spill = sqlite3.connect(os.path.join(tmp_dir, "export.db"))
+            spill.execute("CREATE TABLE records (section TEXT, user_id TEXT, value TEXT, "
+                          "PRIMARY KEY (section, user_id))")
+
+            keywords = []
+            with open_text_stream(self.user_data_file) as f:
+                reader = JSONStreamReader(f)
+                for section in reader.iter_object():
+                    if section == "keywords":
+                        keywords = reader.read_value()
+                        continue
+                    if section not in USER_SECTIONS or section == "users":
+                        continue
+                    batch = []
+                    for user_id in reader.iter_object():
+                        batch.append((section, user_id, reader.read_value_text()))
+                        if len(batch) >= 1000:
+                            spill.executemany("INSERT OR REPLACE INTO records VALUES (?, ?, ?)", batch)
+                            batch = []
+                    spill.executemany("INSERT OR REPLACE INTO records VALUES (?, ?, ?)", batch)
+            spill.commit()
+
+            def lookup(section, user_id):
+                row = spill.execute("SELECT value FROM records WHERE section = ? AND user_id = ?",
+                                    (section, user_id)).fetchone()
+                return json.loads(row[0]) if row else None
+
+            # 舊版資料的關鍵字會在遷移時加入同一份字串表
+            table = KeywordTable(keywords)
+
+            # 第二次掃描：逐筆讀取用戶
+            try:
+                with open_text_stream(self.user_data_file) as f:
+                    reader = JSONStreamReader(f)
+                    for section in reader.iter_object():
+                        if section != "users":
+                            continue
+                        for user_id in reader.iter_object():
+                            yield user_id, reader.read_value(), \
+                                lambda name, user_id=user_id: lookup(name, user_id), table
+            finally:
+                spill.close()